@@ -1,3 +1,14 @@
 from .api import TmMoscowAPI
+from .concurrency import AIMDController, ConcurrencyStats
+from .enums import RequestLane
+from .limiter import LimiterStats, RequestLimiter, use_request_lane
 
-__all__ = ["TmMoscowAPI"]
+__all__ = [
+    "AIMDController",
+    "ConcurrencyStats",
+    "LimiterStats",
+    "RequestLane",
+    "RequestLimiter",
+    "TmMoscowAPI",
+    "use_request_lane",
+]
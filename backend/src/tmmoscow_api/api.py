@@ -3,18 +3,22 @@ import contextlib
 import hashlib
 import logging
 import re
+import time
 import typing
-from collections.abc import Generator
+from collections.abc import AsyncIterator, Callable, Generator, MutableMapping
 from datetime import datetime
+from http import HTTPStatus
 from pathlib import Path
 from types import TracebackType
 from typing import Any, Final, Literal, cast, overload
 from urllib.parse import urljoin
 
 import aiohttp
+from aiohttp import hdrs
 from selectolax.parser import HTMLParser, Node
 from yarl import URL
 
+from .concurrency import AIMDController
 from .const import (
     AUTHOR_PATTERN,
     BASE_URL,
@@ -31,6 +35,7 @@ from .const import (
     VIEWS_PATTERN,
 )
 from .enums import DistanceType, ParsedContentLineType, _ParseCompetitionFrom
+from .limiter import LimiterStats, RequestLimiter
 from .types import (
     CompetitionDetail,
     CompetitionDetailFiles,
@@ -39,6 +44,7 @@ from .types import (
     ContentLine,
     ContentSubtitle,
     File,
+    FileValidators,
 )
 from .utils import get_body_html, get_html_text, get_url_parameter_value, node_with_text
 
@@ -46,12 +52,52 @@ logger: Final[logging.Logger] = logging.getLogger(name=__name__)
 
 
 class TmMoscowAPI:
-    def __init__(self, timeout: int = 5, max_requests_per_second: int = 10) -> None:
+    def __init__(
+        self,
+        timeout: int = 5,
+        max_requests_per_second: int = 10,
+        file_validators: MutableMapping[str, FileValidators] | None = None,
+        page_listener: Callable[[URL, str], None] | None = None,
+        limiter: RequestLimiter | None = None,
+        concurrency: AIMDController | None = None,
+    ) -> None:
+        """
+        `file_validators` maps file urls to validators of their last fetched versions,
+        pass a persistent mapping to skip downloading unchanged files across restarts.
+        `page_listener` is called with url and html of every fetched page, e.g. to archive
+        pages and parse them again later with `parse_*` methods.
+        `limiter` schedules requests of different lanes (see `use_request_lane`), by default
+        at most `max_requests_per_second` requests are in flight.
+        `concurrency` adapts the limit of the limiter to how fast tmmoscow.ru responds,
+        the limit stays fixed without it.
+        """
+        self._limiter = (
+            RequestLimiter(limit=max_requests_per_second) if limiter is None else limiter
+        )
+        self._concurrency = concurrency
+        if concurrency is not None:
+            self._limiter.limit = concurrency.limit
         self._session = aiohttp.ClientSession(
             timeout=aiohttp.ClientTimeout(timeout),
-            connector=aiohttp.TCPConnector(limit=max_requests_per_second),
+            # Requests are queued by the limiter, the connector shouldn't queue them again
+            connector=aiohttp.TCPConnector(
+                limit=self._limiter.limit if concurrency is None else concurrency.max_limit
+            ),
             headers=DEFAULT_HEADERS,
         )
+        self._file_validators = {} if file_validators is None else file_validators
+        self._page_listener = page_listener
+
+    @property
+    def limiter(self) -> RequestLimiter:
+        return self._limiter
+
+    @property
+    def concurrency(self) -> AIMDController | None:
+        return self._concurrency
+
+    def stats(self) -> LimiterStats:
+        return self._limiter.stats()
 
     async def get_recent_competitions(
         self, distance_type: DistanceType, *, offset: int = 0
@@ -59,6 +105,13 @@ class TmMoscowAPI:
         """Get data on 30 (or less) latest competitions with offset"""
         params = {"go": "News", "in": "cat", "id": distance_type.id, "page": offset}
         html = await self._get(INDEX_PATH, params=params)
+        return self.parse_recent_competitions(html, distance_type=distance_type)
+
+    @classmethod
+    def parse_recent_competitions(
+        cls, html: str, distance_type: DistanceType
+    ) -> list[CompetitionSummary]:
+        """Parse category page fetched by `get_recent_competitions`"""
         parser = HTMLParser(html)
 
         news_node = parser.css_first(
@@ -70,7 +123,7 @@ class TmMoscowAPI:
         tr_nodes = news_node.css("tr")
         for i in range(0, len(tr_nodes), 5):
             nodes_chunk = tr_nodes[i : i + 5]
-            competition = self._parse_competition_summary(
+            competition = cls._parse_competition_summary(
                 tr_nodes=nodes_chunk,
                 distance_type=distance_type,
                 parse_competition_from=_ParseCompetitionFrom.CATEGORY_PAGE,
@@ -95,13 +148,37 @@ class TmMoscowAPI:
         params = {"go": "News", "in": "view", "id": id}
         if not parse_created_at:
             html = await self._get(INDEX_PATH, params=params)
-            created_at = None
+            created_at_html = None
         else:
             params_created_at = {"go": "News", "file": "print", "id": id}
             html, created_at_html = await asyncio.gather(
                 asyncio.create_task(self._get(INDEX_PATH, params=params)),
                 asyncio.create_task(self._get(INDEX_PATH, params=params_created_at)),
             )
+        competition = self.parse_competition_data(id, html=html, created_at_html=created_at_html)
+        if not with_files:
+            return competition
+
+        file_nodes = list(self._file_nodes_generator(competition.content_blocks))
+        file_urls = [URL(file_node.attributes["href"]) for file_node in file_nodes]
+        # Allow only pdf files (reference: https://tmmoscow.ru/news/publish_info.pdf)
+        file_urls = [
+            url for url in file_urls if url.host == HOST and Path(url.path).suffix == ".pdf"
+        ]
+        file_urls = list(dict.fromkeys(file_urls))  # make file urls list unique
+        async with asyncio.TaskGroup() as tg:
+            tasks = [tg.create_task(self._get_file(url)) for url in file_urls]
+        files = [task.result() for task in tasks]
+
+        return CompetitionDetailFiles(competition=competition, files=files)
+
+    @classmethod
+    def parse_competition_data(
+        cls, id: int, html: str, created_at_html: str | None = None
+    ) -> CompetitionDetail:
+        """Parse competition page and optionally its print version fetched by `get_competition_data`"""
+        created_at = None
+        if created_at_html is not None:
             parser_created_at = HTMLParser(created_at_html)
             _, created_at_str = (
                 parser_created_at.css_first("body > div > b")
@@ -115,7 +192,7 @@ class TmMoscowAPI:
             "body > table:nth-child(4) > tbody > tr > td:nth-child(3) > table:nth-child(7) > tbody"
         )
         tr_nodes = content_node.css("tr")
-        competition_summary = self._parse_competition_summary(
+        competition_summary = cls._parse_competition_summary(
             content_node=content_node,
             parse_competition_from=_ParseCompetitionFrom.COMPETITION_PAGE,
             competition_id=id,
@@ -123,7 +200,7 @@ class TmMoscowAPI:
         content_blocks = []
         for node in tr_nodes[5:]:
             content_node = node.css_first("td")
-            content_blocks = self._parse_content(content_html=cast(str, content_node.html))
+            content_blocks = cls._parse_content(content_html=cast(str, content_node.html))
             if content_blocks:
                 break
 
@@ -140,9 +217,10 @@ class TmMoscowAPI:
             else:
                 author = None
 
-        competition = CompetitionDetail(
+        return CompetitionDetail(
             title=competition_summary.title,
             id=competition_summary.id,
+            distance_type=competition_summary.distance_type,
             event_dates=competition_summary.event_dates,
             event_begins_at=competition_summary.event_begins_at,
             event_ends_at=competition_summary.event_ends_at,
@@ -154,32 +232,6 @@ class TmMoscowAPI:
             content_blocks=content_blocks,
             created_at=created_at,
         )
-        if not with_files:
-            return competition
-
-        file_nodes = list(self._file_nodes_generator(competition.content_blocks))
-        file_urls = [URL(file_node.attributes["href"]) for file_node in file_nodes]
-        # Allow only pdf files (reference: https://tmmoscow.ru/news/publish_info.pdf)
-        file_urls = [
-            url for url in file_urls if url.host == HOST and Path(url.path).suffix == ".pdf"
-        ]
-        file_urls = list(dict.fromkeys(file_urls))  # make file urls list unique
-        async with asyncio.TaskGroup() as tg:
-            tasks = [tg.create_task(self._get(url=url, raw=True)) for url in file_urls]
-        file_contents = [task.result() for task in tasks]
-        files: list[File] = []
-        for url, content in zip(file_urls, file_contents, strict=False):
-            filename = Path(url.path).name
-            if content is None:
-                files.append(File(filename=filename, content=None, url=str(url), sha256_hash=""))
-                continue
-            m = hashlib.sha256()
-            m.update(content)
-            files.append(
-                File(filename=filename, content=content, url=str(url), sha256_hash=m.hexdigest())
-            )
-
-        return CompetitionDetailFiles(competition=competition, files=files)
 
     @staticmethod
     @overload
@@ -310,6 +362,7 @@ class TmMoscowAPI:
         return CompetitionSummary(
             id=id_value,
             title=title,
+            distance_type=distance_type,
             event_dates=event_dates,
             event_begins_at=event_begins_at,
             event_ends_at=event_ends_at,
@@ -523,6 +576,31 @@ class TmMoscowAPI:
                     ]
                     yield from file_nodes
 
+    @contextlib.asynccontextmanager
+    async def _request(
+        self, method: str, url: str | URL, **kwargs: Any
+    ) -> AsyncIterator[aiohttp.ClientResponse]:
+        """Send request within a slot of the limiter and report the outcome to `concurrency`"""
+        async with self._limiter.slot():
+            started_at = time.monotonic()
+            try:
+                async with self._session.request(method=method, url=url, **kwargs) as response:
+                    # Latency is measured up to the headers, file bodies take long by size
+                    if self._concurrency is not None:
+                        self._concurrency.on_response(
+                            started_at,
+                            latency=time.monotonic() - started_at,
+                            status=response.status,
+                            saturated=self._limiter.saturated,
+                        )
+                        self._limiter.limit = self._concurrency.limit
+                    yield response
+            except TimeoutError:
+                if self._concurrency is not None:
+                    self._concurrency.on_timeout(started_at)
+                    self._limiter.limit = self._concurrency.limit
+                raise
+
     @overload
     async def _get(
         self, path: str = "", url: str | URL = "", raw: Literal[False] = False, **kwargs: Any
@@ -538,7 +616,7 @@ class TmMoscowAPI:
     ) -> str | bytes | None:
         """Get html or file content from full `url` or `path` relative to base url."""
         url = url or urljoin(BASE_URL, path)
-        async with self._session.request(method="GET", url=url, **kwargs) as response:
+        async with self._request(hdrs.METH_GET, url, **kwargs) as response:
             logger.debug("Sent GET request: %d: %s", response.status, str(response.url))
             if not response.ok:
                 if raw:
@@ -546,7 +624,69 @@ class TmMoscowAPI:
                 response.raise_for_status()
             if raw:
                 return await response.content.read()
-            return await response.text(encoding=HTML_ENCODING)
+            html = await response.text(encoding=HTML_ENCODING)
+        if self._page_listener is not None:
+            self._page_listener(response.url, html)
+        return html
+
+    async def _get_file(self, url: URL) -> File:
+        """
+        Download file unless it is known to be unchanged.
+
+        Files with ETag or Last-Modified are requested conditionally, files with only
+        Content-Length are checked with a HEAD request. Unchanged files are returned
+        with the known hash and without content.
+        """
+        filename = Path(url.path).name
+        known = self._file_validators.get(str(url))
+        headers: dict[str, str] = {}
+        if known is not None:
+            if known.etag is not None:
+                headers["If-None-Match"] = known.etag
+            if known.last_modified is not None:
+                headers["If-Modified-Since"] = known.last_modified
+            if not headers and known.content_length is not None:
+                async with self._request(hdrs.METH_HEAD, url) as response:
+                    logger.debug("Sent HEAD request: %d: %s", response.status, str(response.url))
+                    if response.ok and response.content_length == known.content_length:
+                        return File(
+                            filename=filename,
+                            content=None,
+                            url=str(url),
+                            sha256_hash=known.sha256_hash,
+                            changed=False,
+                        )
+
+        async with self._request(hdrs.METH_GET, url, headers=headers) as response:
+            logger.debug("Sent GET request: %d: %s", response.status, str(response.url))
+            if known is not None and response.status == HTTPStatus.NOT_MODIFIED:
+                return File(
+                    filename=filename,
+                    content=None,
+                    url=str(url),
+                    sha256_hash=known.sha256_hash,
+                    changed=False,
+                )
+            if not response.ok:
+                return File(filename=filename, content=None, url=str(url), sha256_hash="")
+            content = await response.read()
+            etag = response.headers.get(hdrs.ETAG)
+            last_modified = response.headers.get(hdrs.LAST_MODIFIED)
+
+        sha256_hash = hashlib.sha256(content).hexdigest()
+        self._file_validators[str(url)] = FileValidators(
+            sha256_hash=sha256_hash,
+            etag=etag,
+            last_modified=last_modified,
+            content_length=len(content),
+        )
+        return File(
+            filename=filename,
+            content=content,
+            url=str(url),
+            sha256_hash=sha256_hash,
+            changed=known is None or known.sha256_hash != sha256_hash,
+        )
 
     async def close(self) -> None:
         if not self._session.closed:
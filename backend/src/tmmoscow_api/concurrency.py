@@ -0,0 +1,166 @@
+import logging
+import time
+from dataclasses import dataclass
+from typing import Final
+
+logger: Final[logging.Logger] = logging.getLogger(name=__name__)
+
+
+@dataclass(frozen=True)
+class ConcurrencyStats:
+    limit: int
+    min_limit: int
+    max_limit: int
+    increases: int
+    decreases: int
+    timeouts: int
+    server_errors: int
+    latency_spikes: int
+    latency_baseline_ms: float
+    latency_recent_ms: float
+
+
+class AIMDController:
+    """
+    Adaptive limit of requests in flight (additive increase, multiplicative decrease).
+
+    While responses are healthy and the limit is in use, the limit grows by `increase`
+    per `limit` responses, i.e. by `increase` every round trip. A timeout, a 5xx response
+    or a latency spike multiplies it by `backoff`. A spike is recent latency (a fast moving
+    average) exceeding `latency_tolerance` times the baseline (a slow moving average of
+    all latencies) for `spike_responses` responses in a row. The baseline follows lasting
+    changes of latency, and is re-seeded when a spike persists at `min_limit`, so a site
+    that got slower doesn't pin the limit to the floor. Responses to requests started
+    before the last decrease don't decrease the limit again, so one overload costs
+    a single cut.
+    """
+
+    _min_limit: int
+    _max_limit: int
+    _increase: float
+    _backoff: float
+    _latency_tolerance: float
+    _spike_responses: int
+    _baseline_weight: float
+    _recent_weight: float
+    _limit: float
+    _baseline: float | None
+    _recent: float | None
+    _spiking: int
+    _decreased_at: float
+    _increases: int
+    _decreases: int
+    _timeouts: int
+    _server_errors: int
+    _latency_spikes: int
+
+    def __init__(
+        self,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        initial_limit: int | None = None,
+        increase: float = 1.0,
+        backoff: float = 0.5,
+        latency_tolerance: float = 2.0,
+        spike_responses: int = 3,
+        baseline_weight: float = 0.02,
+        recent_weight: float = 0.3,
+    ) -> None:
+        if not 1 <= min_limit <= max_limit:
+            raise ValueError(f"Expected 1 <= {min_limit=} <= {max_limit=}")
+        if not 0 < backoff < 1:
+            raise ValueError(f"Expected 0 < {backoff=} < 1")
+        self._min_limit = min_limit
+        self._max_limit = max_limit
+        self._increase = increase
+        self._backoff = backoff
+        self._latency_tolerance = latency_tolerance
+        self._spike_responses = spike_responses
+        self._baseline_weight = baseline_weight
+        self._recent_weight = recent_weight
+        self._limit = float(
+            min_limit if initial_limit is None else min(max(initial_limit, min_limit), max_limit)
+        )
+        self._baseline = self._recent = None
+        self._spiking = 0
+        self._decreased_at = float("-inf")
+        self._increases = self._decreases = 0
+        self._timeouts = self._server_errors = self._latency_spikes = 0
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def max_limit(self) -> int:
+        return self._max_limit
+
+    def on_response(self, started_at: float, latency: float, status: int, saturated: bool) -> None:
+        """
+        Account a response to a request started at `started_at` (`time.monotonic()`).
+
+        `saturated` tells whether the limit was in use, an idle client has no evidence
+        that more requests in flight would be served as well.
+        """
+        if status >= 500:
+            self._server_errors += 1
+            self._decrease(started_at, reason=f"status {status}")
+            return
+        self._recent = (
+            latency
+            if self._recent is None
+            else self._recent + (latency - self._recent) * self._recent_weight
+        )
+        self._baseline = (
+            latency
+            if self._baseline is None
+            else self._baseline + (latency - self._baseline) * self._baseline_weight
+        )
+        if self._recent > self._baseline * self._latency_tolerance:
+            self._spiking += 1
+            if self._spiking < self._spike_responses:
+                return
+            self._spiking = 0
+            if self.limit <= self._min_limit:
+                # Nothing left to cut, this is the latency the site serves now
+                self._baseline = self._recent
+                return
+            self._latency_spikes += 1
+            self._decrease(started_at, reason=f"latency {self._recent * 1000:.0f} ms")
+            return
+        self._spiking = 0
+        if saturated and self._limit < self._max_limit:
+            previous = self.limit
+            self._limit = min(self._limit + self._increase / self._limit, self._max_limit)
+            self._increases += self.limit > previous
+
+    def on_timeout(self, started_at: float) -> None:
+        self._timeouts += 1
+        self._decrease(started_at, reason="timeout")
+
+    def stats(self) -> ConcurrencyStats:
+        return ConcurrencyStats(
+            limit=self.limit,
+            min_limit=self._min_limit,
+            max_limit=self._max_limit,
+            increases=self._increases,
+            decreases=self._decreases,
+            timeouts=self._timeouts,
+            server_errors=self._server_errors,
+            latency_spikes=self._latency_spikes,
+            latency_baseline_ms=round((self._baseline or 0.0) * 1000, 1),
+            latency_recent_ms=round((self._recent or 0.0) * 1000, 1),
+        )
+
+    def _decrease(self, started_at: float, reason: str) -> None:
+        if started_at < self._decreased_at:
+            return
+        self._decreased_at = time.monotonic()
+        previous = self.limit
+        self._limit = max(self._limit * self._backoff, self._min_limit)
+        # Recent latency starts over, otherwise the spike would keep cutting the limit
+        self._recent = None
+        self._spiking = 0
+        if self.limit < previous:
+            self._decreases += 1
+            logger.info("Decreased concurrency limit %d -> %d: %s", previous, self.limit, reason)
@@ -1,4 +1,4 @@
-from enum import Enum, auto
+from enum import Enum, IntEnum, auto
 
 
 class _BaseCategory(Enum):
@@ -47,3 +47,11 @@ class ParsedContentLineType(Enum):
     FULL_LINE_OR_LINE_BEGINNING = auto()
     LINE_CONTINUATION_OR_TEXT = auto()
     TITLE_UNDERLINE = auto()  # "=====..." line
+
+
+class RequestLane(IntEnum):
+    """Priority of requests to tmmoscow.ru, lower value is served first"""
+
+    INTERACTIVE = 0  # a user is waiting for the response
+    REFRESH = 1  # keeping known competitions up to date
+    BACKFILL = 2  # loading the archive
@@ -0,0 +1,181 @@
+import asyncio
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Iterator, Mapping
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from .enums import RequestLane
+
+# Share of free slots each lane gets while several lanes have waiting requests
+DEFAULT_LANE_WEIGHTS: Mapping[RequestLane, int] = {
+    RequestLane.INTERACTIVE: 16,
+    RequestLane.REFRESH: 4,
+    RequestLane.BACKFILL: 1,
+}
+
+_request_lane: ContextVar[RequestLane] = ContextVar(
+    "request_lane", default=RequestLane.INTERACTIVE
+)
+
+
+@contextmanager
+def use_request_lane(lane: RequestLane) -> Iterator[None]:
+    """Send requests made inside the block (and tasks created there) through `lane`"""
+    token = _request_lane.set(lane)
+    try:
+        yield
+    finally:
+        _request_lane.reset(token)
+
+
+@dataclass(frozen=True)
+class LimiterStats:
+    limit: int
+    in_flight: int
+    interactive_queued: int
+    refresh_queued: int
+    backfill_queued: int
+    interactive_wait_avg_ms: float
+    refresh_wait_avg_ms: float
+    backfill_wait_avg_ms: float
+    max_wait_ms: float
+
+
+class RequestLimiter:
+    """
+    Limit of requests in flight shared by request lanes.
+
+    Requests over the limit wait in the queue of their lane. A freed slot goes to the lane
+    with the least weighted service so far (weighted fair queuing), so a lane with weight 4
+    gets four slots for every one a lane with weight 1 gets while both have waiting requests.
+    Background lanes never take the last `reserved` slots, so interactive requests don't wait
+    for background requests to finish.
+    """
+
+    _limit: int
+    _weights: Mapping[RequestLane, int]
+    _reserved: int
+    _in_flight: int
+    _waiters: dict[RequestLane, deque[asyncio.Future[None]]]
+    _finish_times: dict[RequestLane, float]
+    _virtual_time: float
+    _wait_total: dict[RequestLane, float]
+    _wait_count: dict[RequestLane, int]
+    _max_wait: float
+
+    def __init__(
+        self,
+        limit: int,
+        weights: Mapping[RequestLane, int] = DEFAULT_LANE_WEIGHTS,
+        reserved: int = 1,
+    ) -> None:
+        self._limit = limit
+        self._weights = weights
+        self._reserved = reserved
+        self._in_flight = 0
+        self._waiters = {lane: deque() for lane in RequestLane}
+        self._finish_times = dict.fromkeys(RequestLane, 0.0)
+        self._virtual_time = 0.0
+        self._wait_total = dict.fromkeys(RequestLane, 0.0)
+        self._wait_count = dict.fromkeys(RequestLane, 0)
+        self._max_wait = 0.0
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @limit.setter
+    def limit(self, value: int) -> None:
+        if value != self._limit:
+            self._limit = value
+            self._dispatch()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def saturated(self) -> bool:
+        """Whether all slots are taken or requests are waiting for them"""
+        return self._in_flight >= self._limit or any(self._waiters.values())
+
+    @asynccontextmanager
+    async def slot(self, lane: RequestLane | None = None) -> AsyncIterator[None]:
+        """Hold a slot while the block runs, the lane defaults to the one in use"""
+        if lane is None:
+            lane = _request_lane.get()
+        enqueued_at = time.monotonic()
+        await self._acquire(lane)
+        self._record_wait(lane, time.monotonic() - enqueued_at)
+        try:
+            yield
+        finally:
+            self._in_flight -= 1
+            self._dispatch()
+
+    def stats(self) -> LimiterStats:
+        def wait_avg_ms(lane: RequestLane) -> float:
+            count = self._wait_count[lane]
+            return round(self._wait_total[lane] / count * 1000, 1) if count else 0.0
+
+        def queued(lane: RequestLane) -> int:
+            return sum(not future.done() for future in self._waiters[lane])
+
+        return LimiterStats(
+            limit=self._limit,
+            in_flight=self._in_flight,
+            interactive_queued=queued(RequestLane.INTERACTIVE),
+            refresh_queued=queued(RequestLane.REFRESH),
+            backfill_queued=queued(RequestLane.BACKFILL),
+            interactive_wait_avg_ms=wait_avg_ms(RequestLane.INTERACTIVE),
+            refresh_wait_avg_ms=wait_avg_ms(RequestLane.REFRESH),
+            backfill_wait_avg_ms=wait_avg_ms(RequestLane.BACKFILL),
+            max_wait_ms=round(self._max_wait * 1000, 1),
+        )
+
+    def _lane_limit(self, lane: RequestLane) -> int:
+        if lane == RequestLane.INTERACTIVE:
+            return self._limit
+        return max(self._limit - self._reserved, 1)
+
+    async def _acquire(self, lane: RequestLane) -> None:
+        queue = self._waiters[lane]
+        if not queue:
+            # An idle lane doesn't save up service for later
+            self._finish_times[lane] = max(self._finish_times[lane], self._virtual_time)
+        future = asyncio.get_running_loop().create_future()
+        queue.append(future)
+        # Take a free slot at once unless a lane ahead in order is waiting for it
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over right before the cancellation
+                self._in_flight -= 1
+                self._dispatch()
+            raise
+
+    def _dispatch(self) -> None:
+        while True:
+            lanes = []
+            for lane, queue in self._waiters.items():
+                while queue and queue[0].done():
+                    # Cancelled while waiting
+                    queue.popleft()
+                if queue and self._in_flight < self._lane_limit(lane):
+                    lanes.append(lane)
+            if not lanes:
+                return
+            lane = min(lanes, key=lambda lane: (self._finish_times[lane], lane))
+            self._virtual_time = self._finish_times[lane]
+            self._finish_times[lane] += 1 / self._weights[lane]
+            self._in_flight += 1
+            self._waiters[lane].popleft().set_result(None)
+
+    def _record_wait(self, lane: RequestLane, wait: float) -> None:
+        self._wait_total[lane] += wait
+        self._wait_count[lane] += 1
+        self._max_wait = max(self._max_wait, wait)
@@ -3,12 +3,14 @@ from datetime import datetime
 from typing import NamedTuple
 
 from tmmoscow_api.const import INDEX_URL
+from tmmoscow_api.enums import DistanceType
 
 
 @dataclass(frozen=True)
 class CompetitionSummary:
     id: int
     title: str
+    distance_type: DistanceType
     event_dates: str | None
     event_begins_at: datetime | None
     event_ends_at: datetime | None
@@ -51,9 +53,20 @@ class CompetitionDetail(CompetitionSummary):
 @dataclass(frozen=True)
 class File:
     filename: str
-    content: bytes | None
+    content: bytes | None  # None if the file is unchanged since the last fetch or unavailable
     url: str
     sha256_hash: str
+    changed: bool = True
+
+
+@dataclass(frozen=True)
+class FileValidators:
+    """What is known about the last fetched version of a file"""
+
+    sha256_hash: str
+    etag: str | None
+    last_modified: str | None
+    content_length: int | None
 
 
 class CompetitionDetailFiles(NamedTuple):
@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING
+
+from aiogram import Bot, Dispatcher, F
+from aiogram.client.default import DefaultBotProperties
+from aiogram.enums import ParseMode
+from aiogram_i18n import I18nMiddleware
+from loguru import logger
+from tmmoscow_api import AIMDController, TmMoscowAPI
+
+from .const import (
+    COMPETITIONS_LIST_REFRESH_INTERVAL,
+    COMPETITIONS_LIST_TTL,
+    DETAIL_CACHE_MAX_SIZE,
+    DETAIL_CACHE_TTL,
+    DETAIL_CACHE_VIEWS_BUCKET_SIZE,
+    FILE_STORE_GC_GRACE_PERIOD,
+    FILE_STORE_GC_INTERVAL,
+    FILE_VALIDATORS_FLUSH_INTERVAL,
+    FSM_CACHE_MAX_SIZE,
+    FSM_CACHE_TTL,
+    I18N_CACHE_SIZE,
+    NOTIFICATIONS_BATCH_SIZE,
+    OUTBOUND_CHAT_INTERVAL,
+    OUTBOUND_GROUP_CHAT_INTERVAL,
+    OUTBOUND_MAX_RETRIES,
+    OUTBOUND_RATE,
+    PAGE_ARCHIVE_DICTIONARY_SAMPLES,
+    PAGE_ARCHIVE_FLUSH_INTERVAL,
+    RECRAWL_BUDGET_PER_HOUR,
+    RECRAWL_MAX_INTERVAL,
+    RECRAWL_MIN_INTERVAL,
+    RECRAWL_RELOAD_INTERVAL,
+    TELEGRAM_FILES_WARM_UP_INTERVAL,
+    TELEGRAM_FILES_WARM_UP_LIMIT,
+    TIMEZONE,
+    TMMOSCOW_INITIAL_CONCURRENCY,
+    TMMOSCOW_MAX_CONCURRENCY,
+    TMMOSCOW_MIN_CONCURRENCY,
+    USER_CACHE_FLUSH_INTERVAL,
+    USER_CACHE_MAX_SIZE,
+    USER_CACHE_TTL,
+)
+from .database import PostgresStorage, SQLSessionContext, create_pool
+from .enums import Locale
+from .handlers import admin, inline, user
+from .middlewares import (
+    DBSessionMiddleware,
+    OutboundQueueMiddleware,
+    UserManager,
+    UserMiddleware,
+)
+from .services import (
+    CompetitionDetailCache,
+    CompetitionIngestor,
+    CompetitionsListCache,
+    EventIndex,
+    FileStore,
+    FileValidatorStore,
+    PageArchive,
+    RecrawlScheduler,
+    SearchIndex,
+    SubscriptionNotifier,
+    TelegramFileCache,
+    UserCache,
+)
+from .utils import CachedFluentRuntimeCore
+
+if TYPE_CHECKING:
+    from .settings import Settings
+
+
+def create_bot(settings: Settings) -> Bot:
+    return Bot(
+        token=settings.bot_token.get_secret_value(),
+        default=DefaultBotProperties(parse_mode=ParseMode.HTML),
+    )
+
+
+def create_dispatcher(settings: Settings, bot: Bot, run_refresher: bool = True) -> Dispatcher:
+    """
+    Create dispatcher with all services and middlewares set up.
+
+    Only one process should refresh competitions on schedule, others refresh them on demand.
+    Every process reloads competitions changed in Postgres into its own indexes.
+    Limits shared by the whole bot, the Telegram send rate and requests to tmmoscow.ru
+    in flight, are split evenly between `settings.workers` processes.
+    """
+    background_tasks: set[asyncio.Task[None]] = set()
+
+    async def on_shutdown() -> None:
+        for task in background_tasks:
+            task.cancel()
+        await asyncio.gather(*background_tasks, return_exceptions=True)
+        await ingestor.close()
+        await notifier.close()
+        await user_cache.close()
+        await tmmoscow.close()
+        await page_archive.close()
+        await file_validators.close()
+
+    pool = create_pool(
+        dsn=settings.build_dsn(),
+        enable_logging=False,
+        pool_size=settings.postgres_pool_size,
+        max_overflow=settings.postgres_max_overflow,
+        pool_timeout=settings.postgres_pool_timeout,
+        pool_recycle=settings.postgres_pool_recycle,
+        pool_pre_ping=settings.postgres_pool_pre_ping,
+        prepared_statement_cache_size=settings.postgres_prepared_statement_cache_size,
+    )
+    page_archive = PageArchive(
+        session_pool=pool,
+        flush_interval=PAGE_ARCHIVE_FLUSH_INTERVAL,
+        dictionary_samples=PAGE_ARCHIVE_DICTIONARY_SAMPLES,
+    )
+    file_validators = FileValidatorStore(
+        session_pool=pool, flush_interval=FILE_VALIDATORS_FLUSH_INTERVAL
+    )
+    tmmoscow = TmMoscowAPI(
+        file_validators=file_validators,
+        page_listener=page_archive.add,
+        concurrency=AIMDController(
+            min_limit=max(TMMOSCOW_MIN_CONCURRENCY // settings.workers, 1),
+            max_limit=max(TMMOSCOW_MAX_CONCURRENCY // settings.workers, 1),
+            initial_limit=max(TMMOSCOW_INITIAL_CONCURRENCY // settings.workers, 1),
+        ),
+    )
+    dp = Dispatcher(
+        storage=PostgresStorage(session_pool=pool, max_size=FSM_CACHE_MAX_SIZE, ttl=FSM_CACHE_TTL)
+    )
+    dp["session_pool"] = pool
+    dp["settings"] = settings
+    dp["tmmoscow"] = tmmoscow
+    dp["page_archive"] = page_archive
+    dp["file_validators"] = file_validators
+    outbound = dp["outbound"] = OutboundQueueMiddleware(
+        rate=OUTBOUND_RATE / settings.workers,
+        chat_interval=OUTBOUND_CHAT_INTERVAL,
+        group_chat_interval=OUTBOUND_GROUP_CHAT_INTERVAL,
+        max_retries=OUTBOUND_MAX_RETRIES,
+    )
+    bot.session.middleware(outbound)
+
+    admin.router.message.filter(F.from_user.id.in_(settings.admin_chat_id))
+
+    dp.include_routers(user.router, inline.router, admin.router)
+    dp.shutdown.register(on_shutdown)
+
+    user_cache = dp["user_cache"] = UserCache(
+        session_pool=pool,
+        max_size=USER_CACHE_MAX_SIZE,
+        ttl=USER_CACHE_TTL,
+        flush_interval=USER_CACHE_FLUSH_INTERVAL,
+    )
+    event_index = dp["event_index"] = EventIndex()
+    search_index = dp["search_index"] = SearchIndex()
+    competitions_cache = dp["competitions_cache"] = CompetitionsListCache(
+        tmmoscow=tmmoscow,
+        ttl=COMPETITIONS_LIST_TTL,
+        refresh_interval=COMPETITIONS_LIST_REFRESH_INTERVAL,
+    )
+    detail_cache = dp["detail_cache"] = CompetitionDetailCache(
+        tmmoscow=tmmoscow,
+        max_size=DETAIL_CACHE_MAX_SIZE,
+        ttl=DETAIL_CACHE_TTL,
+        views_bucket_size=DETAIL_CACHE_VIEWS_BUCKET_SIZE,
+    )
+    file_store = dp["file_store"] = FileStore(
+        root=settings.file_storage_dir,
+        session_pool=pool,
+        grace_period=FILE_STORE_GC_GRACE_PERIOD,
+        gc_interval=FILE_STORE_GC_INTERVAL,
+    )
+    ingestor = dp["ingestor"] = CompetitionIngestor(
+        session_pool=pool, file_store=file_store, file_validators=file_validators
+    )
+    telegram_files = dp["telegram_files"] = TelegramFileCache(
+        bot=bot, session_pool=pool, file_store=file_store, warm_up_chat_id=settings.files_chat_id
+    )
+    competitions_cache.subscribe(lambda _, competitions: event_index.add_many(competitions))
+    competitions_cache.subscribe(lambda _, competitions: search_index.add_many(competitions))
+    competitions_cache.subscribe(lambda _, competitions: detail_cache.observe(competitions))
+    competitions_cache.subscribe(
+        lambda _, competitions: ingestor.upsert_summaries_in_background(competitions)
+    )
+    detail_cache.subscribe(ingestor.ingest_in_background)
+    recrawl_scheduler = dp["recrawl_scheduler"] = RecrawlScheduler(
+        tmmoscow=tmmoscow,
+        session_pool=pool,
+        ingestor=ingestor,
+        budget_per_hour=RECRAWL_BUDGET_PER_HOUR,
+        min_interval=RECRAWL_MIN_INTERVAL,
+        max_interval=RECRAWL_MAX_INTERVAL,
+        reload_interval=RECRAWL_RELOAD_INTERVAL,
+    )
+    if run_refresher:
+        competitions_cache.subscribe(
+            lambda _, competitions: recrawl_scheduler.observe(competitions)
+        )
+
+    i18n_middleware = dp["i18n_middleware"] = I18nMiddleware(
+        core=CachedFluentRuntimeCore(
+            path="translations/{locale}",
+            raise_key_error=False,
+            cache_size=I18N_CACHE_SIZE,
+        ),
+        manager=UserManager(),
+        default_locale=Locale.DEFAULT,
+    )
+    notifier = SubscriptionNotifier(
+        bot=bot,
+        session_pool=pool,
+        i18n=i18n_middleware.core,
+        batch_size=NOTIFICATIONS_BATCH_SIZE,
+    )
+    ingestor.subscribe(notifier.on_ingested)
+    ingestor.subscribe(competitions_cache.on_ingested)
+
+    async def reload_indexes(since: datetime) -> None:
+        """Pick up competitions stored by any process since the previous reload"""
+        # Rows carry the start time of their transaction, so windows overlap to catch
+        # the ones committed after the previous reload
+        overlap = timedelta(seconds=COMPETITIONS_LIST_REFRESH_INTERVAL)
+        while True:
+            await asyncio.sleep(COMPETITIONS_LIST_REFRESH_INTERVAL)
+            now = datetime.now(TIMEZONE)
+            try:
+                async with SQLSessionContext(session_pool=pool) as (repository, _):
+                    competitions = await repository.competitions.get_updated_since(
+                        since=since - overlap
+                    )
+            except Exception:
+                logger.exception("Failed to reload competitions into indexes")
+                continue
+            since = now
+            for competition in competitions:
+                summary = competition.to_summary()
+                search_index.add(summary)
+                if competition.event_ends_at is not None and competition.event_ends_at >= now:
+                    event_index.add(summary)
+                else:
+                    event_index.remove(competition.id)
+
+    async def on_startup() -> None:
+        started_at = datetime.now(TIMEZONE)
+        await page_archive.load()
+        await file_validators.load()
+        async with SQLSessionContext(session_pool=pool) as (repository, _):
+            competitions = await repository.competitions.get_not_finished(
+                since=datetime.now(TIMEZONE)
+            )
+            all_competitions = await repository.competitions.get_all()
+        event_index.add_many(competition.to_summary() for competition in competitions)
+        search_index.add_many(competition.to_summary() for competition in all_competitions)
+        logger.info(
+            "Loaded {} competitions into event index and {} into search index",
+            len(event_index),
+            len(search_index),
+        )
+        if run_refresher:
+            background_tasks.add(asyncio.create_task(competitions_cache.run_refresher()))
+            background_tasks.add(asyncio.create_task(file_store.run_collector()))
+            background_tasks.add(asyncio.create_task(recrawl_scheduler.run()))
+            background_tasks.add(
+                asyncio.create_task(
+                    telegram_files.run_warm_up(
+                        interval=TELEGRAM_FILES_WARM_UP_INTERVAL,
+                        limit=TELEGRAM_FILES_WARM_UP_LIMIT,
+                    )
+                )
+            )
+        background_tasks.add(asyncio.create_task(reload_indexes(since=started_at)))
+        background_tasks.add(asyncio.create_task(notifier.run_sender()))
+        background_tasks.add(asyncio.create_task(user_cache.run_flusher()))
+        background_tasks.add(asyncio.create_task(page_archive.run_flusher()))
+        background_tasks.add(asyncio.create_task(file_validators.run_flusher()))
+
+    dp.startup.register(on_startup)
+
+    db_session_middleware = dp["db_session_middleware"] = DBSessionMiddleware(session_pool=pool)
+    dp.update.outer_middleware(db_session_middleware)
+    dp.update.outer_middleware(UserMiddleware(user_cache=user_cache))
+    i18n_middleware.setup(dispatcher=dp)
+
+    return dp
@@ -0,0 +1,176 @@
+"""
+Work with archived tmmoscow.ru pages.
+
+Usage: python -m bot.archive reparse [--workers N] [--batch-size N]
+
+`reparse` parses the latest archived page of every competition again and writes the result
+through the ingestion path, without a single request to tmmoscow.ru. Run it after the parser
+is changed to bring stored competitions up to date.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING
+
+from loguru import logger
+from tmmoscow_api import TmMoscowAPI
+from tmmoscow_api.types import CompetitionDetailFiles, File
+
+from .database import Repository, create_pool
+from .database.models import PageKinds
+from .services import CompetitionIngestor, decompress_page
+from .settings import Settings
+from .utils.loggers import setup_logger
+
+if TYPE_CHECKING:
+    from tmmoscow_api.types import CompetitionDetail
+
+REPARSE_BATCH_SIZE = 200
+
+# Dictionaries of the current worker process, set by `_init_worker`
+_dictionaries: dict[int, bytes] = {}
+
+
+def _init_worker(dictionaries: dict[int, bytes]) -> None:
+    _dictionaries.update(dictionaries)
+
+
+def _decompress(content: bytes, dictionary_id: int | None) -> str:
+    return decompress_page(
+        content, None if dictionary_id is None else _dictionaries[dictionary_id]
+    )
+
+
+def _parse_competition(
+    competition_id: int,
+    content: bytes,
+    dictionary_id: int | None,
+    print_content: bytes | None,
+    print_dictionary_id: int | None,
+) -> CompetitionDetail:
+    return TmMoscowAPI.parse_competition_data(
+        competition_id,
+        html=_decompress(content, dictionary_id),
+        created_at_html=(
+            None if print_content is None else _decompress(print_content, print_dictionary_id)
+        ),
+    )
+
+
+async def reparse(settings: Settings, workers: int | None, batch_size: int) -> None:
+    session_pool = create_pool(dsn=settings.build_dsn())
+    ingestor = CompetitionIngestor(session_pool=session_pool)
+    async with session_pool() as session:
+        dictionaries = await Repository(session=session).pages.get_dictionaries()
+
+    loop = asyncio.get_running_loop()
+    parsed = failed = new_versions = 0
+    started_at = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(dictionaries,),
+    ) as executor:
+        after_key: int | None = None
+        while True:
+            async with session_pool() as session:
+                repository = Repository(session=session)
+                pages = await repository.pages.get_latest(
+                    PageKinds.COMPETITION, after_key=after_key, limit=batch_size
+                )
+                if not pages:
+                    break
+                print_pages = await repository.pages.get_latest_for_keys(
+                    PageKinds.PRINT, [page.key for page in pages]
+                )
+            after_key = pages[-1].key
+            # Pages are parsed in other processes while earlier ones are being ingested
+            futures = []
+            for page in pages:
+                print_page = print_pages.get(page.key)
+                futures.append(
+                    loop.run_in_executor(
+                        executor,
+                        _parse_competition,
+                        page.key,
+                        page.content,
+                        page.dictionary_id,
+                        None if print_page is None else print_page.content,
+                        None if print_page is None else print_page.dictionary_id,
+                    )
+                )
+            for page, future in zip(pages, futures, strict=True):
+                try:
+                    competition = await future
+                except Exception:
+                    logger.exception("Failed to parse archived page {}", page.id)
+                    failed += 1
+                    continue
+                async with session_pool() as session:
+                    stored_files = await Repository(session=session).files.get_for_competition(
+                        page.key
+                    )
+                # Keep links to files the competition had, their contents are already stored
+                files = [
+                    File(
+                        filename=file.title,
+                        content=None,
+                        url=file.server_path,
+                        sha256_hash=file.sha256_hash,
+                        changed=False,
+                    )
+                    for file in stored_files
+                ]
+                result = await ingestor.ingest(
+                    CompetitionDetailFiles(competition=competition, files=files)
+                )
+                parsed += 1
+                new_versions += result.created
+            elapsed = time.perf_counter() - started_at
+            logger.info("Reparsed {} competitions, {:.0f} per second", parsed, parsed / elapsed)
+
+    async with session_pool() as session:
+        pages_count, raw_size, compressed_size = await Repository(
+            session=session
+        ).pages.get_sizes()
+    await ingestor.close()
+    elapsed = time.perf_counter() - started_at
+    logger.info(
+        "Reparsed {} competitions in {:.1f}s, {} new versions, {} failed",
+        parsed,
+        elapsed,
+        new_versions,
+        failed,
+    )
+    logger.info(
+        "Archive holds {} pages, {} bytes compressed to {} bytes",
+        pages_count,
+        raw_size,
+        compressed_size,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m bot.archive")
+    commands = parser.add_subparsers(dest="command", required=True)
+    reparse_parser = commands.add_parser(
+        "reparse", help="parse archived competition pages again and store the result"
+    )
+    reparse_parser.add_argument(
+        "--workers", type=int, default=None, help="parser processes, CPU count by default"
+    )
+    reparse_parser.add_argument("--batch-size", type=int, default=REPARSE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    setup_logger(suffix="-archive")
+    asyncio.run(reparse(Settings(), workers=args.workers, batch_size=args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
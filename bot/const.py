@@ -3,7 +3,51 @@ from zoneinfo import ZoneInfo
 from tmmoscow_api.enums import DistanceType
 
 MAX_COMPETITIONS_LIST_LEN = 10
+# Competitions listed on one category page of tmmoscow.ru
+COMPETITIONS_UPSTREAM_PAGE_SIZE = 30
+COMPETITIONS_LIST_TTL = 5 * 60  # seconds
+COMPETITIONS_LIST_REFRESH_INTERVAL = 5 * 60  # seconds
+INLINE_RESULTS_PAGE_SIZE = 20  # Telegram accepts up to 50 results per answer
+INLINE_CACHE_TIME = 60  # seconds
+DETAIL_CACHE_MAX_SIZE = 512
+DETAIL_CACHE_TTL = 6 * 60 * 60  # seconds
+DETAIL_CACHE_VIEWS_BUCKET_SIZE = 100
+NOTIFICATIONS_BATCH_SIZE = 100
+OUTBOUND_RATE = 30  # requests per second
+OUTBOUND_CHAT_INTERVAL = 1  # seconds
+OUTBOUND_GROUP_CHAT_INTERVAL = 3  # seconds
+OUTBOUND_MAX_RETRIES = 3
+USER_CACHE_MAX_SIZE = 10_000
+USER_CACHE_TTL = 10 * 60  # seconds
+USER_CACHE_FLUSH_INTERVAL = 5  # seconds
+FSM_CACHE_MAX_SIZE = 10_000
+FSM_CACHE_TTL = 60  # seconds
+I18N_CACHE_SIZE = 4096
+WEBHOOK_ACQUIRE_TIMEOUT = 10  # seconds
+WEBHOOK_SHUTDOWN_TIMEOUT = 30  # seconds
+WORKER_QUEUE_SIZE = 1000
+WORKER_MAX_IN_FLIGHT = 100
 DEFAULT_DISTANCE_TYPE = DistanceType.WALKING
+UPCOMING_DAYS = 14
+MAX_UPCOMING_DAYS = 366
 
 
 TIMEZONE = ZoneInfo("Europe/Moscow")
+FILE_STORE_GC_INTERVAL = 24 * 60 * 60  # seconds
+# Unreferenced files and blobs younger than this may be in the middle of an ingestion
+FILE_STORE_GC_GRACE_PERIOD = 60 * 60  # seconds
+TELEGRAM_FILES_WARM_UP_INTERVAL = 60 * 60  # seconds
+TELEGRAM_FILES_WARM_UP_LIMIT = 20
+PAGE_ARCHIVE_FLUSH_INTERVAL = 10  # seconds
+FILE_VALIDATORS_FLUSH_INTERVAL = 10  # seconds
+# Pages of a kind a compression dictionary for the kind is trained on
+PAGE_ARCHIVE_DICTIONARY_SAMPLES = 50
+# Requests to tmmoscow.ru scheduled article refreshes may take
+RECRAWL_BUDGET_PER_HOUR = 600
+RECRAWL_MIN_INTERVAL = 10 * 60  # seconds
+RECRAWL_MAX_INTERVAL = 7 * 24 * 60 * 60  # seconds
+RECRAWL_RELOAD_INTERVAL = 60 * 60  # seconds
+# Bounds of the adaptive limit of requests to tmmoscow.ru in flight
+TMMOSCOW_MIN_CONCURRENCY = 2
+TMMOSCOW_MAX_CONCURRENCY = 32
+TMMOSCOW_INITIAL_CONCURRENCY = 10
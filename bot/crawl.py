@@ -0,0 +1,340 @@
+"""
+Crawl tmmoscow.ru.
+
+Usage: python -m bot.crawl backfill [--concurrency N] [--restart]
+
+`backfill` walks category pages of every distance type from the newest competition
+to the oldest one and stores each competition with its files. Progress is saved in the
+database after every category page, so an interrupted backfill resumes where it stopped,
+and competitions which are already stored are never fetched again.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any
+
+import aiohttp
+from loguru import logger
+from tmmoscow_api import AIMDController, TmMoscowAPI, use_request_lane
+from tmmoscow_api.enums import DistanceType, RequestLane
+
+from .const import (
+    FILE_STORE_GC_GRACE_PERIOD,
+    FILE_STORE_GC_INTERVAL,
+    FILE_VALIDATORS_FLUSH_INTERVAL,
+    PAGE_ARCHIVE_DICTIONARY_SAMPLES,
+    PAGE_ARCHIVE_FLUSH_INTERVAL,
+    TIMEZONE,
+)
+from .database import Repository, create_pool
+from .services import CompetitionIngestor, FileStore, FileValidatorStore, PageArchive
+from .settings import Settings
+from .utils.loggers import setup_logger
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+BACKFILL_CONCURRENCY = 4
+BACKFILL_MAX_RETRIES = 3
+BACKFILL_RETRY_DELAY = 5  # seconds, doubled after every failed attempt
+BACKFILL_REPORT_INTERVAL = 30  # seconds
+
+
+@dataclass(slots=True)
+class _Progress:
+    distance_type: DistanceType
+    # First page which isn't completely stored yet, saved as the checkpoint
+    checkpoint_page: int
+    page: int
+    ingested: int
+    max_competition_id: int | None
+    min_competition_id: int | None
+    finished: bool
+
+    @property
+    def done_share(self) -> float:
+        """Estimated share of the distance type crawled, ids go down to 1 page by page"""
+        if self.finished:
+            return 1.0
+        if not self.max_competition_id or self.min_competition_id is None:
+            return 0.0
+        return 1 - self.min_competition_id / self.max_competition_id
+
+
+class BackfillCrawler:
+    """
+    Loads every competition ever published on tmmoscow.ru.
+
+    Distance types are crawled at the same time, each one page after page, while at most
+    `concurrency` requests are in flight overall. Failed requests are retried with backoff,
+    a page with competitions which still failed isn't checkpointed, so the next run
+    goes over it again. Requests go through the backfill lane. That only matters when the
+    crawler shares a client with other work: `python -m bot.crawl` runs in its own process
+    with its own limiter, so lanes never order its requests against the bot's.
+    """
+
+    _tmmoscow: TmMoscowAPI
+    _session_pool: async_sessionmaker[AsyncSession]
+    _ingestor: CompetitionIngestor
+    _slots: asyncio.Semaphore
+    _max_retries: int
+    _retry_delay: float
+    _progress: dict[DistanceType, _Progress]
+    _started_at: float
+    _initial_share: float
+    _fetched: int
+    _skipped: int
+    _failed: int
+    _pages: int
+
+    def __init__(
+        self,
+        tmmoscow: TmMoscowAPI,
+        session_pool: async_sessionmaker[AsyncSession],
+        ingestor: CompetitionIngestor,
+        concurrency: int,
+        max_retries: int,
+        retry_delay: float,
+    ) -> None:
+        self._tmmoscow = tmmoscow
+        self._session_pool = session_pool
+        self._ingestor = ingestor
+        self._slots = asyncio.Semaphore(concurrency)
+        self._max_retries = max_retries
+        self._retry_delay = retry_delay
+        self._progress = {}
+        self._started_at = time.monotonic()
+        self._initial_share = 0.0
+        self._fetched = self._skipped = self._failed = self._pages = 0
+
+    async def run(self, restart: bool = False) -> None:
+        await self._load(restart=restart)
+        self._started_at = time.monotonic()
+        self._initial_share = self._done_share()
+        reporter = asyncio.create_task(self._run_reporter())
+        try:
+            async with asyncio.TaskGroup() as tg:
+                with use_request_lane(RequestLane.BACKFILL):
+                    for progress in self._progress.values():
+                        if not progress.finished:
+                            tg.create_task(self._crawl(progress))
+        finally:
+            reporter.cancel()
+            self._report()
+
+    async def _load(self, restart: bool) -> None:
+        async with self._session_pool() as session, session.begin():
+            repository = Repository(session=session)
+            if restart:
+                await repository.backfill.reset()
+            saved = {row.distance_type_id: row for row in await repository.backfill.get_all()}
+        for distance_type in DistanceType:
+            row = saved.get(distance_type.id)
+            self._progress[distance_type] = _Progress(
+                distance_type=distance_type,
+                checkpoint_page=0 if row is None else row.next_page,
+                page=0 if row is None else row.next_page,
+                ingested=0 if row is None else row.ingested,
+                max_competition_id=None if row is None else row.max_competition_id,
+                min_competition_id=None if row is None else row.min_competition_id,
+                finished=row is not None and row.finished_at is not None,
+            )
+
+    async def _crawl(self, progress: _Progress) -> None:
+        last_min_id: int | None = None
+        while not progress.finished:
+            async with self._slots:
+                competitions = await self._retry(
+                    lambda: self._tmmoscow.get_recent_competitions(
+                        progress.distance_type, offset=progress.page
+                    )
+                )
+            ids = [competition.id for competition in competitions]
+            # Pages past the last one are empty or repeat the last one
+            if not ids or (last_min_id is not None and min(ids) >= last_min_id):
+                progress.finished = progress.checkpoint_page == progress.page
+                await self._save(progress)
+                break
+            last_min_id = min(ids)
+
+            async with self._session_pool() as session:
+                ingested_ids = await Repository(session=session).competitions.get_ingested_ids(ids)
+            self._skipped += len(ingested_ids)
+            async with asyncio.TaskGroup() as tg:
+                tasks = [
+                    tg.create_task(self._fetch(competition_id))
+                    for competition_id in ids
+                    if competition_id not in ingested_ids
+                ]
+            fetched = sum(task.result() for task in tasks)
+
+            self._pages += 1
+            progress.ingested += fetched
+            progress.max_competition_id = max(progress.max_competition_id or 0, max(ids))
+            progress.min_competition_id = (
+                last_min_id
+                if progress.min_competition_id is None
+                else min(progress.min_competition_id, last_min_id)
+            )
+            if fetched == len(tasks) and progress.checkpoint_page == progress.page:
+                progress.checkpoint_page += 1
+            progress.page += 1
+            await self._save(progress)
+        if progress.finished:
+            logger.info("Backfill of {} finished", progress.distance_type.name)
+        else:
+            logger.warning(
+                "Backfill of {} reached the last page, pages from {} have failed competitions",
+                progress.distance_type.name,
+                progress.checkpoint_page,
+            )
+
+    async def _fetch(self, competition_id: int) -> bool:
+        """Fetch and store competition with its files, return whether it succeeded"""
+        async with self._slots:
+            try:
+                data = await self._retry(
+                    lambda: self._tmmoscow.get_competition_data(
+                        competition_id, parse_created_at=True, with_files=True
+                    )
+                )
+                await self._ingestor.ingest(data)
+            except Exception:
+                logger.exception("Failed to backfill competition {}", competition_id)
+                self._failed += 1
+                return False
+        self._fetched += 1
+        return True
+
+    async def _retry(self, request: Callable[[], Awaitable[Any]]) -> Any:
+        for attempt in range(self._max_retries - 1):
+            try:
+                return await request()
+            except (aiohttp.ClientError, TimeoutError) as e:
+                delay = self._retry_delay * 2**attempt
+                logger.warning("Request failed: {!r}, retrying in {} seconds", e, delay)
+                await asyncio.sleep(delay)
+        return await request()
+
+    async def _save(self, progress: _Progress) -> None:
+        async with self._session_pool() as session, session.begin():
+            await Repository(session=session).backfill.save(
+                {
+                    "distance_type_id": progress.distance_type.id,
+                    "next_page": progress.checkpoint_page,
+                    "ingested": progress.ingested,
+                    "max_competition_id": progress.max_competition_id,
+                    "min_competition_id": progress.min_competition_id,
+                    "finished_at": datetime.now(TIMEZONE) if progress.finished else None,
+                }
+            )
+
+    def _done_share(self) -> float:
+        return sum(progress.done_share for progress in self._progress.values()) / len(
+            self._progress
+        )
+
+    async def _run_reporter(self) -> None:
+        while True:
+            await asyncio.sleep(BACKFILL_REPORT_INTERVAL)
+            self._report()
+
+    def _report(self) -> None:
+        elapsed = time.monotonic() - self._started_at
+        share = self._done_share()
+        gained = share - self._initial_share
+        eta = (
+            str(timedelta(seconds=round(elapsed * (1 - share) / gained)))
+            if gained > 0
+            else "unknown"
+        )
+        logger.info(
+            "Backfill: {} fetched, {} already stored, {} failed, {} pages, "
+            "{:.2f} competitions per second, {:.1%} done, ETA {}",
+            self._fetched,
+            self._skipped,
+            self._failed,
+            self._pages,
+            self._fetched / elapsed if elapsed else 0.0,
+            share,
+            eta,
+        )
+
+
+async def backfill(settings: Settings, concurrency: int, restart: bool) -> None:
+    session_pool = create_pool(dsn=settings.build_dsn())
+    page_archive = PageArchive(
+        session_pool=session_pool,
+        flush_interval=PAGE_ARCHIVE_FLUSH_INTERVAL,
+        dictionary_samples=PAGE_ARCHIVE_DICTIONARY_SAMPLES,
+    )
+    await page_archive.load()
+    file_validators = FileValidatorStore(
+        session_pool=session_pool, flush_interval=FILE_VALIDATORS_FLUSH_INTERVAL
+    )
+    await file_validators.load()
+    # Back off while tmmoscow.ru struggles, `concurrency` is only the upper bound
+    tmmoscow = TmMoscowAPI(
+        file_validators=file_validators,
+        page_listener=page_archive.add,
+        concurrency=AIMDController(max_limit=concurrency, initial_limit=concurrency),
+    )
+    file_store = FileStore(
+        root=settings.file_storage_dir,
+        session_pool=session_pool,
+        grace_period=FILE_STORE_GC_GRACE_PERIOD,
+        gc_interval=FILE_STORE_GC_INTERVAL,
+    )
+    ingestor = CompetitionIngestor(
+        session_pool=session_pool, file_store=file_store, file_validators=file_validators
+    )
+    crawler = BackfillCrawler(
+        tmmoscow=tmmoscow,
+        session_pool=session_pool,
+        ingestor=ingestor,
+        concurrency=concurrency,
+        max_retries=BACKFILL_MAX_RETRIES,
+        retry_delay=BACKFILL_RETRY_DELAY,
+    )
+    flushers = [
+        asyncio.create_task(page_archive.run_flusher()),
+        asyncio.create_task(file_validators.run_flusher()),
+    ]
+    try:
+        await crawler.run(restart=restart)
+    finally:
+        for flusher in flushers:
+            flusher.cancel()
+        await ingestor.close()
+        await tmmoscow.close()
+        await page_archive.close()
+        await file_validators.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m bot.crawl")
+    commands = parser.add_subparsers(dest="command", required=True)
+    backfill_parser = commands.add_parser(
+        "backfill", help="fetch and store every competition published on tmmoscow.ru"
+    )
+    backfill_parser.add_argument(
+        "--concurrency", type=int, default=BACKFILL_CONCURRENCY, help="requests in flight"
+    )
+    backfill_parser.add_argument(
+        "--restart", action="store_true", help="forget saved progress and start over"
+    )
+    args = parser.parse_args()
+
+    setup_logger(suffix="-crawl")
+    asyncio.run(backfill(Settings(), concurrency=args.concurrency, restart=args.restart))
+
+
+if __name__ == "__main__":
+    main()
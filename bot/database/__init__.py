@@ -1,15 +1,22 @@
 from .context import SQLSessionContext
-from .create_pool import create_pool
+from .create_pool import create_pool, get_pool_stats
 from .models import Base, DBUser
-from .repositories import Repository, UsersRepository
+from .pool import InstrumentedPool, PoolStats
+from .repositories import CompetitionsRepository, Repository, UsersRepository
+from .storage import PostgresStorage
 from .uow import UoW
 
 __all__ = [
     "Base",
+    "CompetitionsRepository",
     "DBUser",
+    "InstrumentedPool",
+    "PoolStats",
+    "PostgresStorage",
     "Repository",
     "SQLSessionContext",
     "UoW",
     "UsersRepository",
     "create_pool",
+    "get_pool_stats",
 ]
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, cast
 
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
@@ -9,10 +9,38 @@ from sqlalchemy.ext.asyncio import (
     create_async_engine,
 )
 
+from .pool import InstrumentedPool
+
 if TYPE_CHECKING:
     from sqlalchemy import URL
 
+    from .pool import PoolStats
+
 
-def create_pool(dsn: str | URL, enable_logging: bool = False) -> async_sessionmaker[AsyncSession]:
-    engine: AsyncEngine = create_async_engine(url=dsn, echo=enable_logging)
+def create_pool(
+    dsn: str | URL,
+    enable_logging: bool = False,
+    pool_size: int = 5,
+    max_overflow: int = 10,
+    pool_timeout: float = 30,
+    pool_recycle: int = -1,
+    pool_pre_ping: bool = False,
+    prepared_statement_cache_size: int = 100,
+) -> async_sessionmaker[AsyncSession]:
+    engine: AsyncEngine = create_async_engine(
+        url=dsn,
+        echo=enable_logging,
+        poolclass=InstrumentedPool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        pool_recycle=pool_recycle,
+        pool_pre_ping=pool_pre_ping,
+        connect_args={"prepared_statement_cache_size": prepared_statement_cache_size},
+    )
     return async_sessionmaker(engine, expire_on_commit=False)
+
+
+def get_pool_stats(session_pool: async_sessionmaker[AsyncSession]) -> PoolStats:
+    engine: AsyncEngine = session_pool.kw["bind"]
+    return cast(InstrumentedPool, engine.sync_engine.pool).stats()
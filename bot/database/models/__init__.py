@@ -1,11 +1,15 @@
+from .backfill import BackfillProgress
 from .base import Base
 from .competitions import Competitions, CompetitionVersions
 from .content import ContentBlocks, ContentLines, ContentLineTypes
-from .files import Files, FilesContentLines
+from .files import Files, FilesContentLines, FileUrls
+from .fsm import FSMStates
+from .pages import PageDictionaries, PageKinds, Pages
 from .subscription import Subscriptions
 from .user import DBUser
 
 __all__ = [
+    "BackfillProgress",
     "Base",
     "DBUser",
     "Competitions",
@@ -15,5 +19,10 @@ __all__ = [
     "ContentLineTypes",
     "Files",
     "FilesContentLines",
+    "FileUrls",
+    "FSMStates",
+    "PageDictionaries",
+    "PageKinds",
+    "Pages",
     "Subscriptions",
 ]
@@ -0,0 +1,24 @@
+from datetime import datetime
+
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base, Int64, TimestampMixin
+
+
+class BackfillProgress(Base, TimestampMixin):
+    """
+    Checkpoint of the backfill of one distance type.
+
+    Category pages before `next_page` are done: every competition listed on them
+    was fetched and stored. Finished distance types have `finished_at` set.
+    """
+
+    __tablename__ = "backfill_progress"
+
+    distance_type_id: Mapped[Int64] = mapped_column(primary_key=True, nullable=False)
+    next_page: Mapped[Int64] = mapped_column(nullable=False, default=0)
+    ingested: Mapped[Int64] = mapped_column(nullable=False, default=0)
+    # Ids go down page by page, the range seen so far tells how much is left
+    max_competition_id: Mapped[Int64] = mapped_column(nullable=True)
+    min_competition_id: Mapped[Int64] = mapped_column(nullable=True)
+    finished_at: Mapped[datetime] = mapped_column(nullable=True)
@@ -0,0 +1,82 @@
+from datetime import datetime
+
+from sqlalchemy import ForeignKey, Index, PrimaryKeyConstraint, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+from tmmoscow_api.types import CompetitionDetail, CompetitionSummary, ContentBlock
+
+from ...utils import get_distance_type
+from .base import Base, Int64, TimestampMixin
+
+
+class Competitions(Base, TimestampMixin):
+    __tablename__ = "competitions"
+
+    id: Mapped[Int64] = mapped_column(primary_key=True, nullable=False)
+    title: Mapped[str] = mapped_column(nullable=False)
+    distance_type_id: Mapped[Int64] = mapped_column(nullable=False)
+    event_dates: Mapped[str] = mapped_column(nullable=True)
+    location: Mapped[str] = mapped_column(nullable=True)
+    views: Mapped[Int64] = mapped_column(nullable=True)
+    logo_url: Mapped[str] = mapped_column(nullable=True)
+    author: Mapped[str] = mapped_column(nullable=True)
+    event_begins_at: Mapped[datetime] = mapped_column(nullable=True)
+    event_ends_at: Mapped[datetime] = mapped_column(nullable=True)
+    competition_created_at: Mapped[datetime] = mapped_column(nullable=True)
+    competition_updated_at: Mapped[datetime] = mapped_column(nullable=True)
+
+    __table_args__ = (
+        # Upcoming events are selected by `event_ends_at >= :start`,
+        # so the end of the interval leads both indexes
+        Index("ix_competitions_event_ends_at_event_begins_at", "event_ends_at", "event_begins_at"),
+        Index(
+            "ix_competitions_distance_type_id_event_ends_at", "distance_type_id", "event_ends_at"
+        ),
+        Index("ix_competitions_distance_type_id_id", "distance_type_id", "id"),
+    )
+
+    def to_summary(self) -> CompetitionSummary:
+        return CompetitionSummary(
+            id=self.id,
+            title=self.title,
+            distance_type=get_distance_type(self.distance_type_id),
+            event_dates=self.event_dates,
+            event_begins_at=self.event_begins_at,
+            event_ends_at=self.event_ends_at,
+            location=self.location,
+            views=self.views,
+            updated_at=self.competition_updated_at,
+            logo_url=self.logo_url,
+        )
+
+    def to_detail(self, content_blocks: list[ContentBlock]) -> CompetitionDetail:
+        return CompetitionDetail(
+            id=self.id,
+            title=self.title,
+            distance_type=get_distance_type(self.distance_type_id),
+            event_dates=self.event_dates,
+            event_begins_at=self.event_begins_at,
+            event_ends_at=self.event_ends_at,
+            location=self.location,
+            views=self.views,
+            updated_at=self.competition_updated_at,
+            logo_url=self.logo_url,
+            author=self.author,
+            content_blocks=content_blocks,
+            created_at=self.competition_created_at,
+        )
+
+
+class CompetitionVersions(Base, TimestampMixin):
+    __tablename__ = "competition_versions"
+
+    competition_id: Mapped[Int64] = mapped_column(ForeignKey("competitions.id"), nullable=False)
+    version: Mapped[Int64] = mapped_column(nullable=False)
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    event_dates: Mapped[str] = mapped_column(nullable=True)
+    location: Mapped[str] = mapped_column(nullable=True)
+    # Last time the article was fetched and found equal to this version
+    verified_at: Mapped[datetime] = mapped_column(server_default=func.now())
+
+    __table_args__ = (
+        PrimaryKeyConstraint("competition_id", "version", name="pk_competition_version"),
+    )
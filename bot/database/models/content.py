@@ -1,28 +1,58 @@
 import enum
 
-from sqlalchemy import Enum, ForeignKey, UniqueConstraint
+from sqlalchemy import (
+    ColumnElement,
+    Enum,
+    ForeignKey,
+    ForeignKeyConstraint,
+    UniqueConstraint,
+    and_,
+    or_,
+)
 from sqlalchemy.orm import Mapped, mapped_column
 
 from .base import Base, Int64, TimestampMixin
 
 
 class ContentBlocks(Base, TimestampMixin):
+    """
+    Content block shared by consecutive versions of a competition.
+
+    A block belongs to every version from the one it was added in up to, but not including,
+    the one it was removed in. Versions which don't change a block don't copy it.
+    """
+
     __tablename__ = "content_blocks"
 
     id: Mapped[Int64] = mapped_column(primary_key=True, nullable=False)
-    competition_id: Mapped[Int64] = mapped_column(
-        ForeignKey("competitions.id"), unique=True, nullable=False
-    )
+    competition_id: Mapped[Int64] = mapped_column(ForeignKey("competitions.id"), nullable=False)
+    # Version the block was added in
     competition_version_id: Mapped[Int64] = mapped_column(nullable=False)
+    removed_in_version: Mapped[Int64] = mapped_column(nullable=True)
     position: Mapped[Int64] = mapped_column(nullable=False)
     title: Mapped[str] = mapped_column(nullable=False)
 
     __table_args__ = (
         UniqueConstraint(
-            "competition_version_id", "position", name="uq_competition_version_position"
+            "competition_id",
+            "competition_version_id",
+            "position",
+            name="uq_competition_version_position",
+        ),
+        ForeignKeyConstraint(
+            ["competition_id", "competition_version_id"],
+            ["competition_versions.competition_id", "competition_versions.version"],
+            name="fk_content_blocks_competition_version",
         ),
     )
 
+    @classmethod
+    def in_version(cls, version: int | ColumnElement[int]) -> ColumnElement[bool]:
+        return and_(
+            cls.competition_version_id <= version,
+            or_(cls.removed_in_version.is_(None), cls.removed_in_version > version),
+        )
+
 
 class ContentLineTypes(enum.Enum):
     CONTENT_LINE = "ContentLine"
@@ -30,17 +60,34 @@ class ContentLineTypes(enum.Enum):
 
 
 class ContentLines(Base, TimestampMixin):
+    """Content line shared by consecutive versions of its block, like the block itself"""
+
     __tablename__ = "content_lines"
 
     id: Mapped[Int64] = mapped_column(primary_key=True, nullable=False)
     content_block_id: Mapped[Int64] = mapped_column(
-        ForeignKey("content_blocks.id"), unique=True, nullable=False
+        ForeignKey("content_blocks.id"), nullable=False
     )
+    added_in_version: Mapped[Int64] = mapped_column(nullable=False)
+    removed_in_version: Mapped[Int64] = mapped_column(nullable=True)
     position: Mapped[Int64] = mapped_column(nullable=False)
     html: Mapped[str] = mapped_column(nullable=False)
     comment: Mapped[str] = mapped_column(nullable=True)
     line_type: Mapped[ContentLineTypes] = mapped_column(Enum(ContentLineTypes), nullable=False)
 
     __table_args__ = (
-        UniqueConstraint("content_block_id", "position", name="uq_content_block_position"),
+        UniqueConstraint(
+            "content_block_id",
+            "position",
+            "added_in_version",
+            name="uq_content_block_position_version",
+        ),
     )
+
+    @classmethod
+    def in_version(cls, version: int | ColumnElement[int]) -> ColumnElement[bool]:
+        """Whether the line belongs to `version`, provided its block does"""
+        return and_(
+            cls.added_in_version <= version,
+            or_(cls.removed_in_version.is_(None), cls.removed_in_version > version),
+        )
@@ -4,14 +4,16 @@ from sqlalchemy.orm import Mapped, mapped_column
 from .base import Base, Int64, TimestampMixin
 
 
-class File(Base, TimestampMixin):
+class Files(Base, TimestampMixin):
     __tablename__ = "files"
 
     id: Mapped[Int64] = mapped_column(primary_key=True, nullable=False)
     title: Mapped[str] = mapped_column(nullable=False)
     server_path: Mapped[str] = mapped_column(Text, nullable=False)
-    storage_path: Mapped[str] = mapped_column(Text, nullable=False)
+    storage_path: Mapped[str] = mapped_column(Text, nullable=True)
     sha256_hash: Mapped[str] = mapped_column(String(64), nullable=False, unique=True)
+    # Set once the file is uploaded to Telegram, later sends reuse it instead of uploading
+    telegram_file_id: Mapped[str] = mapped_column(Text, nullable=True)
 
 
 class FilesContentLines(Base, TimestampMixin):
@@ -25,3 +27,20 @@ class FilesContentLines(Base, TimestampMixin):
         PrimaryKeyConstraint("file_id", "content_line_id", name="pk_file_content_line"),
         UniqueConstraint("content_line_id", "position", name="uq_content_line_position"),
     )
+
+
+class FileUrls(Base, TimestampMixin):
+    """
+    Validators of the last fetched version of a file url.
+
+    They let the next fetch be conditional, so an unchanged file isn't downloaded again.
+    Several urls may serve the same file, so they aren't kept on `files`.
+    """
+
+    __tablename__ = "file_urls"
+
+    url: Mapped[str] = mapped_column(Text, primary_key=True, nullable=False)
+    sha256_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    etag: Mapped[str] = mapped_column(Text, nullable=True)
+    last_modified: Mapped[str] = mapped_column(Text, nullable=True)
+    content_length: Mapped[Int64] = mapped_column(nullable=True)
@@ -0,0 +1,26 @@
+from typing import Any
+
+from sqlalchemy import String
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base, Int64
+
+
+class FSMStates(Base):
+    """
+    FSM state and data of a storage key.
+
+    Missing thread id and business connection id are stored as 0 and empty string.
+    """
+
+    __tablename__ = "fsm_states"
+
+    bot_id: Mapped[Int64] = mapped_column(primary_key=True)
+    chat_id: Mapped[Int64] = mapped_column(primary_key=True)
+    user_id: Mapped[Int64] = mapped_column(primary_key=True)
+    thread_id: Mapped[Int64] = mapped_column(primary_key=True)
+    business_connection_id: Mapped[str] = mapped_column(primary_key=True)
+    destiny: Mapped[str] = mapped_column(String(length=32), primary_key=True)
+    state: Mapped[str | None] = mapped_column(nullable=True)
+    data: Mapped[dict[str, Any]] = mapped_column(JSONB, nullable=False, server_default="{}")
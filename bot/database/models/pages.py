@@ -0,0 +1,49 @@
+import enum
+
+from sqlalchemy import Enum, ForeignKey, Index, LargeBinary, String, Text, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base, Int64, TimestampMixin
+
+
+class PageKinds(enum.Enum):
+    CATEGORY = "category"
+    COMPETITION = "competition"
+    PRINT = "print"
+
+
+class PageDictionaries(Base, TimestampMixin):
+    """Preset dictionary pages of one kind are compressed with, trained on their samples"""
+
+    __tablename__ = "page_dictionaries"
+
+    id: Mapped[Int64] = mapped_column(primary_key=True, nullable=False)
+    kind: Mapped[PageKinds] = mapped_column(Enum(PageKinds), nullable=False)
+    data: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+
+
+class Pages(Base, TimestampMixin):
+    """
+    Raw html of a fetched tmmoscow.ru page, stored once per distinct content.
+
+    `key` is the competition id for competition and print pages and the distance type id
+    for category pages. Pages archived before a dictionary of their kind was trained
+    are compressed without one.
+    """
+
+    __tablename__ = "pages"
+
+    id: Mapped[Int64] = mapped_column(primary_key=True, nullable=False)
+    kind: Mapped[PageKinds] = mapped_column(Enum(PageKinds), nullable=False)
+    key: Mapped[Int64] = mapped_column(nullable=False)
+    url: Mapped[str] = mapped_column(Text, nullable=False)
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    dictionary_id: Mapped[Int64] = mapped_column(ForeignKey("page_dictionaries.id"), nullable=True)
+    size: Mapped[Int64] = mapped_column(nullable=False)
+    content: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("url", "content_hash", name="uq_page_url_content_hash"),
+        # The latest page of each competition is selected for reparsing
+        Index("ix_pages_kind_key_id", "kind", "key", "id"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column
 
 from .base import Base, Int64, TimestampMixin
@@ -10,3 +10,8 @@ class Subscriptions(Base, TimestampMixin):
     id: Mapped[Int64] = mapped_column(primary_key=True, nullable=False)
     user_id: Mapped[Int64] = mapped_column(ForeignKey("users.id"), nullable=False)
     competition_id: Mapped[Int64] = mapped_column(ForeignKey("competitions.id"), nullable=False)
+
+    __table_args__ = (
+        # Also serves as the index to find all subscribers of a competition
+        UniqueConstraint("competition_id", "user_id", name="uq_subscription_competition_user"),
+    )
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+if TYPE_CHECKING:
+    from sqlalchemy.pool import PoolProxiedConnection
+
+
+@dataclass(frozen=True, slots=True)
+class PoolStats:
+    size: int
+    in_use: int
+    idle: int
+    overflow: int
+    checkouts: int
+    connects: int
+    invalidations: int
+    timeouts: int
+    wait_avg_ms: float
+    wait_max_ms: float
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    Queue pool which records how long checkouts wait for a connection.
+
+    Pool events only fire once a connection is obtained, so waiting time and timeouts
+    are measured around `connect()`, the rest is counted with event listeners.
+    """
+
+    checkouts: int
+    connects: int
+    invalidations: int
+    timeouts: int
+    waits: int
+    wait_total: float
+    wait_max: float
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.checkouts = self.connects = self.invalidations = self.timeouts = self.waits = 0
+        self.wait_total = self.wait_max = 0.0
+        event.listen(self, "checkout", self._on_checkout)
+        event.listen(self, "connect", self._on_connect)
+        event.listen(self, "invalidate", self._on_invalidate)
+
+    def connect(self) -> PoolProxiedConnection:
+        started_at = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            wait = time.perf_counter() - started_at
+            self.waits += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+
+    def stats(self) -> PoolStats:
+        return PoolStats(
+            size=self.size(),
+            in_use=self.checkedout(),
+            idle=self.checkedin(),
+            overflow=max(self.overflow(), 0),
+            checkouts=self.checkouts,
+            connects=self.connects,
+            invalidations=self.invalidations,
+            timeouts=self.timeouts,
+            wait_avg_ms=round(self.wait_total / self.waits * 1000, 2) if self.waits else 0.0,
+            wait_max_ms=round(self.wait_max * 1000, 2),
+        )
+
+    def _on_checkout(self, *_: Any) -> None:
+        self.checkouts += 1
+
+    def _on_connect(self, *_: Any) -> None:
+        self.connects += 1
+
+    def _on_invalidate(self, *_: Any) -> None:
+        self.invalidations += 1
@@ -1,5 +1,23 @@
+from .backfill import BackfillRepository
 from .base import BaseRepository
+from .competitions import CompetitionsRepository
+from .content import ContentRepository
+from .files import FilesRepository
+from .fsm import FSMRepository
 from .general import Repository
+from .pages import PagesRepository
+from .subscriptions import SubscriptionsRepository
 from .users import UsersRepository
 
-__all__ = ["BaseRepository", "Repository", "UsersRepository"]
+__all__ = [
+    "BackfillRepository",
+    "BaseRepository",
+    "CompetitionsRepository",
+    "ContentRepository",
+    "FSMRepository",
+    "FilesRepository",
+    "PagesRepository",
+    "Repository",
+    "SubscriptionsRepository",
+    "UsersRepository",
+]
@@ -0,0 +1,28 @@
+from collections.abc import Sequence
+from typing import Any
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from ..models import BackfillProgress
+from .base import BaseRepository
+
+
+class BackfillRepository(BaseRepository):
+    async def get_all(self) -> Sequence[BackfillProgress]:
+        return (await self._session.scalars(select(BackfillProgress))).all()
+
+    async def save(self, row: dict[str, Any]) -> None:
+        statement = insert(BackfillProgress).values(row)
+        await self._session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[BackfillProgress.distance_type_id],
+                set_={
+                    **{key: statement.excluded[key] for key in row if key != "distance_type_id"},
+                    "updated_at": func.now(),
+                },
+            )
+        )
+
+    async def reset(self) -> None:
+        await self._session.execute(delete(BackfillProgress))
@@ -0,0 +1,242 @@
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+from typing import Any, NamedTuple
+
+from sqlalchemy import and_, func, select, true, update
+from sqlalchemy.dialects.postgresql import insert
+from tmmoscow_api.enums import DistanceType
+from tmmoscow_api.types import CompetitionDetail, ContentBlock, ContentLine, ContentSubtitle
+
+from ..models import (
+    Competitions,
+    CompetitionVersions,
+    ContentBlocks,
+    ContentLines,
+    ContentLineTypes,
+)
+from .base import BaseRepository
+
+
+class VersionStats(NamedTuple):
+    versions: int
+    first_stored_at: datetime
+    last_stored_at: datetime
+
+
+class CompetitionsRepository(BaseRepository):
+    async def get(self, competition_id: int) -> Competitions | None:
+        return await self._session.get(Competitions, competition_id)
+
+    async def get_latest(
+        self, distance_type: DistanceType, limit: int, offset: int = 0
+    ) -> Sequence[Competitions]:
+        """Get the most recently published competitions of distance type"""
+        return (
+            await self._session.scalars(
+                select(Competitions)
+                .where(Competitions.distance_type_id == distance_type.id)
+                .order_by(Competitions.id.desc())
+                .limit(limit)
+                .offset(offset)
+            )
+        ).all()
+
+    async def get_detail(self, competition_id: int) -> CompetitionDetail | None:
+        """
+        Get competition with content of its latest version in a single query.
+
+        Returns None if no version is stored or the stored version wasn't verified
+        after the day of the last update seen on a category page ended:
+        tmmoscow.ru only shows the date of the update, so a later edit made
+        on the same day can't be told apart by it.
+        """
+        latest_version = (
+            select(CompetitionVersions.version, CompetitionVersions.verified_at)
+            .where(CompetitionVersions.competition_id == competition_id)
+            .order_by(CompetitionVersions.version.desc())
+            .limit(1)
+            .subquery()
+        )
+        rows = (
+            await self._session.execute(
+                select(
+                    Competitions,
+                    latest_version.c.verified_at,
+                    ContentBlocks.position,
+                    ContentBlocks.title,
+                    ContentLines.line_type,
+                    ContentLines.html,
+                    ContentLines.comment,
+                )
+                .select_from(Competitions)
+                .join(latest_version, true())
+                .outerjoin(
+                    ContentBlocks,
+                    and_(
+                        ContentBlocks.competition_id == Competitions.id,
+                        ContentBlocks.removed_in_version.is_(None),
+                    ),
+                )
+                .outerjoin(
+                    ContentLines,
+                    and_(
+                        ContentLines.content_block_id == ContentBlocks.id,
+                        ContentLines.removed_in_version.is_(None),
+                    ),
+                )
+                .where(Competitions.id == competition_id)
+                .order_by(ContentBlocks.position, ContentLines.position)
+            )
+        ).all()
+        if not rows:
+            return None
+        competition: Competitions = rows[0][0]
+        verified_at: datetime = rows[0][1]
+        if (
+            competition.competition_updated_at is not None
+            and competition.competition_updated_at + timedelta(days=1) > verified_at
+        ):
+            return None
+
+        blocks: dict[int, ContentBlock] = {}
+        for _, _, position, title, line_type, html, comment in rows:
+            if position is None:
+                continue
+            block = blocks.setdefault(position, ContentBlock(title=title, lines=[]))
+            if line_type is ContentLineTypes.CONTENT_LINE:
+                block.lines.append(ContentLine(html=html, comment=comment))
+            elif line_type is ContentLineTypes.CONTENT_SUBTITLE:
+                block.lines.append(ContentSubtitle(html=html))
+        return competition.to_detail(content_blocks=list(blocks.values()))
+
+    async def get_overlapping(
+        self,
+        start: datetime,
+        end: datetime,
+        distance_type: DistanceType | None = None,
+    ) -> Sequence[Competitions]:
+        """Get competitions which take place at least partly in [start, end]"""
+        query = (
+            select(Competitions)
+            .where(Competitions.event_ends_at >= start, Competitions.event_begins_at <= end)
+            .order_by(Competitions.event_begins_at, Competitions.id)
+        )
+        if distance_type is not None:
+            query = query.where(Competitions.distance_type_id == distance_type.id)
+        return (await self._session.scalars(query)).all()
+
+    async def get_all(self) -> Sequence[Competitions]:
+        return (await self._session.scalars(select(Competitions))).all()
+
+    async def get_not_finished(self, since: datetime) -> Sequence[Competitions]:
+        """Get competitions which end at `since` or later"""
+        return (
+            await self._session.scalars(
+                select(Competitions).where(Competitions.event_ends_at >= since)
+            )
+        ).all()
+
+    async def get_updated_since(self, since: datetime) -> Sequence[Competitions]:
+        """Get competitions inserted or updated at `since` or later"""
+        return (
+            await self._session.scalars(
+                select(Competitions).where(Competitions.updated_at >= since)
+            )
+        ).all()
+
+    async def upsert_many(self, rows: Sequence[dict[str, Any]]) -> None:
+        """Insert competitions or update columns present in `rows` with a single statement"""
+        if not rows:
+            return
+        statement = insert(Competitions)
+        await self._session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[Competitions.id],
+                set_={
+                    **{key: statement.excluded[key] for key in rows[0] if key != "id"},
+                    "updated_at": func.now(),
+                },
+            ),
+            rows,
+        )
+
+    async def get_latest_version(self, competition_id: int) -> CompetitionVersions | None:
+        return await self._session.scalar(
+            select(CompetitionVersions)
+            .where(CompetitionVersions.competition_id == competition_id)
+            .order_by(CompetitionVersions.version.desc())
+            .limit(1)
+        )
+
+    async def get_ingested_ids(self, competition_ids: Sequence[int]) -> set[int]:
+        """Get ids of competitions with at least one stored version"""
+        if not competition_ids:
+            return set()
+        return set(
+            (
+                await self._session.scalars(
+                    select(CompetitionVersions.competition_id)
+                    .where(CompetitionVersions.competition_id.in_(competition_ids))
+                    .distinct()
+                )
+            ).all()
+        )
+
+    async def get_version_stats(self, competition_ids: Sequence[int]) -> dict[int, VersionStats]:
+        """Get number of stored versions of competitions and when the first and last were stored"""
+        if not competition_ids:
+            return {}
+        result = await self._session.execute(
+            select(
+                CompetitionVersions.competition_id,
+                func.count(),
+                func.min(CompetitionVersions.created_at),
+                func.max(CompetitionVersions.created_at),
+            )
+            .where(CompetitionVersions.competition_id.in_(competition_ids))
+            .group_by(CompetitionVersions.competition_id)
+        )
+        return {
+            competition_id: VersionStats(versions, first_stored_at, last_stored_at)
+            for competition_id, versions, first_stored_at, last_stored_at in result.tuples()
+        }
+
+    async def add_version(
+        self,
+        competition_id: int,
+        version: int,
+        content_hash: str,
+        event_dates: str | None,
+        location: str | None,
+    ) -> None:
+        await self._session.execute(
+            insert(CompetitionVersions).values(
+                competition_id=competition_id,
+                version=version,
+                content_hash=content_hash,
+                event_dates=event_dates,
+                location=location,
+            )
+        )
+
+    async def mark_verified(self, competition_id: int, version: int) -> None:
+        """Record that the fetched article is still equal to the stored version"""
+        await self._session.execute(
+            update(CompetitionVersions)
+            .where(
+                CompetitionVersions.competition_id == competition_id,
+                CompetitionVersions.version == version,
+            )
+            .values(verified_at=func.now())
+        )
+
+    async def get_versions(
+        self, competition_id: int, versions: Sequence[int]
+    ) -> dict[int, CompetitionVersions]:
+        result = await self._session.scalars(
+            select(CompetitionVersions).where(
+                CompetitionVersions.competition_id == competition_id,
+                CompetitionVersions.version.in_(versions),
+            )
+        )
+        return {version.version: version for version in result}
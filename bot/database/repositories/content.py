@@ -0,0 +1,135 @@
+from collections.abc import Sequence
+from typing import Any, NamedTuple
+
+from sqlalchemy import insert, select, update
+
+from ..models import ContentBlocks, ContentLines, ContentLineTypes
+from .base import BaseRepository
+
+
+class StoredLine(NamedTuple):
+    id: int
+    line_type: ContentLineTypes
+    html: str
+    comment: str | None
+
+
+class StoredBlock(NamedTuple):
+    id: int
+    title: str
+    lines: dict[int, StoredLine]  # by position
+
+
+class ContentDiff(NamedTuple):
+    added: list[tuple[int, str]]  # (line id, html)
+    removed: list[tuple[int, str]]
+
+
+class ContentRepository(BaseRepository):
+    async def add_blocks(self, rows: Sequence[dict[str, Any]]) -> list[int]:
+        """Insert content blocks in bulk, return their ids in the order of `rows`"""
+        if not rows:
+            return []
+        return list(
+            await self._session.scalars(
+                insert(ContentBlocks).returning(ContentBlocks.id, sort_by_parameter_order=True),
+                rows,
+            )
+        )
+
+    async def add_lines(self, rows: Sequence[dict[str, Any]]) -> list[int]:
+        """Insert content lines in bulk, return their ids in the order of `rows`"""
+        if not rows:
+            return []
+        return list(
+            await self._session.scalars(
+                insert(ContentLines).returning(ContentLines.id, sort_by_parameter_order=True),
+                rows,
+            )
+        )
+
+    async def remove_blocks(self, block_ids: Sequence[int], version: int) -> None:
+        """Mark blocks, and so their lines, as not belonging to `version` and later ones"""
+        if not block_ids:
+            return
+        await self._session.execute(
+            update(ContentBlocks)
+            .where(ContentBlocks.id.in_(block_ids))
+            .values(removed_in_version=version)
+        )
+
+    async def remove_lines(self, line_ids: Sequence[int], version: int) -> None:
+        if not line_ids:
+            return
+        await self._session.execute(
+            update(ContentLines)
+            .where(ContentLines.id.in_(line_ids))
+            .values(removed_in_version=version)
+        )
+
+    async def get_latest_content(self, competition_id: int) -> dict[int, StoredBlock]:
+        """Get blocks of the latest version of competition by position"""
+        result = await self._session.execute(
+            select(
+                ContentBlocks.id,
+                ContentBlocks.position,
+                ContentBlocks.title,
+                ContentLines.id,
+                ContentLines.position,
+                ContentLines.line_type,
+                ContentLines.html,
+                ContentLines.comment,
+            )
+            .outerjoin(
+                ContentLines,
+                (ContentLines.content_block_id == ContentBlocks.id)
+                & ContentLines.removed_in_version.is_(None),
+            )
+            .where(
+                ContentBlocks.competition_id == competition_id,
+                ContentBlocks.removed_in_version.is_(None),
+            )
+        )
+        blocks: dict[int, StoredBlock] = {}
+        for block_id, position, title, line_id, line_position, line_type, html, comment in result:
+            block = blocks.setdefault(position, StoredBlock(id=block_id, title=title, lines={}))
+            if line_id is not None:
+                block.lines[line_position] = StoredLine(
+                    id=line_id, line_type=line_type, html=html, comment=comment
+                )
+        return blocks
+
+    async def get_lines_html(self, competition_id: int, version: int) -> list[tuple[int, str]]:
+        """Get (id, html) of all content lines of competition version"""
+        result = await self._session.execute(
+            select(ContentLines.id, ContentLines.html)
+            .join(ContentBlocks, ContentBlocks.id == ContentLines.content_block_id)
+            .where(
+                ContentBlocks.competition_id == competition_id,
+                ContentBlocks.in_version(version),
+                ContentLines.in_version(version),
+            )
+        )
+        return [(line_id, html) for line_id, html in result]
+
+    async def get_diff(
+        self, competition_id: int, from_version: int, to_version: int
+    ) -> ContentDiff:
+        """Get lines present only in `to_version` and lines present only in `from_version`"""
+        in_from_version = ContentBlocks.in_version(from_version) & ContentLines.in_version(
+            from_version
+        )
+        in_to_version = ContentBlocks.in_version(to_version) & ContentLines.in_version(to_version)
+        result = await self._session.execute(
+            select(ContentLines.id, ContentLines.html, in_to_version)
+            .join(ContentBlocks, ContentBlocks.id == ContentLines.content_block_id)
+            .where(
+                ContentBlocks.competition_id == competition_id,
+                in_from_version != in_to_version,
+            )
+            .order_by(ContentBlocks.position, ContentLines.position)
+        )
+        diff = ContentDiff(added=[], removed=[])
+        for line_id, html, added in result:
+            (diff.added if added else diff.removed).append((line_id, html))
+        return diff
@@ -0,0 +1,142 @@
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import delete, exists, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from ..models import (
+    Competitions,
+    ContentBlocks,
+    ContentLines,
+    Files,
+    FilesContentLines,
+    FileUrls,
+    Subscriptions,
+)
+from .base import BaseRepository
+
+
+class FilesRepository(BaseRepository):
+    async def add_many(self, rows: Sequence[dict[str, Any]]) -> dict[str, int]:
+        """Insert files which are not stored yet, return ids of all given files by sha256 hash"""
+        if not rows:
+            return {}
+        # A row can't be updated twice by one statement, the same file may have several urls
+        unique_rows = list({row["sha256_hash"]: row for row in rows}.values())
+        statement = insert(Files)
+        await self._session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[Files.sha256_hash],
+                # Touching the row keeps it from being collected before it is linked
+                set_={
+                    "storage_path": func.coalesce(
+                        Files.storage_path, statement.excluded.storage_path
+                    ),
+                    "updated_at": func.now(),
+                },
+            ),
+            unique_rows,
+        )
+        result = await self._session.execute(
+            select(Files.sha256_hash, Files.id).where(
+                Files.sha256_hash.in_([row["sha256_hash"] for row in unique_rows])
+            )
+        )
+        return dict(result.tuples().all())
+
+    async def link_content_lines(self, rows: Sequence[dict[str, Any]]) -> None:
+        if not rows:
+            return
+        await self._session.execute(insert(FilesContentLines).on_conflict_do_nothing(), rows)
+
+    async def get_hashes(self) -> set[str]:
+        return set((await self._session.scalars(select(Files.sha256_hash))).all())
+
+    async def delete_unreferenced(self, older_than: float) -> list[str]:
+        """Delete files not linked to any content line, return their sha256 hashes"""
+        return list(
+            (
+                await self._session.scalars(
+                    delete(Files)
+                    .where(
+                        ~exists().where(FilesContentLines.file_id == Files.id),
+                        Files.updated_at < func.now() - timedelta(seconds=older_than),
+                    )
+                    .returning(Files.sha256_hash)
+                )
+            ).all()
+        )
+
+    async def get_for_competition(self, competition_id: int) -> list[Files]:
+        """Get stored files linked from the latest version of competition in their order"""
+        files = await self._session.scalars(
+            select(Files)
+            .join(FilesContentLines, FilesContentLines.file_id == Files.id)
+            .join(ContentLines, ContentLines.id == FilesContentLines.content_line_id)
+            .join(ContentBlocks, ContentBlocks.id == ContentLines.content_block_id)
+            .where(
+                ContentBlocks.competition_id == competition_id,
+                ContentBlocks.removed_in_version.is_(None),
+                ContentLines.removed_in_version.is_(None),
+                Files.storage_path.is_not(None),
+            )
+            .order_by(ContentBlocks.position, ContentLines.position, FilesContentLines.position)
+        )
+        return list(dict.fromkeys(files))
+
+    async def get_popular_not_uploaded(self, since: datetime, limit: int) -> Sequence[Files]:
+        """
+        Get stored files without Telegram file id of competitions which end at `since`
+        or later, files of competitions with more subscribers and views go first.
+        """
+        subscribers = (
+            select(Subscriptions.competition_id, func.count().label("count"))
+            .group_by(Subscriptions.competition_id)
+            .subquery()
+        )
+        return (
+            await self._session.scalars(
+                select(Files)
+                .join(FilesContentLines, FilesContentLines.file_id == Files.id)
+                .join(ContentLines, ContentLines.id == FilesContentLines.content_line_id)
+                .join(ContentBlocks, ContentBlocks.id == ContentLines.content_block_id)
+                .join(Competitions, Competitions.id == ContentBlocks.competition_id)
+                .outerjoin(subscribers, subscribers.c.competition_id == Competitions.id)
+                .where(
+                    Files.telegram_file_id.is_(None),
+                    Files.storage_path.is_not(None),
+                    Competitions.event_ends_at >= since,
+                )
+                .group_by(Files.id)
+                .order_by(
+                    func.max(func.coalesce(subscribers.c.count, 0)).desc(),
+                    func.max(Competitions.views).desc().nulls_last(),
+                )
+                .limit(limit)
+            )
+        ).all()
+
+    async def set_telegram_file_id(self, sha256_hash: str, file_id: str | None) -> None:
+        await self._session.execute(
+            update(Files).where(Files.sha256_hash == sha256_hash).values(telegram_file_id=file_id)
+        )
+
+    async def get_urls(self) -> Sequence[FileUrls]:
+        return (await self._session.scalars(select(FileUrls))).all()
+
+    async def upsert_urls(self, rows: Sequence[dict[str, Any]]) -> None:
+        """Insert validators of file urls or replace known ones with a single statement"""
+        if not rows:
+            return
+        statement = insert(FileUrls)
+        await self._session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[FileUrls.url],
+                set_={
+                    **{key: statement.excluded[key] for key in rows[0] if key != "url"},
+                    "updated_at": func.now(),
+                },
+            ),
+            rows,
+        )
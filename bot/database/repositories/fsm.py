@@ -0,0 +1,30 @@
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from ..models import FSMStates
+from .base import BaseRepository
+
+
+class FSMRepository(BaseRepository):
+    async def get(self, key: dict[str, Any]) -> tuple[str | None, dict[str, Any]] | None:
+        """Get (state, data) stored under key columns"""
+        row = (
+            await self._session.execute(select(FSMStates.state, FSMStates.data).filter_by(**key))
+        ).one_or_none()
+        return None if row is None else (row.state, row.data)
+
+    async def set_state(self, key: dict[str, Any], state: str | None) -> None:
+        await self._session.execute(
+            insert(FSMStates)
+            .values(**key, state=state)
+            .on_conflict_do_update(index_elements=list(key), set_={"state": state})
+        )
+
+    async def set_data(self, key: dict[str, Any], data: dict[str, Any]) -> None:
+        await self._session.execute(
+            insert(FSMStates)
+            .values(**key, data=data)
+            .on_conflict_do_update(index_elements=list(key), set_={"data": data})
+        )
@@ -2,7 +2,14 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
+from .backfill import BackfillRepository
 from .base import BaseRepository
+from .competitions import CompetitionsRepository
+from .content import ContentRepository
+from .files import FilesRepository
+from .fsm import FSMRepository
+from .pages import PagesRepository
+from .subscriptions import SubscriptionsRepository
 from .users import UsersRepository
 
 if TYPE_CHECKING:
@@ -15,7 +22,21 @@ class Repository(BaseRepository):
     """
 
     users: UsersRepository
+    backfill: BackfillRepository
+    competitions: CompetitionsRepository
+    content: ContentRepository
+    files: FilesRepository
+    fsm: FSMRepository
+    pages: PagesRepository
+    subscriptions: SubscriptionsRepository
 
     def __init__(self, session: AsyncSession) -> None:
         super().__init__(session=session)
         self.users = UsersRepository(session=session)
+        self.backfill = BackfillRepository(session=session)
+        self.competitions = CompetitionsRepository(session=session)
+        self.content = ContentRepository(session=session)
+        self.files = FilesRepository(session=session)
+        self.fsm = FSMRepository(session=session)
+        self.pages = PagesRepository(session=session)
+        self.subscriptions = SubscriptionsRepository(session=session)
@@ -0,0 +1,72 @@
+from collections.abc import Sequence
+from typing import Any
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from ..models import PageDictionaries, PageKinds, Pages
+from .base import BaseRepository
+
+
+class PagesRepository(BaseRepository):
+    async def add_many(self, rows: Sequence[dict[str, Any]]) -> None:
+        """Insert pages, ones with already archived content are skipped"""
+        if not rows:
+            return
+        await self._session.execute(insert(Pages).on_conflict_do_nothing(), rows)
+
+    async def add_dictionary(self, kind: PageKinds, data: bytes) -> int:
+        return await self._session.scalar(
+            insert(PageDictionaries).values(kind=kind, data=data).returning(PageDictionaries.id)
+        )
+
+    async def get_dictionaries(self) -> dict[int, bytes]:
+        result = await self._session.execute(select(PageDictionaries.id, PageDictionaries.data))
+        return dict(result.tuples().all())
+
+    async def get_latest_dictionaries(self) -> Sequence[PageDictionaries]:
+        """Get the most recently trained dictionary of each page kind"""
+        return (
+            await self._session.scalars(
+                select(PageDictionaries)
+                .distinct(PageDictionaries.kind)
+                .order_by(PageDictionaries.kind, PageDictionaries.id.desc())
+            )
+        ).all()
+
+    async def get_latest(
+        self, kind: PageKinds, after_key: int | None = None, limit: int | None = None
+    ) -> Sequence[Pages]:
+        """Get the most recently archived page of each key, in order of keys"""
+        statement = (
+            select(Pages)
+            .where(Pages.kind == kind)
+            .distinct(Pages.key)
+            .order_by(Pages.key, Pages.id.desc())
+            .limit(limit)
+        )
+        if after_key is not None:
+            statement = statement.where(Pages.key > after_key)
+        return (await self._session.scalars(statement)).all()
+
+    async def get_latest_for_keys(self, kind: PageKinds, keys: Sequence[int]) -> dict[int, Pages]:
+        if not keys:
+            return {}
+        pages = await self._session.scalars(
+            select(Pages)
+            .where(Pages.kind == kind, Pages.key.in_(keys))
+            .distinct(Pages.key)
+            .order_by(Pages.key, Pages.id.desc())
+        )
+        return {page.key: page for page in pages}
+
+    async def get_sizes(self) -> tuple[int, int, int]:
+        """Get number of archived pages, their total raw and compressed size"""
+        result = await self._session.execute(
+            select(
+                func.count(),
+                func.coalesce(func.sum(Pages.size), 0),
+                func.coalesce(func.sum(func.length(Pages.content)), 0),
+            )
+        )
+        return result.tuples().one()
@@ -0,0 +1,28 @@
+from collections.abc import Sequence
+
+from sqlalchemy import func, select
+
+from ..models import DBUser, Subscriptions
+from .base import BaseRepository
+
+
+class SubscriptionsRepository(BaseRepository):
+    async def get_subscribers(self, competition_id: int) -> list[tuple[int, str]]:
+        """Get (user id, locale) of all users subscribed to competition"""
+        result = await self._session.execute(
+            select(DBUser.id, DBUser.locale)
+            .join(Subscriptions, Subscriptions.user_id == DBUser.id)
+            .where(Subscriptions.competition_id == competition_id)
+        )
+        return list(result.tuples())
+
+    async def count_by_competition(self, competition_ids: Sequence[int]) -> dict[int, int]:
+        """Get number of subscribers of competitions which have any"""
+        if not competition_ids:
+            return {}
+        result = await self._session.execute(
+            select(Subscriptions.competition_id, func.count())
+            .where(Subscriptions.competition_id.in_(competition_ids))
+            .group_by(Subscriptions.competition_id)
+        )
+        return dict(result.tuples().all())
@@ -1,6 +1,6 @@
-from typing import cast
+from typing import Any, cast
 
-from sqlalchemy import select
+from sqlalchemy import select, update
 
 from ..models import DBUser
 from .base import BaseRepository
@@ -12,3 +12,8 @@ class UsersRepository(BaseRepository):
             DBUser | None,
             await self._session.scalar(select(DBUser).where(DBUser.id == user_id)),
         )
+
+    async def update_many(self, rows: list[dict[str, Any]]) -> None:
+        """Update users by primary key, each row must contain `id`"""
+        if rows:
+            await self._session.execute(update(DBUser), rows)
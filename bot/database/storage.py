@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import copy
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage
+
+from .repositories import Repository
+
+if TYPE_CHECKING:
+    from aiogram.fsm.storage.base import StateType, StorageKey
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+
+@dataclass(slots=True)
+class _Entry:
+    state: str | None
+    data: dict[str, Any]
+    cached_at: float
+
+
+class PostgresStorage(BaseStorage):
+    """
+    FSM storage in the `fsm_states` table with an in-memory read-through cache.
+
+    Writes go to the database right away and update the cache. Another replica may keep
+    reading its cached value for up to `ttl` seconds, which doesn't happen while updates
+    of a chat are always routed to the same process. A read racing with a write of the same
+    key returns what it read but doesn't cache it, so the write is never overwritten.
+    """
+
+    _session_pool: async_sessionmaker[AsyncSession]
+    _max_size: int
+    _ttl: float
+    _entries: OrderedDict[StorageKey, _Entry]
+    # Writes of keys being read from the database, kept only while reads are in flight
+    _versions: dict[StorageKey, int]
+    _readers: Counter[StorageKey]
+
+    def __init__(
+        self, session_pool: async_sessionmaker[AsyncSession], max_size: int, ttl: float
+    ) -> None:
+        self._session_pool = session_pool
+        self._max_size = max_size
+        self._ttl = ttl
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._readers = Counter()
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        value = state.state if isinstance(state, State) else state
+        async with self._session_pool() as session, session.begin():
+            await Repository(session=session).fsm.set_state(self._columns(key), value)
+        self._bump_version(key)
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.state = value
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        return (await self._get(key)).state
+
+    async def set_data(self, key: StorageKey, data: dict[str, Any]) -> None:
+        async with self._session_pool() as session, session.begin():
+            await Repository(session=session).fsm.set_data(self._columns(key), data)
+        self._bump_version(key)
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.data = copy.deepcopy(data)
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        return copy.deepcopy((await self._get(key)).data)
+
+    async def close(self) -> None:
+        self._entries.clear()
+
+    async def _get(self, key: StorageKey) -> _Entry:
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry.cached_at <= self._ttl:
+            self._entries.move_to_end(key)
+            return entry
+        version = self._versions.setdefault(key, 0)
+        self._readers[key] += 1
+        try:
+            async with self._session_pool() as session:
+                row = await Repository(session=session).fsm.get(self._columns(key))
+            written = self._versions[key] != version
+        finally:
+            self._readers[key] -= 1
+            if not self._readers[key]:
+                del self._readers[key], self._versions[key]
+        state, data = (None, {}) if row is None else row
+        entry = _Entry(state=state, data=data, cached_at=time.monotonic())
+        if written:
+            # The row may be older than the write, the next read fetches it again
+            return entry
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+        return entry
+
+    def _bump_version(self, key: StorageKey) -> None:
+        if key in self._versions:
+            self._versions[key] += 1
+
+    @staticmethod
+    def _columns(key: StorageKey) -> dict[str, Any]:
+        return {
+            "bot_id": key.bot_id,
+            "chat_id": key.chat_id,
+            "user_id": key.user_id,
+            "thread_id": key.thread_id or 0,
+            "business_connection_id": key.business_connection_id or "",
+            "destiny": key.destiny,
+        }
@@ -1,8 +1,17 @@
+from typing import Any
+
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
 from .models import Base
 
 
+@event.listens_for(Session, "after_begin")
+def _mark_connected(session: Session, *_: Any) -> None:
+    session.info["connected"] = True
+
+
 class UoW:
     _session: AsyncSession
 
@@ -11,6 +20,11 @@ class UoW:
     def __init__(self, session: AsyncSession) -> None:
         self._session = session
 
+    @property
+    def connected(self) -> bool:
+        """Whether the session has checked out a connection from the pool at least once"""
+        return bool(self._session.info.get("connected"))
+
     async def commit(self, *instances: Base) -> None:
         self._session.add_all(instances)
         await self._session.commit()
@@ -19,3 +33,13 @@ class UoW:
         for instance in instances:
             await self._session.delete(instance)
         await self._session.commit()
+
+    async def release(self) -> None:
+        """
+        Return the connection to the pool as soon as reading is done.
+
+        Loaded instances become detached but keep their state and can still be committed,
+        the session itself checks out a new connection on the next query.
+        """
+        if self._session.in_transaction():
+            await self._session.close()
@@ -1,3 +1,4 @@
 from .locale import Locale
+from .run_mode import RunMode
 
-__all__: list[str] = ["Locale"]
+__all__: list[str] = ["Locale", "RunMode"]
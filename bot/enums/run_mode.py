@@ -0,0 +1,6 @@
+from enum import StrEnum, auto
+
+
+class RunMode(StrEnum):
+    POLLING = auto()
+    WEBHOOK = auto()
@@ -1,4 +1,5 @@
-from typing import Final
+from dataclasses import asdict
+from typing import Any, Final
 
 from aiogram import Bot, Router
 from aiogram.filters import Command
@@ -6,8 +7,23 @@ from aiogram.types import BotCommand, BotCommandScopeDefault, Message
 from aiogram.utils.markdown import hcode
 from aiogram_i18n import I18nContext, L
 from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from tmmoscow_api import TmMoscowAPI
 
-from ..database import DBUser
+from ..database import DBUser, get_pool_stats
+from ..middlewares import DBSessionMiddleware, OutboundQueueMiddleware
+from ..services import (
+    CompetitionDetailCache,
+    FileStore,
+    FileValidatorStore,
+    PageArchive,
+    RecrawlScheduler,
+    SearchIndex,
+    TelegramFileCache,
+    UserCache,
+)
+from ..utils import CachedFluentRuntimeCore
+from ..webhook import BoundedRequestHandler
 
 router: Final[Router] = Router(name=__name__)
 
@@ -44,3 +60,58 @@ async def cmd_set_commands(message: Message, i18n: I18nContext, bot: Bot, user:
         ),
     )
     logger.info("{} - Set bot commands for next locales: {}", user, ", ".join(available_locales))
+
+
+def _format_stats(**sections: Any) -> str:
+    lines: list[str] = []
+    for name, stats in sections.items():
+        lines.append(f"<b>{name}</b>")
+        items = stats._asdict() if isinstance(stats, tuple) else asdict(stats)
+        lines.extend(f"{key}: {hcode(value)}" for key, value in items.items())
+    return "\n".join(lines)
+
+
+@router.message(Command("stats"))
+async def cmd_stats(
+    message: Message,
+    i18n: I18nContext,
+    detail_cache: CompetitionDetailCache,
+    outbound: OutboundQueueMiddleware,
+    user_cache: UserCache,
+    search_index: SearchIndex,
+    file_store: FileStore,
+    file_validators: FileValidatorStore,
+    telegram_files: TelegramFileCache,
+    page_archive: PageArchive,
+    recrawl_scheduler: RecrawlScheduler,
+    tmmoscow: TmMoscowAPI,
+    db_session_middleware: DBSessionMiddleware,
+    session_pool: async_sessionmaker[AsyncSession],
+    webhook: BoundedRequestHandler | None = None,
+) -> None:
+    sections: dict[str, Any] = {}
+    if isinstance(i18n.core, CachedFluentRuntimeCore):
+        sections["i18n_cache"] = i18n.core.cache_info()
+    if webhook is not None:
+        sections["webhook"] = webhook.stats()
+    if tmmoscow.concurrency is not None:
+        sections["tmmoscow_concurrency"] = tmmoscow.concurrency.stats()
+    await message.answer(
+        i18n.messages.stats(
+            stats=_format_stats(
+                db_pool=get_pool_stats(session_pool),
+                detail_cache=detail_cache.stats(),
+                user_cache=user_cache.stats(),
+                search_index=search_index.stats(),
+                file_store=file_store.stats(),
+                file_validators=file_validators.stats(),
+                telegram_files=telegram_files.stats(),
+                page_archive=page_archive.stats(),
+                recrawl=recrawl_scheduler.stats(),
+                tmmoscow=tmmoscow.stats(),
+                db_sessions=db_session_middleware.stats(),
+                outbound=outbound.stats(),
+                **sections,
+            )
+        )
+    )
@@ -0,0 +1,48 @@
+from typing import Final
+
+from aiogram import Router
+from aiogram.types import InlineQuery, InlineQueryResultArticle, InputTextMessageContent
+from aiogram_i18n import I18nContext
+
+from ..const import INLINE_CACHE_TIME, INLINE_RESULTS_PAGE_SIZE
+from ..services import SearchIndex
+
+router: Final[Router] = Router(name=__name__)
+
+
+@router.inline_query()
+async def handle_inline_query(
+    inline_query: InlineQuery, i18n: I18nContext, search_index: SearchIndex
+) -> None:
+    # Queries arrive on every keystroke, so they are answered from the index only
+    offset = int(inline_query.offset) if inline_query.offset.isdigit() else 0
+    competitions = search_index.search(
+        inline_query.query, offset=offset, limit=INLINE_RESULTS_PAGE_SIZE + 1
+    )
+    has_next_page = len(competitions) > INLINE_RESULTS_PAGE_SIZE
+    await inline_query.answer(
+        results=[
+            InlineQueryResultArticle(
+                id=str(competition.id),
+                title=competition.title,
+                description=" · ".join(
+                    value for value in (competition.event_dates, competition.location) if value
+                ),
+                url=competition.url,
+                thumbnail_url=competition.logo_url,
+                input_message_content=InputTextMessageContent(
+                    message_text=i18n.messages.inline_competition(
+                        url=competition.url,
+                        title=competition.title,
+                        date=competition.event_dates or "—",
+                        location=competition.location or "—",
+                    ),
+                    disable_web_page_preview=True,
+                ),
+            )
+            for competition in competitions[:INLINE_RESULTS_PAGE_SIZE]
+        ],
+        cache_time=INLINE_CACHE_TIME,
+        is_personal=False,
+        next_offset=str(offset + INLINE_RESULTS_PAGE_SIZE) if has_next_page else "",
+    )
@@ -1,17 +1,35 @@
 import logging
+from datetime import datetime, timedelta
 from typing import Final
 
+import aiohttp
 from aiogram import F, Router
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message
 from aiogram_i18n import I18nContext
-from tmmoscow_api import TmMoscowAPI
 from tmmoscow_api.types import CompetitionSummary
 
-from ..const import MAX_COMPETITIONS_LIST_LEN
-from ..database import DBUser, UoW
-from ..keyboards.inline import get_competitions_kb, get_distance_types_kb, get_go_back_kb
+from ..const import (
+    COMPETITIONS_UPSTREAM_PAGE_SIZE,
+    MAX_COMPETITIONS_LIST_LEN,
+    MAX_UPCOMING_DAYS,
+    TIMEZONE,
+    UPCOMING_DAYS,
+)
+from ..database import DBUser, Repository, UoW
+from ..keyboards.inline import (
+    get_competition_kb,
+    get_competitions_kb,
+    get_distance_types_kb,
+    get_go_back_kb,
+)
+from ..services import (
+    CompetitionDetailCache,
+    CompetitionsListCache,
+    EventIndex,
+    TelegramFileCache,
+)
 from ..utils import get_distance_type
 
 router: Final[Router] = Router(name=__name__)
@@ -25,25 +43,123 @@ async def cmd_start(message: Message, state: FSMContext, i18n: I18nContext, user
 
 
 async def get_competitions(
-    tmmoscow: TmMoscowAPI,
+    repository: Repository,
+    uow: UoW,
+    competitions_cache: CompetitionsListCache,
     user: DBUser,
-) -> list[CompetitionSummary]:
+    page: int = 0,
+) -> tuple[list[CompetitionSummary], bool]:
+    """Get competitions on the list page and whether there is a next page"""
     user_distance_type = get_distance_type(user.distance_type_id)
-    competitions = await tmmoscow.get_recent_competitions(distance_type=user_distance_type)
-    if len(competitions) > MAX_COMPETITIONS_LIST_LEN:
-        competitions = competitions[:MAX_COMPETITIONS_LIST_LEN]
-    return competitions
+    offset = page * MAX_COMPETITIONS_LIST_LEN
+    upstream_offset, start = divmod(offset, COMPETITIONS_UPSTREAM_PAGE_SIZE)
+    if start + MAX_COMPETITIONS_LIST_LEN >= COMPETITIONS_UPSTREAM_PAGE_SIZE:
+        # The next page is likely to be opened, have its summaries fetched and stored by then
+        competitions_cache.prefetch(distance_type=user_distance_type, offset=upstream_offset + 1)
+
+    # Positions come from the upstream page, stored competitions may have gaps, so the whole
+    # page is served from one source: the cached page or, while tmmoscow.ru is down, its
+    # stored counterpart
+    try:
+        upstream_competitions = await competitions_cache.get(
+            distance_type=user_distance_type, offset=upstream_offset
+        )
+    except (aiohttp.ClientError, TimeoutError):
+        logger.warning("Failed to get competitions page, serving stored competitions")
+        stored_competitions = await repository.competitions.get_latest(
+            distance_type=user_distance_type,
+            limit=COMPETITIONS_UPSTREAM_PAGE_SIZE,
+            offset=upstream_offset * COMPETITIONS_UPSTREAM_PAGE_SIZE,
+        )
+        await uow.release()
+        upstream_competitions = [competition.to_summary() for competition in stored_competitions]
+    competitions = upstream_competitions[start : start + MAX_COMPETITIONS_LIST_LEN]
+    has_next_page = start + MAX_COMPETITIONS_LIST_LEN < len(upstream_competitions) or (
+        len(upstream_competitions) >= COMPETITIONS_UPSTREAM_PAGE_SIZE
+    )
+    return competitions, has_next_page
 
 
 @router.message(Command("competitions"))
 async def cmd_competitions(
-    message: Message, i18n: I18nContext, tmmoscow: TmMoscowAPI, user: DBUser
+    message: Message,
+    i18n: I18nContext,
+    user: DBUser,
+    repository: Repository,
+    uow: UoW,
+    competitions_cache: CompetitionsListCache,
 ) -> None:
     user_distance_type = get_distance_type(user.distance_type_id)
-    competitions = await get_competitions(tmmoscow=tmmoscow, user=user)
+    competitions, has_next_page = await get_competitions(
+        repository=repository, uow=uow, competitions_cache=competitions_cache, user=user
+    )
     await message.answer(
         i18n.messages.choose_competition(distance_type_title=user_distance_type.title.lower()),
-        reply_markup=get_competitions_kb(competitions),
+        reply_markup=get_competitions_kb(competitions, page=0, has_next_page=has_next_page),
+    )
+
+
+@router.callback_query(F.data.startswith("competitions_page:"))
+async def handle_competitions_page(
+    callback: CallbackQuery,
+    i18n: I18nContext,
+    user: DBUser,
+    repository: Repository,
+    uow: UoW,
+    competitions_cache: CompetitionsListCache,
+) -> None:
+    _, page_str = callback.data.split(":")
+    page = int(page_str)
+    if callback.message is not None:
+        competitions, has_next_page = await get_competitions(
+            repository=repository,
+            uow=uow,
+            competitions_cache=competitions_cache,
+            user=user,
+            page=page,
+        )
+        await callback.message.edit_text(
+            i18n.messages.choose_competition(
+                distance_type_title=get_distance_type(user.distance_type_id).title.lower()
+            ),
+            reply_markup=get_competitions_kb(competitions, page=page, has_next_page=has_next_page),
+        )
+    await callback.answer()
+
+
+@router.message(Command("upcoming"))
+async def cmd_upcoming(
+    message: Message,
+    command: CommandObject,
+    i18n: I18nContext,
+    user: DBUser,
+    event_index: EventIndex,
+) -> None:
+    days = UPCOMING_DAYS
+    if command.args is not None and command.args.strip().isdigit():
+        days = min(max(int(command.args), 1), MAX_UPCOMING_DAYS)
+    user_distance_type = get_distance_type(user.distance_type_id)
+    today = datetime.now(TIMEZONE).date()
+    competitions = event_index.overlapping(
+        start=today, end=today + timedelta(days=days - 1), distance_type=user_distance_type
+    )
+    if not competitions:
+        await message.answer(
+            i18n.messages.no_upcoming_competitions(
+                days=days, distance_type_title=user_distance_type.title.lower()
+            )
+        )
+        return
+    # A keyboard can't have more than 100 buttons, show the soonest competitions
+    shown = competitions[:MAX_COMPETITIONS_LIST_LEN]
+    await message.answer(
+        i18n.messages.upcoming_competitions(
+            days=days,
+            distance_type_title=user_distance_type.title.lower(),
+            shown=len(shown),
+            hidden=len(competitions) - len(shown),
+        ),
+        reply_markup=get_competitions_kb(shown, show_event_dates=True),
     )
 
 
@@ -57,12 +173,19 @@ async def cmd_distance_type(message: Message, i18n: I18nContext, user: DBUser) -
 
 @router.callback_query(F.data.startswith("competition:"))
 async def handle_competition(
-    callback: CallbackQuery, i18n: I18nContext, tmmoscow: TmMoscowAPI
+    callback: CallbackQuery,
+    i18n: I18nContext,
+    repository: Repository,
+    uow: UoW,
+    detail_cache: CompetitionDetailCache,
 ) -> None:
     _, competition_id_str = callback.data.split(":")
     competition_id = int(competition_id_str)
     if callback.message is not None:
-        info = await tmmoscow.get_competition_data(id=competition_id)
+        info = await repository.competitions.get_detail(competition_id)
+        await uow.release()
+        if info is None:
+            info = await detail_cache.get(competition_id)
         await callback.message.edit_text(
             text=i18n.messages.competition_info(
                 url=info.url,
@@ -72,11 +195,30 @@ async def handle_competition(
                 views=str(info.views),
             ),
             disable_web_page_preview=True,
-            reply_markup=get_go_back_kb(menu="choose_competition"),
+            reply_markup=get_competition_kb(competition_id),
         )
     await callback.answer()
 
 
+@router.callback_query(F.data.startswith("competition_files:"))
+async def handle_competition_files(
+    callback: CallbackQuery,
+    i18n: I18nContext,
+    repository: Repository,
+    uow: UoW,
+    telegram_files: TelegramFileCache,
+) -> None:
+    _, competition_id_str = callback.data.split(":")
+    files = await repository.files.get_for_competition(int(competition_id_str))
+    await uow.release()
+    if not files or callback.message is None:
+        await callback.answer(i18n.messages.no_competition_files(), show_alert=True)
+        return
+    await callback.answer()
+    for file in files:
+        await telegram_files.send(chat_id=callback.message.chat.id, file=file)
+
+
 @router.callback_query(F.data.startswith("distance_type:"))
 async def handle_distance_type(
     callback: CallbackQuery, i18n: I18nContext, uow: UoW, user: DBUser
@@ -106,7 +248,12 @@ async def handle_distance_type(
 
 @router.callback_query(F.data.startswith("open_menu:"))
 async def handle_open_menu(
-    callback: CallbackQuery, i18n: I18nContext, user: DBUser, tmmoscow: TmMoscowAPI
+    callback: CallbackQuery,
+    i18n: I18nContext,
+    user: DBUser,
+    repository: Repository,
+    uow: UoW,
+    competitions_cache: CompetitionsListCache,
 ) -> None:
     _, menu = callback.data.split(":")
     match menu:
@@ -116,12 +263,16 @@ async def handle_open_menu(
                 reply_markup=get_distance_types_kb(current_distance_type_id=user.distance_type_id),
             )
         case "choose_competition":
-            competitions = await get_competitions(tmmoscow=tmmoscow, user=user)
+            competitions, has_next_page = await get_competitions(
+                repository=repository, uow=uow, competitions_cache=competitions_cache, user=user
+            )
             await callback.message.edit_text(
                 i18n.messages.choose_competition(
                     distance_type_title=get_distance_type(user.distance_type_id).title.lower()
                 ),
-                reply_markup=get_competitions_kb(competitions),
+                reply_markup=get_competitions_kb(
+                    competitions, page=0, has_next_page=has_next_page
+                ),
             )
         case _:
             pass
@@ -1,3 +1,5 @@
+from functools import cache
+
 from aiogram.types import InlineKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram_i18n import L
@@ -6,6 +8,9 @@ from tmmoscow_api.enums import DistanceType
 from tmmoscow_api.types import CompetitionSummary
 
 
+# Static keyboards are built once, button titles of LazyProxy are resolved
+# to the user's locale only when the markup is sent
+@cache
 def get_distance_types_kb(current_distance_type_id: int) -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.row(
@@ -23,19 +28,57 @@ def get_distance_types_kb(current_distance_type_id: int) -> InlineKeyboardMarkup
     return builder.as_markup()
 
 
-def get_competitions_kb(competitions: list[CompetitionSummary]) -> InlineKeyboardMarkup:
+def get_competitions_kb(
+    competitions: list[CompetitionSummary],
+    show_event_dates: bool = False,
+    page: int | None = None,
+    has_next_page: bool = False,
+) -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.row(
         *[
-            InlineKeyboardButton(text=c.title, callback_data=f"competition:{c.id}")
+            InlineKeyboardButton(
+                text=f"{c.event_dates} · {c.title}" if show_event_dates else c.title,
+                callback_data=f"competition:{c.id}",
+            )
             for c in competitions
         ],
-        InlineKeyboardButton(text=L.buttons.close_menu(), callback_data="close_menu"),
+        width=1,
+    )
+    if page is not None:
+        navigation: list[InlineKeyboardButton] = []
+        if page > 0:
+            navigation.append(
+                InlineKeyboardButton(
+                    text=L.buttons.previous_page(), callback_data=f"competitions_page:{page - 1}"
+                )
+            )
+        if has_next_page:
+            navigation.append(
+                InlineKeyboardButton(
+                    text=L.buttons.next_page(), callback_data=f"competitions_page:{page + 1}"
+                )
+            )
+        builder.row(*navigation)
+    builder.row(InlineKeyboardButton(text=L.buttons.close_menu(), callback_data="close_menu"))
+    return builder.as_markup()
+
+
+def get_competition_kb(competition_id: int) -> InlineKeyboardMarkup:
+    builder = InlineKeyboardBuilder()
+    builder.row(
+        InlineKeyboardButton(
+            text=L.buttons.competition_files(), callback_data=f"competition_files:{competition_id}"
+        ),
+        InlineKeyboardButton(
+            text=L.buttons.go_back(), callback_data="open_menu:choose_competition"
+        ),
         width=1,
     )
     return builder.as_markup()
 
 
+@cache
 def get_go_back_kb(menu: str) -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.row(
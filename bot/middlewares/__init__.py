@@ -1,5 +1,15 @@
-from .database import DBSessionMiddleware
+from .database import DBSessionMiddleware, DBSessionStats
 from .i18n import UserManager
+from .outbound import OutboundQueueMiddleware, OutboundStats, SendLane, use_send_lane
 from .user import UserMiddleware
 
-__all__ = ["DBSessionMiddleware", "UserManager", "UserMiddleware"]
+__all__ = [
+    "DBSessionMiddleware",
+    "DBSessionStats",
+    "OutboundQueueMiddleware",
+    "OutboundStats",
+    "SendLane",
+    "UserManager",
+    "UserMiddleware",
+    "use_send_lane",
+]
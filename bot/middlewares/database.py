@@ -1,4 +1,5 @@
 from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
 from typing import Any
 
 from aiogram import BaseMiddleware
@@ -8,13 +9,29 @@ from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from ..database import SQLSessionContext
 
 
+@dataclass(frozen=True, slots=True)
+class DBSessionStats:
+    updates: int
+    updates_without_connection: int
+
+
 class DBSessionMiddleware(BaseMiddleware):
+    """
+    Provides `repository` and `uow` to handlers.
+
+    Sessions check out a pooled connection only on the first query, so updates which
+    never touch the database don't compete for the pool.
+    """
+
     session_pool: async_sessionmaker[AsyncSession]
+    updates: int
+    updates_without_connection: int
 
-    __slots__ = ("session_pool",)
+    __slots__ = ("session_pool", "updates", "updates_without_connection")
 
     def __init__(self, session_pool: async_sessionmaker[AsyncSession]) -> None:
         self.session_pool = session_pool
+        self.updates = self.updates_without_connection = 0
 
     async def __call__(
         self,
@@ -25,4 +42,14 @@ class DBSessionMiddleware(BaseMiddleware):
         async with SQLSessionContext(session_pool=self.session_pool) as (repository, uow):
             data["repository"] = repository
             data["uow"] = uow
-            return await handler(event, data)
+            try:
+                return await handler(event, data)
+            finally:
+                self.updates += 1
+                if not uow.connected:
+                    self.updates_without_connection += 1
+
+    def stats(self) -> DBSessionStats:
+        return DBSessionStats(
+            updates=self.updates, updates_without_connection=self.updates_without_connection
+        )
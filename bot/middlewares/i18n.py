@@ -7,7 +7,8 @@ from aiogram_i18n.managers import BaseManager
 if TYPE_CHECKING:
     from aiogram.types import User
 
-    from ..database import DBUser, UoW
+    from ..database import DBUser
+    from ..services import UserCache
 
 
 class UserManager(BaseManager):
@@ -20,6 +21,5 @@ class UserManager(BaseManager):
             return event_from_user.language_code
         return cast(str, self.default_locale)
 
-    async def set_locale(self, locale: str, user: DBUser, uow: UoW) -> None:
-        user.locale = locale
-        await uow.commit(user)
+    async def set_locale(self, locale: str, user: DBUser, user_cache: UserCache) -> None:
+        user_cache.set_locale(user, locale)
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import TYPE_CHECKING
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramRetryAfter
+from loguru import logger
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from aiogram import Bot
+    from aiogram.client.session.middlewares.base import NextRequestMiddlewareType
+    from aiogram.methods import Response, TelegramMethod
+    from aiogram.methods.base import TelegramType
+
+# Chats whose pacing slot has passed are forgotten once there are more than this many
+_MAX_TRACKED_CHATS = 10_000
+
+
+class SendLane(IntEnum):
+    """Outbound request priority, lower value is sent first"""
+
+    INTERACTIVE = 0
+    BROADCAST = 1
+
+
+_send_lane: ContextVar[SendLane] = ContextVar("send_lane", default=SendLane.INTERACTIVE)
+
+
+@contextmanager
+def use_send_lane(lane: SendLane) -> Iterator[None]:
+    """Send requests made inside the block (and tasks created there) through `lane`"""
+    token = _send_lane.set(lane)
+    try:
+        yield
+    finally:
+        _send_lane.reset(token)
+
+
+@dataclass(frozen=True, slots=True)
+class OutboundStats:
+    interactive_queued: int
+    broadcast_queued: int
+    sent: int
+    retries: int
+    interactive_wait_avg_ms: float
+    broadcast_wait_avg_ms: float
+    max_wait_ms: float
+
+
+class OutboundQueueMiddleware(BaseRequestMiddleware):
+    """
+    Paces requests addressed to chats to stay within Telegram flood limits.
+
+    Every request with `chat_id` first waits for its chat's pacing slot, then for a token
+    of the global bucket. Tokens are handed out lane by lane, so broadcasts only get
+    the capacity interactive replies leave unused. Requests rejected with RetryAfter
+    are delayed and retried transparently.
+    """
+
+    _rate: float
+    _chat_interval: float
+    _group_chat_interval: float
+    _max_retries: int
+    _tokens: float
+    _refilled_at: float
+    _waiters: dict[SendLane, deque[asyncio.Future[None]]]
+    _dispatcher: asyncio.Task[None] | None
+    _chat_slots: dict[int | str, float]
+    _sent: int
+    _retries: int
+    _wait_total: dict[SendLane, float]
+    _wait_count: dict[SendLane, int]
+    _max_wait: float
+
+    def __init__(
+        self, rate: float, chat_interval: float, group_chat_interval: float, max_retries: int
+    ) -> None:
+        self._rate = rate
+        self._chat_interval = chat_interval
+        self._group_chat_interval = group_chat_interval
+        self._max_retries = max_retries
+        self._tokens = rate
+        self._refilled_at = time.monotonic()
+        self._waiters = {lane: deque() for lane in SendLane}
+        self._dispatcher = None
+        self._chat_slots = {}
+        self._sent = self._retries = 0
+        self._wait_total = dict.fromkeys(SendLane, 0.0)
+        self._wait_count = dict.fromkeys(SendLane, 0)
+        self._max_wait = 0.0
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        chat_id: int | str | None = getattr(method, "chat_id", None)
+        if chat_id is None:
+            return await make_request(bot, method)
+
+        lane = _send_lane.get()
+        attempt = 0
+        while True:
+            enqueued_at = time.monotonic()
+            await self._wait_for_chat(chat_id)
+            await self._acquire(lane)
+            self._record_wait(lane, time.monotonic() - enqueued_at)
+            try:
+                response = await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                if attempt >= self._max_retries:
+                    raise
+                attempt += 1
+                self._retries += 1
+                logger.warning("Flood limit in chat {}, retrying in {}s", chat_id, e.retry_after)
+                self._delay_chat(chat_id, e.retry_after)
+                continue
+            self._sent += 1
+            return response
+
+    def stats(self) -> OutboundStats:
+        def wait_avg_ms(lane: SendLane) -> float:
+            count = self._wait_count[lane]
+            return round(self._wait_total[lane] / count * 1000, 1) if count else 0.0
+
+        return OutboundStats(
+            interactive_queued=len(self._waiters[SendLane.INTERACTIVE]),
+            broadcast_queued=len(self._waiters[SendLane.BROADCAST]),
+            sent=self._sent,
+            retries=self._retries,
+            interactive_wait_avg_ms=wait_avg_ms(SendLane.INTERACTIVE),
+            broadcast_wait_avg_ms=wait_avg_ms(SendLane.BROADCAST),
+            max_wait_ms=round(self._max_wait * 1000, 1),
+        )
+
+    async def _wait_for_chat(self, chat_id: int | str) -> None:
+        now = time.monotonic()
+        if len(self._chat_slots) > _MAX_TRACKED_CHATS:
+            self._chat_slots = {k: v for k, v in self._chat_slots.items() if v > now}
+        slot = max(now, self._chat_slots.get(chat_id, now))
+        # Private chats have positive ids, groups and channels have a stricter limit
+        is_private = isinstance(chat_id, int) and chat_id > 0
+        self._chat_slots[chat_id] = slot + (
+            self._chat_interval if is_private else self._group_chat_interval
+        )
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def _delay_chat(self, chat_id: int | str, delay: float) -> None:
+        self._chat_slots[chat_id] = max(
+            self._chat_slots.get(chat_id, 0.0), time.monotonic() + delay
+        )
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self._rate, self._tokens + (now - self._refilled_at) * self._rate)
+        self._refilled_at = now
+
+    async def _acquire(self, lane: SendLane) -> None:
+        self._refill()
+        if self._tokens >= 1 and not any(self._waiters.values()):
+            self._tokens -= 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[lane].append(future)
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        await future
+
+    async def _dispatch(self) -> None:
+        while True:
+            queue = next((queue for queue in self._waiters.values() if queue), None)
+            if queue is None:
+                return
+            if queue[0].done():
+                # Cancelled while waiting
+                queue.popleft()
+                continue
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+                continue
+            self._tokens -= 1
+            queue.popleft().set_result(None)
+
+    def _record_wait(self, lane: SendLane, wait: float) -> None:
+        self._wait_total[lane] += wait
+        self._wait_count[lane] += 1
+        self._max_wait = max(self._max_wait, wait)
@@ -14,9 +14,17 @@ if TYPE_CHECKING:
     from aiogram_i18n import I18nMiddleware
 
     from ..database import Repository, UoW
+    from ..services import UserCache
 
 
 class UserMiddleware(BaseMiddleware):
+    user_cache: UserCache
+
+    __slots__ = ("user_cache",)
+
+    def __init__(self, user_cache: UserCache) -> None:
+        self.user_cache = user_cache
+
     async def __call__(
         self,
         handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
@@ -29,11 +37,14 @@ class UserMiddleware(BaseMiddleware):
             # when accepting chat_join_request and receiving chat_member.
             return await handler(event, data)
 
-        repository: Repository = data["repository"]
-        user: DBUser | None = await repository.users.get(user_id=aiogram_user.id)
+        user: DBUser | None = self.user_cache.get(aiogram_user.id)
         if user is None:
-            i18n: I18nMiddleware = data["i18n_middleware"]
+            repository: Repository = data["repository"]
             uow: UoW = data["uow"]
+            user = await repository.users.get(user_id=aiogram_user.id)
+            await uow.release()
+        if user is None:
+            i18n: I18nMiddleware = data["i18n_middleware"]
             user = DBUser.from_aiogram(
                 user=aiogram_user,
                 locale=(
@@ -45,6 +56,10 @@ class UserMiddleware(BaseMiddleware):
             await uow.commit(user)
             logger.info("New user in database: {}", user)
         else:
-            user.name = aiogram_user.full_name
+            self.user_cache.set_name(user, aiogram_user.full_name)
+        self.user_cache.put(user)
         data["user"] = user
-        return await handler(event, data)
+        result = await handler(event, data)
+        # Keep changes committed by the handler, e.g. the chosen distance type
+        self.user_cache.put(user)
+        return result
@@ -0,0 +1,50 @@
+from .competitions_cache import CompetitionsListCache
+from .detail_cache import CacheStats, CompetitionDetailCache
+from .event_index import EventIndex
+from .file_store import FileStore, FileStoreStats, GarbageCollectionResult
+from .file_validators import FileValidatorStore, FileValidatorStoreStats
+from .ingestion import CompetitionIngestor, IngestionResult, content_hash
+from .notifications import CompetitionChanges, SubscriptionNotifier
+from .page_archive import (
+    PageArchive,
+    PageArchiveStats,
+    compress_page,
+    decompress_page,
+    page_kind,
+    train_dictionary,
+)
+from .recrawl import RecrawlScheduler, RecrawlStats
+from .search_index import SearchIndex, SearchIndexStats
+from .telegram_files import TelegramFileCache, TelegramFilesStats
+from .user_cache import UserCache, UserCacheStats
+
+__all__ = [
+    "CacheStats",
+    "CompetitionChanges",
+    "CompetitionDetailCache",
+    "CompetitionIngestor",
+    "CompetitionsListCache",
+    "EventIndex",
+    "FileStore",
+    "FileStoreStats",
+    "FileValidatorStore",
+    "FileValidatorStoreStats",
+    "GarbageCollectionResult",
+    "IngestionResult",
+    "PageArchive",
+    "PageArchiveStats",
+    "RecrawlScheduler",
+    "RecrawlStats",
+    "SearchIndex",
+    "SearchIndexStats",
+    "SubscriptionNotifier",
+    "TelegramFileCache",
+    "TelegramFilesStats",
+    "UserCache",
+    "UserCacheStats",
+    "compress_page",
+    "content_hash",
+    "decompress_page",
+    "page_kind",
+    "train_dictionary",
+]
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from loguru import logger
+from tmmoscow_api import use_request_lane
+from tmmoscow_api.enums import DistanceType, RequestLane
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from tmmoscow_api import TmMoscowAPI
+    from tmmoscow_api.types import CompetitionSummary
+
+    from .ingestion import IngestionResult
+
+    CompetitionsListener = Callable[[DistanceType, list[CompetitionSummary]], None]
+
+_Key = tuple[DistanceType, int]  # (distance type, upstream page offset)
+
+
+@dataclass(slots=True)
+class _Entry:
+    competitions: list[CompetitionSummary]
+    fetched_at: float
+
+
+class CompetitionsListCache:
+    """
+    Process-wide cache of recent competitions for each distance type and upstream page.
+
+    Stale entries are served as is while a single background request refreshes them,
+    so only the very first request for a page waits for tmmoscow.ru. Pages which users
+    are about to open can be prefetched in the background. Nobody waits for background
+    refreshes and prefetches, so they go through the refresh lane.
+    """
+
+    _tmmoscow: TmMoscowAPI
+    _ttl: float
+    _refresh_interval: float
+    _entries: dict[_Key, _Entry]
+    _refreshing: dict[_Key, asyncio.Task[list[CompetitionSummary]]]
+    _listeners: list[CompetitionsListener]
+
+    def __init__(self, tmmoscow: TmMoscowAPI, ttl: float, refresh_interval: float) -> None:
+        self._tmmoscow = tmmoscow
+        self._ttl = ttl
+        self._refresh_interval = refresh_interval
+        self._entries = {}
+        self._refreshing = {}
+        self._listeners = []
+
+    def subscribe(self, listener: CompetitionsListener) -> None:
+        """Call `listener` with every freshly fetched competitions list"""
+        self._listeners.append(listener)
+
+    async def get(self, distance_type: DistanceType, offset: int = 0) -> list[CompetitionSummary]:
+        key = (distance_type, offset)
+        entry = self._entries.get(key)
+        if entry is None:
+            return await self.refresh(distance_type, offset)
+        if time.monotonic() - entry.fetched_at > self._ttl:
+            self._refresh_in_background(key)
+        return entry.competitions
+
+    def prefetch(self, distance_type: DistanceType, offset: int) -> None:
+        """Fetch page in the background unless it is already cached and fresh"""
+        entry = self._entries.get((distance_type, offset))
+        if entry is None or time.monotonic() - entry.fetched_at > self._ttl:
+            self._refresh_in_background((distance_type, offset))
+
+    def on_ingested(self, result: IngestionResult) -> None:
+        """Refresh the first page when a competition newer than the ones on it was stored"""
+        if result.previous_version is not None:
+            return
+        entry = self._entries.get((result.distance_type, 0))
+        if entry is None or not entry.competitions:
+            return
+        ids = {competition.id for competition in entry.competitions}
+        if result.competition_id not in ids and result.competition_id > min(ids):
+            self.invalidate(result.distance_type)
+
+    def invalidate(self, distance_type: DistanceType) -> None:
+        """Mark the first page as stale and refresh it, e.g. when a new post was noticed"""
+        key = (distance_type, 0)
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.fetched_at = float("-inf")
+        self._refresh_in_background(key)
+
+    async def refresh(
+        self, distance_type: DistanceType, offset: int = 0
+    ) -> list[CompetitionSummary]:
+        """Fetch competitions page, joining the request in flight if there is one"""
+        return await asyncio.shield(self._get_refresh_task((distance_type, offset)))
+
+    async def run_refresher(self) -> None:
+        """Refresh every distance type on schedule, should be run as a background task"""
+        while True:
+            for distance_type in DistanceType:
+                try:
+                    with use_request_lane(RequestLane.REFRESH):
+                        await self.refresh(distance_type)
+                except Exception:
+                    logger.exception("Failed to refresh competitions of {}", distance_type)
+            await asyncio.sleep(self._refresh_interval)
+
+    def _get_refresh_task(self, key: _Key) -> asyncio.Task[list[CompetitionSummary]]:
+        task = self._refreshing.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch(*key))
+            self._refreshing[key] = task
+            task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+        return task
+
+    def _refresh_in_background(self, key: _Key) -> None:
+        if key not in self._refreshing:
+            # The task copies the context, so its requests go through the refresh lane
+            with use_request_lane(RequestLane.REFRESH):
+                task = self._get_refresh_task(key)
+            task.add_done_callback(self._log_refresh_error)
+
+    @staticmethod
+    def _log_refresh_error(task: asyncio.Task[list[CompetitionSummary]]) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.opt(exception=task.exception()).error("Failed to refresh competitions")
+
+    async def _fetch(self, distance_type: DistanceType, offset: int) -> list[CompetitionSummary]:
+        competitions = await self._tmmoscow.get_recent_competitions(
+            distance_type=distance_type, offset=offset
+        )
+        previous = self._entries.get((distance_type, offset))
+        self._entries[distance_type, offset] = _Entry(
+            competitions=competitions, fetched_at=time.monotonic()
+        )
+        if previous is not None and offset == 0:
+            known_ids = {competition.id for competition in previous.competitions}
+            new_count = sum(competition.id not in known_ids for competition in competitions)
+            if new_count:
+                logger.info("Found {} new competitions of {}", new_count, distance_type)
+        for listener in self._listeners:
+            listener(distance_type, competitions)
+        return competitions
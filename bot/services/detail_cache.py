@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from loguru import logger
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+    from tmmoscow_api import TmMoscowAPI
+    from tmmoscow_api.types import CompetitionDetail, CompetitionSummary
+
+
+@dataclass(frozen=True, slots=True)
+class CacheStats:
+    size: int
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+
+
+@dataclass(slots=True)
+class _Entry:
+    competition: CompetitionDetail
+    fetched_at: float
+
+
+class CompetitionDetailCache:
+    """
+    Bounded LRU cache of competition details with TTL.
+
+    Category pages are much cheaper than articles, so entries are dropped as soon as
+    a category page shows that the article was updated or its views changed noticeably.
+    A fetch in flight while its entry is invalidated returns its result without caching it.
+    """
+
+    _tmmoscow: TmMoscowAPI
+    _max_size: int
+    _ttl: float
+    _views_bucket_size: int
+    _entries: OrderedDict[int, _Entry]
+    _fetching: dict[int, asyncio.Task[CompetitionDetail]]
+    # Invalidations of competitions being fetched, a fetch only caches unchanged ones
+    _generations: dict[int, int]
+    _listeners: list[Callable[[CompetitionDetail], None]]
+    _hits: int
+    _misses: int
+    _evictions: int
+    _invalidations: int
+
+    def __init__(
+        self, tmmoscow: TmMoscowAPI, max_size: int, ttl: float, views_bucket_size: int
+    ) -> None:
+        self._tmmoscow = tmmoscow
+        self._max_size = max_size
+        self._ttl = ttl
+        self._views_bucket_size = views_bucket_size
+        self._entries = OrderedDict()
+        self._fetching = {}
+        self._generations = {}
+        self._listeners = []
+        self._hits = self._misses = self._evictions = self._invalidations = 0
+
+    def subscribe(self, listener: Callable[[CompetitionDetail], None]) -> None:
+        """Call `listener` with every competition fetched from tmmoscow.ru"""
+        self._listeners.append(listener)
+
+    async def get(self, competition_id: int) -> CompetitionDetail:
+        entry = self._entries.get(competition_id)
+        if entry is not None and time.monotonic() - entry.fetched_at <= self._ttl:
+            self._entries.move_to_end(competition_id)
+            self._hits += 1
+            return entry.competition
+        self._misses += 1
+        task = self._fetching.get(competition_id)
+        if task is None:
+            task = asyncio.create_task(self._fetch(competition_id))
+            self._fetching[competition_id] = task
+            task.add_done_callback(lambda _: self._forget_fetch(competition_id))
+        return await asyncio.shield(task)
+
+    def observe(self, competitions: Iterable[CompetitionSummary]) -> None:
+        """Invalidate entries which are outdated according to fresh competition summaries"""
+        for competition in competitions:
+            entry = self._entries.get(competition.id)
+            if entry is not None and self._is_outdated(entry.competition, competition):
+                self.invalidate(competition.id)
+
+    def invalidate(self, competition_id: int) -> None:
+        if competition_id in self._generations:
+            self._generations[competition_id] += 1
+        if self._entries.pop(competition_id, None) is not None:
+            self._invalidations += 1
+            logger.debug("Invalidated cached competition {}", competition_id)
+
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            size=len(self._entries),
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+            invalidations=self._invalidations,
+        )
+
+    def _views_bucket(self, views: int | None) -> int | None:
+        return None if views is None else views // self._views_bucket_size
+
+    def _is_outdated(self, cached: CompetitionDetail, fresh: CompetitionSummary) -> bool:
+        if fresh.updated_at is not None and (
+            cached.updated_at is None or fresh.updated_at > cached.updated_at
+        ):
+            return True
+        return self._views_bucket(fresh.views) != self._views_bucket(cached.views)
+
+    def _forget_fetch(self, competition_id: int) -> None:
+        self._fetching.pop(competition_id, None)
+        self._generations.pop(competition_id, None)
+
+    async def _fetch(self, competition_id: int) -> CompetitionDetail:
+        generation = self._generations.setdefault(competition_id, 0)
+        competition = await self._tmmoscow.get_competition_data(id=competition_id)
+        if self._generations.get(competition_id) == generation:
+            self._entries[competition_id] = _Entry(
+                competition=competition, fetched_at=time.monotonic()
+            )
+            self._entries.move_to_end(competition_id)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+        else:
+            logger.debug("Not caching competition {} invalidated while fetching", competition_id)
+        for listener in self._listeners:
+            listener(competition)
+        return competition
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import bisect
+import sys
+from datetime import date, datetime, timedelta
+from typing import TYPE_CHECKING
+
+from ..const import TIMEZONE
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from tmmoscow_api.enums import DistanceType
+    from tmmoscow_api.types import CompetitionSummary
+
+_Key = tuple[date, int]  # (event begin date, competition id)
+
+
+def _to_date(value: datetime) -> date:
+    if value.tzinfo is not None:
+        value = value.astimezone(TIMEZONE)
+    return value.date()
+
+
+class EventIndex:
+    """
+    In-memory interval index over competition event dates.
+
+    Competitions are kept sorted by the date they begin. Any competition overlapping
+    [start, end] begins not earlier than `start - longest duration`, so a lookup is
+    two binary searches plus a scan over the matching slice.
+    """
+
+    _competitions: dict[int, CompetitionSummary]
+    _keys: dict[DistanceType | None, list[_Key]]
+    _max_duration: timedelta
+
+    __slots__ = ("_competitions", "_keys", "_max_duration")
+
+    def __init__(self) -> None:
+        self._competitions = {}
+        self._keys = {None: []}
+        self._max_duration = timedelta()
+
+    def __len__(self) -> int:
+        return len(self._competitions)
+
+    def __contains__(self, competition_id: int) -> bool:
+        return competition_id in self._competitions
+
+    def add(self, competition: CompetitionSummary) -> None:
+        """Add competition or replace the previously indexed one with the same id"""
+        self.remove(competition.id)
+        if competition.event_begins_at is None or competition.event_ends_at is None:
+            return
+        begins_at = _to_date(competition.event_begins_at)
+        ends_at = _to_date(competition.event_ends_at)
+        key = (begins_at, competition.id)
+        self._competitions[competition.id] = competition
+        self._max_duration = max(self._max_duration, ends_at - begins_at)
+        bisect.insort(self._keys[None], key)
+        bisect.insort(self._keys.setdefault(competition.distance_type, []), key)
+
+    def add_many(self, competitions: Iterable[CompetitionSummary]) -> None:
+        for competition in competitions:
+            self.add(competition)
+
+    def remove(self, competition_id: int) -> None:
+        competition = self._competitions.pop(competition_id, None)
+        if competition is None or competition.event_begins_at is None:
+            return
+        key = (_to_date(competition.event_begins_at), competition_id)
+        for keys in self._keys[None], self._keys[competition.distance_type]:
+            del keys[bisect.bisect_left(keys, key)]
+
+    def overlapping(
+        self, start: date, end: date, distance_type: DistanceType | None = None
+    ) -> list[CompetitionSummary]:
+        """Get competitions taking place at least partly in [start, end] ordered by begin date"""
+        keys = self._keys.get(distance_type, [])
+        lo = bisect.bisect_left(keys, (start - self._max_duration, 0))
+        hi = bisect.bisect_right(keys, (end, sys.maxsize))
+        result: list[CompetitionSummary] = []
+        for _, competition_id in keys[lo:hi]:
+            competition = self._competitions[competition_id]
+            if _to_date(competition.event_ends_at) >= start:  # type: ignore[arg-type]
+                result.append(competition)
+        return result
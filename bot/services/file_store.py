@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from loguru import logger
+
+from ..database import Repository
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
+
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+_CHUNK_SIZE = 256 * 1024  # bytes
+_TEMP_SUFFIX = ".tmp"
+
+
+@dataclass(frozen=True, slots=True)
+class FileStoreStats:
+    writes: int
+    deduplicated_writes: int
+    bytes_written: int
+    collected_files: int
+
+
+@dataclass(frozen=True, slots=True)
+class GarbageCollectionResult:
+    deleted_rows: int
+    deleted_blobs: int
+
+
+class FileStore:
+    """
+    Content-addressed storage of downloaded files on the local disk.
+
+    A file is stored once under its sha256 hash, however many competitions link to it.
+    Blobs are spread over `ab/cd/abcd...` directories, so no directory grows too large,
+    and are written to a temporary file first, so a crash never leaves a partial blob.
+    Files are referenced from content lines through `files_content_lines`, rows and blobs
+    nothing refers to anymore are removed by the garbage collection pass.
+    """
+
+    _root: Path
+    _session_pool: async_sessionmaker[AsyncSession]
+    _grace_period: float
+    _gc_interval: float
+    _writes: int
+    _deduplicated_writes: int
+    _bytes_written: int
+    _collected_files: int
+
+    def __init__(
+        self,
+        root: Path,
+        session_pool: async_sessionmaker[AsyncSession],
+        grace_period: float,
+        gc_interval: float,
+    ) -> None:
+        self._root = root
+        self._session_pool = session_pool
+        self._grace_period = grace_period
+        self._gc_interval = gc_interval
+        self._writes = self._deduplicated_writes = self._bytes_written = 0
+        self._collected_files = 0
+
+    @staticmethod
+    def storage_path(sha256_hash: str) -> str:
+        """Path of the blob relative to the storage root, as kept in `files.storage_path`"""
+        return f"{sha256_hash[:2]}/{sha256_hash[2:4]}/{sha256_hash}"
+
+    def get_path(self, sha256_hash: str) -> Path:
+        return self._root.joinpath(self.storage_path(sha256_hash))
+
+    def exists(self, sha256_hash: str) -> bool:
+        return self.get_path(sha256_hash).is_file()
+
+    async def put(self, content: bytes, sha256_hash: str | None = None) -> str:
+        """Store content unless it is already stored, return its storage path"""
+        if sha256_hash is None:
+            sha256_hash = hashlib.sha256(content).hexdigest()
+        storage_path = self.storage_path(sha256_hash)
+        written = await asyncio.to_thread(self._write, self._root.joinpath(storage_path), content)
+        if written:
+            self._writes += 1
+            self._bytes_written += len(content)
+        else:
+            self._deduplicated_writes += 1
+        return storage_path
+
+    async def read(self, sha256_hash: str) -> bytes:
+        return await asyncio.to_thread(self.get_path(sha256_hash).read_bytes)
+
+    async def iter_chunks(
+        self, sha256_hash: str, chunk_size: int = _CHUNK_SIZE
+    ) -> AsyncIterator[bytes]:
+        """Read the blob piece by piece without holding the whole file in memory"""
+        file = await asyncio.to_thread(self.get_path(sha256_hash).open, "rb")
+        try:
+            while chunk := await asyncio.to_thread(file.read, chunk_size):
+                yield chunk
+        finally:
+            file.close()
+
+    async def collect_garbage(self) -> GarbageCollectionResult:
+        """Remove files no content line links to and blobs no file row refers to"""
+        # Recently seen files may be about to be linked by an ingestion in progress
+        async with self._session_pool() as session, session.begin():
+            deleted = await Repository(session=session).files.delete_unreferenced(
+                older_than=self._grace_period
+            )
+        async with self._session_pool() as session:
+            known_hashes = await Repository(session=session).files.get_hashes()
+        deleted_blobs = await asyncio.to_thread(self._delete_unknown_blobs, known_hashes)
+        self._collected_files += len(deleted)
+        logger.info(
+            "Collected {} unreferenced files and {} orphaned blobs", len(deleted), deleted_blobs
+        )
+        return GarbageCollectionResult(deleted_rows=len(deleted), deleted_blobs=deleted_blobs)
+
+    async def run_collector(self) -> None:
+        """Collect garbage on schedule, should be run as a background task"""
+        while True:
+            await asyncio.sleep(self._gc_interval)
+            try:
+                await self.collect_garbage()
+            except Exception:
+                logger.exception("Failed to collect unreferenced files")
+
+    def stats(self) -> FileStoreStats:
+        return FileStoreStats(
+            writes=self._writes,
+            deduplicated_writes=self._deduplicated_writes,
+            bytes_written=self._bytes_written,
+            collected_files=self._collected_files,
+        )
+
+    @staticmethod
+    def _write(path: Path, content: bytes) -> bool:
+        if path.is_file():
+            # Keep the blob from being collected while its row is being written
+            path.touch()
+            return False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=_TEMP_SUFFIX)
+        temp_path = Path(temp_name)
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(content)
+                file.flush()
+                os.fsync(file.fileno())
+            temp_path.replace(path)
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+        return True
+
+    def _delete_unknown_blobs(self, known_hashes: set[str]) -> int:
+        deleted = 0
+        expired_at = time.time() - self._grace_period
+        for path in self._root.glob("*/*/*"):
+            if path.name in known_hashes:
+                continue
+            # Blobs are written before their rows are committed, leave fresh ones alone
+            if path.stat().st_mtime > expired_at:
+                continue
+            path.unlink(missing_ok=True)
+            deleted += 1
+        return deleted
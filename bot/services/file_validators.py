@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import MutableMapping
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from loguru import logger
+from tmmoscow_api.types import FileValidators
+
+from ..database import Repository
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+
+@dataclass(frozen=True, slots=True)
+class FileValidatorStoreStats:
+    size: int
+    pending_writes: int
+    flushed_writes: int
+
+
+class FileValidatorStore(MutableMapping[str, FileValidators]):
+    """
+    Validators of fetched file urls kept in the `file_urls` table.
+
+    Meant to be the `file_validators` mapping of `TmMoscowAPI`, so unchanged files are
+    requested conditionally after restarts and in every worker process. Validators are
+    loaded once at startup, new ones are written in bulk by a background task.
+    """
+
+    _session_pool: async_sessionmaker[AsyncSession]
+    _flush_interval: float
+    _validators: dict[str, FileValidators]
+    _pending: dict[str, FileValidators]
+    _flushed_writes: int
+
+    def __init__(
+        self, session_pool: async_sessionmaker[AsyncSession], flush_interval: float
+    ) -> None:
+        self._session_pool = session_pool
+        self._flush_interval = flush_interval
+        self._validators = {}
+        self._pending = {}
+        self._flushed_writes = 0
+
+    def __getitem__(self, url: str) -> FileValidators:
+        return self._validators[url]
+
+    def __setitem__(self, url: str, validators: FileValidators) -> None:
+        if self._validators.get(url) != validators:
+            self._validators[url] = validators
+            self._pending[url] = validators
+
+    def __delitem__(self, url: str) -> None:
+        # Forgotten urls are downloaded in full once, the stored row is simply overwritten
+        del self._validators[url]
+        self._pending.pop(url, None)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._validators)
+
+    def __len__(self) -> int:
+        return len(self._validators)
+
+    async def load(self) -> None:
+        async with self._session_pool() as session:
+            rows = await Repository(session=session).files.get_urls()
+        for row in rows:
+            self._validators.setdefault(
+                row.url,
+                FileValidators(
+                    sha256_hash=row.sha256_hash,
+                    etag=row.etag,
+                    last_modified=row.last_modified,
+                    content_length=row.content_length,
+                ),
+            )
+        logger.info("Loaded validators of {} file urls", len(rows))
+
+    async def flush(self) -> None:
+        """Write new validators with a single statement"""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        try:
+            async with self._session_pool() as session, session.begin():
+                await Repository(session=session).files.upsert_urls(
+                    [
+                        {
+                            "url": url,
+                            "sha256_hash": validators.sha256_hash,
+                            "etag": validators.etag,
+                            "last_modified": validators.last_modified,
+                            "content_length": validators.content_length,
+                        }
+                        for url, validators in pending.items()
+                    ]
+                )
+        except Exception:
+            self._pending = pending | self._pending
+            raise
+        self._flushed_writes += len(pending)
+
+    async def run_flusher(self) -> None:
+        """Flush new validators on schedule, should be run as a background task"""
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Failed to write file validators")
+
+    async def close(self) -> None:
+        await self.flush()
+
+    def stats(self) -> FileValidatorStoreStats:
+        return FileValidatorStoreStats(
+            size=len(self._validators),
+            pending_writes=len(self._pending),
+            flushed_writes=self._flushed_writes,
+        )
@@ -0,0 +1,344 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from loguru import logger
+from selectolax.parser import HTMLParser
+from tmmoscow_api.types import CompetitionDetail, CompetitionDetailFiles, ContentLine
+from yarl import URL
+
+from ..database import Repository
+from ..database.models import ContentLineTypes
+from ..utils import as_aware
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Coroutine, MutableMapping, Sequence
+
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+    from tmmoscow_api.enums import DistanceType
+    from tmmoscow_api.types import (
+        CompetitionSummary,
+        ContentBlock,
+        ContentSubtitle,
+        File,
+        FileValidators,
+    )
+
+    from .file_store import FileStore
+
+
+@dataclass(frozen=True, slots=True)
+class IngestionResult:
+    competition_id: int
+    distance_type: DistanceType
+    version: int
+    previous_version: int | None
+
+    @property
+    def created(self) -> bool:
+        """Whether a new version was written"""
+        return self.version != self.previous_version
+
+
+def content_hash(competition: CompetitionDetail) -> str:
+    """Hash everything shown to users about the competition except the views counter"""
+    content = {
+        "title": competition.title,
+        "distance_type_id": competition.distance_type.id,
+        "event_dates": competition.event_dates,
+        "location": competition.location,
+        "logo_url": competition.logo_url,
+        "author": competition.author,
+        "blocks": [
+            [
+                block.title,
+                [
+                    [line.html, line.comment] if isinstance(line, ContentLine) else [line.html]
+                    for line in block.lines
+                ],
+            ]
+            for block in competition.content_blocks
+        ],
+    }
+    return hashlib.sha256(
+        json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+    ).hexdigest()
+
+
+def _line_row(line: ContentLine | ContentSubtitle) -> dict[str, Any]:
+    return {
+        "html": line.html,
+        "comment": line.comment if isinstance(line, ContentLine) else None,
+        "line_type": (
+            ContentLineTypes.CONTENT_LINE
+            if isinstance(line, ContentLine)
+            else ContentLineTypes.CONTENT_SUBTITLE
+        ),
+    }
+
+
+class CompetitionIngestor:
+    """
+    Persists scraped competitions into the database.
+
+    Each competition is written in a single transaction with a fixed number of statements:
+    blocks, lines and files are inserted with multi-row statements regardless of their count.
+    A new version only stores blocks and lines which differ from the previous version.
+    Downloaded file contents are put into the file store before the transaction begins.
+    """
+
+    _session_pool: async_sessionmaker[AsyncSession]
+    _file_store: FileStore | None
+    _file_validators: MutableMapping[str, FileValidators] | None
+    _background_tasks: set[asyncio.Task[Any]]
+    _listeners: list[Callable[[IngestionResult], None]]
+
+    def __init__(
+        self,
+        session_pool: async_sessionmaker[AsyncSession],
+        file_store: FileStore | None = None,
+        file_validators: MutableMapping[str, FileValidators] | None = None,
+    ) -> None:
+        self._session_pool = session_pool
+        self._file_store = file_store
+        self._file_validators = file_validators
+        self._background_tasks = set()
+        self._listeners = []
+
+    def subscribe(self, listener: Callable[[IngestionResult], None]) -> None:
+        """Call `listener` with every committed new competition version"""
+        self._listeners.append(listener)
+
+    async def ingest(self, data: CompetitionDetail | CompetitionDetailFiles) -> IngestionResult:
+        competition, files = (data, []) if isinstance(data, CompetitionDetail) else data
+        files = [file for file in files if file.sha256_hash]
+        storage_paths = await self._store_files(files)
+        new_hash = content_hash(competition)
+        async with self._session_pool() as session, session.begin():
+            repository = Repository(session=session)
+            # Upsert locks the competition row, so concurrent ingestions are serialized
+            await repository.competitions.upsert_many([self._competition_row(competition)])
+            latest = await repository.competitions.get_latest_version(competition.id)
+            if latest is not None and latest.content_hash == new_hash:
+                await repository.competitions.mark_verified(
+                    competition_id=competition.id, version=latest.version
+                )
+                if files:
+                    lines = await repository.content.get_lines_html(
+                        competition_id=competition.id, version=latest.version
+                    )
+                    await self._link_files(
+                        repository, files=files, storage_paths=storage_paths, lines=lines
+                    )
+                return IngestionResult(
+                    competition_id=competition.id,
+                    distance_type=competition.distance_type,
+                    version=latest.version,
+                    previous_version=latest.version,
+                )
+
+            version = 1 if latest is None else latest.version + 1
+            await repository.competitions.add_version(
+                competition_id=competition.id,
+                version=version,
+                content_hash=new_hash,
+                event_dates=competition.event_dates,
+                location=competition.location,
+            )
+            lines = await self._add_content(repository, competition=competition, version=version)
+            await self._link_files(
+                repository, files=files, storage_paths=storage_paths, lines=lines
+            )
+        logger.info("Stored version {} of competition {}", version, competition.id)
+        result = IngestionResult(
+            competition_id=competition.id,
+            distance_type=competition.distance_type,
+            version=version,
+            previous_version=None if latest is None else latest.version,
+        )
+        for listener in self._listeners:
+            listener(result)
+        return result
+
+    async def upsert_summaries(self, competitions: Sequence[CompetitionSummary]) -> None:
+        """Store competitions seen on a category page, their content is left untouched"""
+        async with self._session_pool() as session, session.begin():
+            await Repository(session=session).competitions.upsert_many(
+                [self._summary_row(competition) for competition in competitions]
+            )
+
+    def ingest_in_background(self, data: CompetitionDetail | CompetitionDetailFiles) -> None:
+        self._run_in_background(self.ingest(data))
+
+    def upsert_summaries_in_background(self, competitions: Sequence[CompetitionSummary]) -> None:
+        self._run_in_background(self.upsert_summaries(competitions))
+
+    async def close(self) -> None:
+        """Wait for background ingestions to finish"""
+        await asyncio.gather(*self._background_tasks, return_exceptions=True)
+
+    async def _store_files(self, files: list[File]) -> dict[str, str]:
+        """
+        Put downloaded files into the store, return storage paths by sha256 hash.
+
+        Validators of a file are saved as soon as it is downloaded, so an unchanged file
+        may have never been stored if a previous ingestion failed. Such files lose their
+        validators and are downloaded again by the next fetch.
+        """
+        if self._file_store is None:
+            return {}
+        storage_paths: dict[str, str] = {}
+        for file in files:
+            if file.sha256_hash in storage_paths:
+                continue
+            if file.content is not None:
+                storage_paths[file.sha256_hash] = await self._file_store.put(
+                    file.content, sha256_hash=file.sha256_hash
+                )
+            elif self._file_store.exists(file.sha256_hash):
+                storage_paths[file.sha256_hash] = self._file_store.storage_path(file.sha256_hash)
+            elif self._file_validators is not None:
+                self._file_validators.pop(file.url, None)
+        return storage_paths
+
+    def _run_in_background(self, coroutine: Coroutine[Any, Any, Any]) -> None:
+        task = asyncio.create_task(coroutine)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._on_background_task_done)
+
+    def _on_background_task_done(self, task: asyncio.Task[Any]) -> None:
+        self._background_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.opt(exception=task.exception()).error("Failed to ingest competitions")
+
+    @staticmethod
+    def _summary_row(competition: CompetitionSummary) -> dict[str, Any]:
+        return {
+            "id": competition.id,
+            "title": competition.title,
+            "distance_type_id": competition.distance_type.id,
+            "event_dates": competition.event_dates,
+            "location": competition.location,
+            "views": competition.views,
+            "logo_url": competition.logo_url,
+            "event_begins_at": as_aware(competition.event_begins_at),
+            "event_ends_at": as_aware(competition.event_ends_at),
+            "competition_updated_at": as_aware(competition.updated_at),
+        }
+
+    @classmethod
+    def _competition_row(cls, competition: CompetitionDetail) -> dict[str, Any]:
+        row = cls._summary_row(competition)
+        row["author"] = competition.author
+        if competition.created_at is not None:
+            # Don't erase known creation date when the article was fetched without it
+            row["competition_created_at"] = as_aware(competition.created_at)
+        return row
+
+    @staticmethod
+    async def _add_content(
+        repository: Repository, competition: CompetitionDetail, version: int
+    ) -> list[tuple[int, str]]:
+        """
+        Write content of the new version as a diff against the latest stored one.
+
+        Blocks and lines equal to the ones at the same position in the latest version
+        are shared with it, the others are marked as removed and inserted anew.
+        Return (id, html) of all lines of the new version.
+        """
+        previous_blocks = await repository.content.get_latest_content(competition.id)
+        removed_block_ids: list[int] = []
+        removed_line_ids: list[int] = []
+        kept_lines: list[tuple[int, str]] = []
+        added_blocks: list[tuple[int, ContentBlock]] = []
+        line_rows: list[dict[str, Any]] = []
+        for position, block in enumerate(competition.content_blocks):
+            previous_block = previous_blocks.pop(position, None)
+            if previous_block is None or previous_block.title != block.title:
+                if previous_block is not None:
+                    removed_block_ids.append(previous_block.id)
+                added_blocks.append((position, block))
+                continue
+            for line_position, line in enumerate(block.lines):
+                row = _line_row(line)
+                previous_line = previous_block.lines.pop(line_position, None)
+                if previous_line is not None and (
+                    previous_line.line_type,
+                    previous_line.html,
+                    previous_line.comment,
+                ) == (row["line_type"], row["html"], row["comment"]):
+                    kept_lines.append((previous_line.id, previous_line.html))
+                    continue
+                if previous_line is not None:
+                    removed_line_ids.append(previous_line.id)
+                line_rows.append(
+                    row
+                    | {
+                        "content_block_id": previous_block.id,
+                        "position": line_position,
+                        "added_in_version": version,
+                    }
+                )
+            removed_line_ids.extend(line.id for line in previous_block.lines.values())
+        removed_block_ids.extend(block.id for block in previous_blocks.values())
+
+        await repository.content.remove_blocks(removed_block_ids, version=version)
+        await repository.content.remove_lines(removed_line_ids, version=version)
+        block_ids = await repository.content.add_blocks(
+            [
+                {
+                    "competition_id": competition.id,
+                    "competition_version_id": version,
+                    "position": position,
+                    "title": block.title,
+                }
+                for position, block in added_blocks
+            ]
+        )
+        line_rows.extend(
+            _line_row(line)
+            | {"content_block_id": block_id, "position": position, "added_in_version": version}
+            for block_id, (_, block) in zip(block_ids, added_blocks, strict=True)
+            for position, line in enumerate(block.lines)
+        )
+        line_ids = await repository.content.add_lines(line_rows)
+        return kept_lines + [
+            (line_id, row["html"]) for line_id, row in zip(line_ids, line_rows, strict=True)
+        ]
+
+    @staticmethod
+    async def _link_files(
+        repository: Repository,
+        files: list[File],
+        storage_paths: dict[str, str],
+        lines: list[tuple[int, str]],
+    ) -> None:
+        if not files or not lines:
+            return
+        file_ids = await repository.files.add_many(
+            [
+                {
+                    "title": file.filename,
+                    "server_path": file.url,
+                    "storage_path": storage_paths.get(file.sha256_hash),
+                    "sha256_hash": file.sha256_hash,
+                }
+                for file in files
+            ]
+        )
+        url_to_file_id = {file.url: file_ids[file.sha256_hash] for file in files}
+        links: list[dict[str, Any]] = []
+        for line_id, html in lines:
+            hrefs = [node.attributes.get("href") for node in HTMLParser(html).css("a")]
+            line_file_ids = [url_to_file_id.get(str(URL(href))) for href in hrefs if href]
+            links.extend(
+                {"file_id": file_id, "content_line_id": line_id, "position": position}
+                for position, file_id in enumerate(
+                    dict.fromkeys(i for i in line_file_ids if i is not None)
+                )
+            )
+        await repository.files.link_content_lines(links)
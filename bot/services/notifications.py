@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from aiogram.exceptions import TelegramAPIError
+from loguru import logger
+from selectolax.parser import HTMLParser
+from yarl import URL
+
+from ..database import Repository
+from ..middlewares import SendLane, use_send_lane
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+    from aiogram_i18n.cores import BaseCore
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+    from .ingestion import IngestionResult
+
+
+@dataclass(frozen=True, slots=True)
+class CompetitionChanges:
+    competition_id: int
+    title: str
+    url: str
+    event_dates: tuple[str | None, str | None] | None
+    location: tuple[str | None, str | None] | None
+    new_file_urls: list[str]
+
+
+def _pdf_urls(lines_html: list[str]) -> list[str]:
+    urls: list[str] = []
+    for html in lines_html:
+        for node in HTMLParser(html).css("a"):
+            href = node.attributes.get("href")
+            if href and Path(URL(href).path).suffix == ".pdf":
+                urls.append(href)
+    return list(dict.fromkeys(urls))
+
+
+class SubscriptionNotifier:
+    """
+    Notifies subscribers about new competition versions.
+
+    Subscribers are fetched with a single query and the message is rendered once per locale,
+    then chat ids are queued in batches for a background sender, so ingestion never waits
+    for Telegram.
+    """
+
+    _bot: Bot
+    _session_pool: async_sessionmaker[AsyncSession]
+    _i18n: BaseCore[Any]
+    _batch_size: int
+    _queue: asyncio.Queue[tuple[list[int], str]]
+    _background_tasks: set[asyncio.Task[int]]
+
+    def __init__(
+        self,
+        bot: Bot,
+        session_pool: async_sessionmaker[AsyncSession],
+        i18n: BaseCore[Any],
+        batch_size: int,
+    ) -> None:
+        self._bot = bot
+        self._session_pool = session_pool
+        self._i18n = i18n
+        self._batch_size = batch_size
+        self._queue = asyncio.Queue()
+        self._background_tasks = set()
+
+    def on_ingested(self, result: IngestionResult) -> None:
+        if not result.created or result.previous_version is None:
+            return
+        task = asyncio.create_task(self.notify(result))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._on_notify_done)
+
+    async def notify(self, result: IngestionResult) -> int:
+        """Queue notifications about new version, return number of notified subscribers"""
+        if result.previous_version is None:
+            return 0
+        async with self._session_pool() as session:
+            repository = Repository(session=session)
+            subscribers = await repository.subscriptions.get_subscribers(result.competition_id)
+            if not subscribers:
+                return 0
+            changes = await self._get_changes(
+                repository,
+                competition_id=result.competition_id,
+                previous_version=result.previous_version,
+                version=result.version,
+            )
+        if changes is None:
+            return 0
+
+        chat_ids_by_locale: dict[str, list[int]] = {}
+        for user_id, locale in subscribers:
+            chat_ids_by_locale.setdefault(locale, []).append(user_id)
+        for locale, chat_ids in chat_ids_by_locale.items():
+            text = self._render(changes, locale=locale)
+            for i in range(0, len(chat_ids), self._batch_size):
+                self._queue.put_nowait((chat_ids[i : i + self._batch_size], text))
+        logger.info(
+            "Queued notifications about competition {} for {} subscribers",
+            result.competition_id,
+            len(subscribers),
+        )
+        return len(subscribers)
+
+    async def run_sender(self) -> None:
+        """Send queued notifications, should be run as a background task"""
+        with use_send_lane(SendLane.BROADCAST):
+            while True:
+                chat_ids, text = await self._queue.get()
+                # Pacing is up to the outbound queue, which serves these after interactive replies
+                await asyncio.gather(*(self._send(chat_id, text) for chat_id in chat_ids))
+                self._queue.task_done()
+
+    async def close(self) -> None:
+        await asyncio.gather(*self._background_tasks, return_exceptions=True)
+
+    async def _send(self, chat_id: int, text: str) -> None:
+        try:
+            await self._bot.send_message(chat_id=chat_id, text=text, disable_web_page_preview=True)
+        except TelegramAPIError as e:
+            logger.warning("Failed to notify {}: {}", chat_id, e)
+
+    def _on_notify_done(self, task: asyncio.Task[int]) -> None:
+        self._background_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.opt(exception=task.exception()).error("Failed to notify subscribers")
+
+    @staticmethod
+    async def _get_changes(
+        repository: Repository, competition_id: int, previous_version: int, version: int
+    ) -> CompetitionChanges | None:
+        competition = await repository.competitions.get(competition_id)
+        versions = await repository.competitions.get_versions(
+            competition_id=competition_id, versions=[previous_version, version]
+        )
+        if competition is None or len(versions) != 2:
+            return None
+        previous, current = versions[previous_version], versions[version]
+        diff = await repository.content.get_diff(
+            competition_id=competition_id, from_version=previous_version, to_version=version
+        )
+        new_file_urls = _pdf_urls([html for _, html in diff.added])
+        if new_file_urls:
+            # A link may have just moved from another line
+            previous_file_urls = set(
+                _pdf_urls(
+                    [
+                        html
+                        for _, html in await repository.content.get_lines_html(
+                            competition_id=competition_id, version=previous_version
+                        )
+                    ]
+                )
+            )
+            new_file_urls = [url for url in new_file_urls if url not in previous_file_urls]
+        return CompetitionChanges(
+            competition_id=competition.id,
+            title=competition.title,
+            url=competition.to_summary().url,
+            event_dates=(
+                (previous.event_dates, current.event_dates)
+                if previous.event_dates != current.event_dates
+                else None
+            ),
+            location=(
+                (previous.location, current.location)
+                if previous.location != current.location
+                else None
+            ),
+            new_file_urls=new_file_urls,
+        )
+
+    def _render(self, changes: CompetitionChanges, locale: str) -> str:
+        lines: list[str] = []
+        if changes.event_dates is not None:
+            old, new = changes.event_dates
+            lines.append(
+                self._i18n.get(
+                    "messages-competition_changed_dates", locale, old=old or "—", new=new or "—"
+                )
+            )
+        if changes.location is not None:
+            old, new = changes.location
+            lines.append(
+                self._i18n.get(
+                    "messages-competition_changed_location",
+                    locale,
+                    old=old or "—",
+                    new=new or "—",
+                )
+            )
+        lines.extend(
+            self._i18n.get(
+                "messages-competition_new_file", locale, url=url, filename=Path(url).name
+            )
+            for url in changes.new_file_urls
+        )
+        if not lines:
+            lines.append(self._i18n.get("messages-competition_changed_content", locale))
+        return self._i18n.get(
+            "messages-competition_updated",
+            locale,
+            url=changes.url,
+            title=changes.title,
+            changes="\n".join(lines),
+        )
@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from loguru import logger
+
+from ..database import Repository
+from ..database.models import PageKinds
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+    from yarl import URL
+
+# zlib looks back at most 32 KiB, a longer dictionary is never referenced
+MAX_DICTIONARY_SIZE = 32 * 1024  # bytes
+_COMPRESSION_LEVEL = 9
+
+
+def page_kind(url: URL) -> tuple[PageKinds, int] | None:
+    """Get kind and key of the page at `url` or None if it isn't archived"""
+    query = url.query
+    if query.get("go") != "News" or not query.get("id", "").isdigit():
+        return None
+    key = int(query["id"])
+    if query.get("in") == "cat":
+        return PageKinds.CATEGORY, key
+    if query.get("in") == "view":
+        return PageKinds.COMPETITION, key
+    if query.get("file") == "print":
+        return PageKinds.PRINT, key
+    return None
+
+
+def train_dictionary(samples: Sequence[str], size: int = MAX_DICTIONARY_SIZE) -> bytes:
+    """
+    Build a preset dictionary from lines found in at least half of the sample pages.
+
+    Pages of one kind share most of their markup, so its lines are what the dictionary
+    has to provide. The most common lines go last, closest to the compressed data.
+    Pages sharing no whole lines fall back to the latest sample as the dictionary.
+    """
+    counts: Counter[str] = Counter()
+    for sample in samples:
+        counts.update(line for line in set(sample.splitlines()) if line.strip())
+    common = sorted(
+        (line for line, count in counts.items() if count * 2 >= len(samples)),
+        key=counts.__getitem__,
+    )
+    if not common:
+        return samples[-1].encode()[-size:] if samples else b""
+    return "\n".join(common).encode()[-size:]
+
+
+def compress_page(html: str, dictionary: bytes | None) -> bytes:
+    compressor = (
+        zlib.compressobj(_COMPRESSION_LEVEL)
+        if dictionary is None
+        else zlib.compressobj(_COMPRESSION_LEVEL, zdict=dictionary)
+    )
+    return compressor.compress(html.encode()) + compressor.flush()
+
+
+def decompress_page(content: bytes, dictionary: bytes | None) -> str:
+    decompressor = (
+        zlib.decompressobj() if dictionary is None else zlib.decompressobj(zdict=dictionary)
+    )
+    return (decompressor.decompress(content) + decompressor.flush()).decode()
+
+
+@dataclass(frozen=True, slots=True)
+class PageArchiveStats:
+    archived: int
+    unchanged: int
+    pending: int
+    dictionaries: int
+    raw_bytes: int
+    compressed_bytes: int
+
+
+@dataclass(frozen=True, slots=True)
+class _Page:
+    kind: PageKinds
+    key: int
+    url: str
+    html: str
+    content_hash: str
+
+
+class PageArchive:
+    """
+    Archive of raw html of every fetched tmmoscow.ru page.
+
+    Pages are buffered and written in bulk by a background task, a page whose content
+    hasn't changed since it was last seen is skipped. Pages are compressed with zlib and a
+    preset dictionary per page kind, trained on the first `dictionary_samples` pages of
+    the kind, so the markup pages share costs next to nothing. The archive lets
+    `python -m bot.archive reparse` rebuild competitions without requests to tmmoscow.ru.
+    """
+
+    _session_pool: async_sessionmaker[AsyncSession]
+    _flush_interval: float
+    _dictionary_samples: int
+    _pending: list[_Page]
+    _last_hashes: dict[str, str]
+    _dictionaries: dict[PageKinds, tuple[int, bytes]]
+    _samples: dict[PageKinds, list[str]]
+    _archived: int
+    _unchanged: int
+    _raw_bytes: int
+    _compressed_bytes: int
+
+    def __init__(
+        self,
+        session_pool: async_sessionmaker[AsyncSession],
+        flush_interval: float,
+        dictionary_samples: int,
+    ) -> None:
+        self._session_pool = session_pool
+        self._flush_interval = flush_interval
+        self._dictionary_samples = dictionary_samples
+        self._pending = []
+        self._last_hashes = {}
+        self._dictionaries = {}
+        self._samples = {}
+        self._archived = self._unchanged = self._raw_bytes = self._compressed_bytes = 0
+
+    def add(self, url: URL, html: str) -> None:
+        """Queue fetched page for archiving, meant to be the page listener of `TmMoscowAPI`"""
+        kind_key = page_kind(url)
+        if kind_key is None:
+            return
+        kind, key = kind_key
+        content_hash = hashlib.sha256(html.encode()).hexdigest()
+        if self._last_hashes.get(str(url)) == content_hash:
+            self._unchanged += 1
+            return
+        self._last_hashes[str(url)] = content_hash
+        self._pending.append(
+            _Page(kind=kind, key=key, url=str(url), html=html, content_hash=content_hash)
+        )
+        if kind not in self._dictionaries:
+            samples = self._samples.setdefault(kind, [])
+            if len(samples) < self._dictionary_samples:
+                samples.append(html)
+
+    async def load(self) -> None:
+        """Load the latest dictionaries, should be called before the first flush"""
+        async with self._session_pool() as session:
+            dictionaries = await Repository(session=session).pages.get_latest_dictionaries()
+        self._dictionaries = {
+            dictionary.kind: (dictionary.id, dictionary.data) for dictionary in dictionaries
+        }
+
+    async def flush(self) -> None:
+        """Compress pending pages and write them with a single statement"""
+        await self._train_dictionaries()
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        try:
+            rows = await asyncio.to_thread(self._compress, pending)
+            async with self._session_pool() as session, session.begin():
+                await Repository(session=session).pages.add_many(rows)
+        except Exception:
+            self._pending = pending + self._pending
+            raise
+        self._archived += len(rows)
+        self._raw_bytes += sum(row["size"] for row in rows)
+        self._compressed_bytes += sum(len(row["content"]) for row in rows)
+
+    async def run_flusher(self) -> None:
+        """Flush pending pages on schedule, should be run as a background task"""
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Failed to archive pages")
+
+    async def close(self) -> None:
+        await self.flush()
+
+    def stats(self) -> PageArchiveStats:
+        return PageArchiveStats(
+            archived=self._archived,
+            unchanged=self._unchanged,
+            pending=len(self._pending),
+            dictionaries=len(self._dictionaries),
+            raw_bytes=self._raw_bytes,
+            compressed_bytes=self._compressed_bytes,
+        )
+
+    async def _train_dictionaries(self) -> None:
+        for kind, samples in list(self._samples.items()):
+            if len(samples) < self._dictionary_samples:
+                continue
+            data = await asyncio.to_thread(train_dictionary, samples)
+            async with self._session_pool() as session, session.begin():
+                dictionary_id = await Repository(session=session).pages.add_dictionary(
+                    kind=kind, data=data
+                )
+            self._dictionaries[kind] = (dictionary_id, data)
+            del self._samples[kind]
+            logger.info("Trained {} bytes dictionary for {} pages", len(data), kind.value)
+
+    def _compress(self, pages: list[_Page]) -> list[dict[str, Any]]:
+        rows: list[dict[str, Any]] = []
+        for page in pages:
+            dictionary_id, dictionary = self._dictionaries.get(page.kind, (None, None))
+            rows.append(
+                {
+                    "kind": page.kind,
+                    "key": page.key,
+                    "url": page.url,
+                    "content_hash": page.content_hash,
+                    "dictionary_id": dictionary_id,
+                    "size": len(page.html),
+                    "content": compress_page(page.html, dictionary),
+                }
+            )
+        return rows
@@ -0,0 +1,315 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import heapq
+import math
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from loguru import logger
+from tmmoscow_api import use_request_lane
+from tmmoscow_api.enums import RequestLane
+
+from ..const import TIMEZONE
+from ..database import Repository
+from ..utils import as_aware
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+    from tmmoscow_api import TmMoscowAPI
+    from tmmoscow_api.types import CompetitionSummary
+
+    from .ingestion import CompetitionIngestor
+
+# Share of the time left before an event to wait between refreshes:
+# an event a week away is refreshed every 7 hours, one tomorrow every hour
+_PROXIMITY_SHARE = 1 / 24
+_HOUR = 60 * 60  # seconds
+
+
+@dataclass(frozen=True, slots=True)
+class RecrawlStats:
+    scheduled: int
+    overdue: int
+    refreshes: int
+    changes: int
+    failures: int
+    requests: int
+    stretch: float
+    lag_avg_s: float
+
+
+@dataclass(slots=True)
+class _Entry:
+    competition_id: int
+    event_begins_at: datetime | None
+    event_ends_at: datetime | None
+    updated_at: datetime | None
+    subscribers: int
+    versions: int
+    first_stored_at: datetime | None
+    last_changed_at: datetime | None
+    # Requests one refresh takes: the article and a conditional request per file
+    cost: int
+    interval: float
+    due_at: float
+
+    @property
+    def change_interval(self) -> float | None:
+        """Mean time between observed changes"""
+        if self.versions < 2 or self.first_stored_at is None or self.last_changed_at is None:
+            return None
+        return (self.last_changed_at - self.first_stored_at).total_seconds() / (self.versions - 1)
+
+
+class RecrawlScheduler:
+    """
+    Refreshes articles of competitions which haven't finished yet within a request budget.
+
+    Each competition is refreshed at its own interval: the closer the event, the more
+    often its article changed before and the more subscribers it has, the shorter it is.
+    Competitions are kept in a priority queue by the time they are due. When all intervals
+    together would take more requests than `budget_per_hour`, they are stretched evenly,
+    and a token bucket keeps the actual request rate within the budget. A category page
+    showing a new update date of a competition makes it due at once. Refreshes go through
+    the refresh lane, so they never hold up requests users are waiting for.
+    """
+
+    _tmmoscow: TmMoscowAPI
+    _session_pool: async_sessionmaker[AsyncSession]
+    _ingestor: CompetitionIngestor
+    _budget_per_hour: int
+    _min_interval: float
+    _max_interval: float
+    _reload_interval: float
+    _entries: dict[int, _Entry]
+    _queue: list[tuple[float, int]]
+    _changed: asyncio.Event
+    _demand: float
+    _tokens: float
+    _refilled_at: float
+    _refreshes: int
+    _changes: int
+    _failures: int
+    _requests: int
+    _lag_total: float
+
+    def __init__(
+        self,
+        tmmoscow: TmMoscowAPI,
+        session_pool: async_sessionmaker[AsyncSession],
+        ingestor: CompetitionIngestor,
+        budget_per_hour: int,
+        min_interval: float,
+        max_interval: float,
+        reload_interval: float,
+    ) -> None:
+        self._tmmoscow = tmmoscow
+        self._session_pool = session_pool
+        self._ingestor = ingestor
+        self._budget_per_hour = budget_per_hour
+        self._min_interval = min_interval
+        self._max_interval = max_interval
+        self._reload_interval = reload_interval
+        self._entries = {}
+        self._queue = []
+        self._changed = asyncio.Event()
+        self._demand = 0.0
+        self._tokens = 0.0
+        self._refilled_at = time.monotonic()
+        self._refreshes = self._changes = self._failures = self._requests = 0
+        self._lag_total = 0.0
+
+    @property
+    def stretch(self) -> float:
+        """How many times intervals are stretched to fit into the budget"""
+        return max(1.0, self._demand * _HOUR / self._budget_per_hour)
+
+    async def reload(self) -> None:
+        """Load not finished competitions with their change history and subscribers"""
+        now = datetime.now(TIMEZONE)
+        async with self._session_pool() as session:
+            repository = Repository(session=session)
+            competitions = await repository.competitions.get_not_finished(since=now)
+            ids = [competition.id for competition in competitions]
+            version_stats = await repository.competitions.get_version_stats(ids)
+            subscribers = await repository.subscriptions.count_by_competition(ids)
+
+        for competition_id in self._entries.keys() - set(ids):
+            self._remove(competition_id)
+        for competition in competitions:
+            stats = version_stats.get(competition.id)
+            entry = self._entries.get(competition.id)
+            if entry is None:
+                entry = self._entries[competition.id] = _Entry(
+                    competition_id=competition.id,
+                    event_begins_at=competition.event_begins_at,
+                    event_ends_at=competition.event_ends_at,
+                    updated_at=competition.competition_updated_at,
+                    subscribers=0,
+                    versions=0,
+                    first_stored_at=None,
+                    last_changed_at=None,
+                    cost=1,
+                    interval=0.0,
+                    due_at=0.0,
+                )
+            entry.event_begins_at = competition.event_begins_at
+            entry.event_ends_at = competition.event_ends_at
+            entry.subscribers = subscribers.get(competition.id, 0)
+            if stats is not None:
+                entry.versions = stats.versions
+                entry.first_stored_at = stats.first_stored_at
+                entry.last_changed_at = stats.last_stored_at
+            self._set_interval(entry, now)
+        stretch = self.stretch
+        scheduled_at = time.monotonic()
+        for entry in self._entries.values():
+            if not entry.due_at:
+                # Refresh times aren't kept across restarts, spread first refreshes over intervals
+                self._schedule(entry, random.uniform(0, entry.interval * stretch))  # noqa: S311
+            elif entry.due_at - scheduled_at > entry.interval * stretch:
+                # The interval got shorter, e.g. the competition got new subscribers
+                self._schedule(entry, entry.interval * stretch)
+        logger.info(
+            "Scheduled {} competitions for refresh, intervals are stretched {:.2f} times",
+            len(self._entries),
+            self.stretch,
+        )
+
+    def observe(self, competitions: Iterable[CompetitionSummary]) -> None:
+        """Make competitions with a new update date on a category page due at once"""
+        for competition in competitions:
+            entry = self._entries.get(competition.id)
+            if entry is None:
+                continue
+            updated_at = as_aware(competition.updated_at)
+            if updated_at is not None and updated_at != entry.updated_at:
+                if entry.updated_at is not None:
+                    self._schedule(entry, 0)
+                entry.updated_at = updated_at
+
+    async def run(self) -> None:
+        """Refresh due competitions, should be run as a background task"""
+        reloaded_at = float("-inf")
+        while True:
+            try:
+                if time.monotonic() - reloaded_at > self._reload_interval:
+                    await self.reload()
+                    reloaded_at = time.monotonic()
+                entry = await self._wait_for_due(reloaded_at + self._reload_interval)
+                if entry is None:
+                    continue
+                await self._wait_for_budget()
+                with use_request_lane(RequestLane.REFRESH):
+                    await self._refresh(entry)
+            except Exception:
+                logger.exception("Failed to refresh scheduled competitions")
+                await asyncio.sleep(self._min_interval)
+
+    def stats(self) -> RecrawlStats:
+        now = time.monotonic()
+        return RecrawlStats(
+            scheduled=len(self._entries),
+            overdue=sum(entry.due_at <= now for entry in self._entries.values()),
+            refreshes=self._refreshes,
+            changes=self._changes,
+            failures=self._failures,
+            requests=self._requests,
+            stretch=round(self.stretch, 2),
+            lag_avg_s=round(self._lag_total / self._refreshes, 1) if self._refreshes else 0.0,
+        )
+
+    def _set_interval(self, entry: _Entry, now: datetime, cost: int | None = None) -> None:
+        """Derive refresh interval from event proximity, change history and subscribers"""
+        previous_demand = entry.cost / entry.interval if entry.interval else 0.0
+        if cost is not None:
+            entry.cost = cost
+        begins_at = as_aware(entry.event_begins_at)
+        if begins_at is None:
+            interval = self._max_interval
+        else:
+            interval = max((begins_at - now).total_seconds(), 0) * _PROXIMITY_SHARE
+        change_interval = entry.change_interval
+        if change_interval is not None:
+            # Refresh at least twice per observed change to notice the next one in time
+            interval = min(interval, change_interval / 2)
+        interval /= 1 + math.log2(1 + entry.subscribers)
+        interval = min(max(interval, self._min_interval), self._max_interval)
+        self._demand += entry.cost / interval - previous_demand
+        entry.interval = interval
+
+    def _schedule(self, entry: _Entry, delay: float) -> None:
+        entry.due_at = time.monotonic() + delay
+        heapq.heappush(self._queue, (entry.due_at, entry.competition_id))
+        self._changed.set()
+
+    def _remove(self, competition_id: int) -> None:
+        entry = self._entries.pop(competition_id)
+        self._demand -= entry.cost / entry.interval
+        # Its queue item is skipped as stale once it comes up
+
+    async def _wait_for_due(self, deadline: float) -> _Entry | None:
+        """Pop the earliest due competition, None if nothing is due until `deadline`"""
+        while True:
+            now = time.monotonic()
+            while self._queue:
+                due_at, competition_id = self._queue[0]
+                entry = self._entries.get(competition_id)
+                if entry is not None and entry.due_at == due_at:
+                    break
+                heapq.heappop(self._queue)
+            if self._queue and self._queue[0][0] <= now:
+                due_at, competition_id = heapq.heappop(self._queue)
+                self._lag_total += now - due_at
+                return self._entries[competition_id]
+            wake_at = min(self._queue[0][0], deadline) if self._queue else deadline
+            if wake_at <= now:
+                return None
+            self._changed.clear()
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._changed.wait(), timeout=wake_at - now)
+
+    async def _wait_for_budget(self) -> None:
+        rate = self._budget_per_hour / _HOUR
+        while True:
+            now = time.monotonic()
+            # Allow a burst of at most a minute's worth of requests after a quiet period
+            self._tokens = min(
+                self._tokens + (now - self._refilled_at) * rate, max(rate * 60, 1.0)
+            )
+            self._refilled_at = now
+            if self._tokens >= 1:
+                return
+            await asyncio.sleep((1 - self._tokens) / rate)
+
+    async def _refresh(self, entry: _Entry) -> None:
+        try:
+            data = await self._tmmoscow.get_competition_data(entry.competition_id, with_files=True)
+            result = await self._ingestor.ingest(data)
+        except Exception:
+            logger.exception("Failed to refresh competition {}", entry.competition_id)
+            self._failures += 1
+            self._tokens -= entry.cost
+            self._requests += entry.cost
+        else:
+            self._refreshes += 1
+            now = datetime.now(TIMEZONE)
+            if result.created and result.previous_version is not None:
+                self._changes += 1
+                entry.versions += 1
+                entry.last_changed_at = now
+            entry.event_begins_at = data.competition.event_begins_at
+            entry.event_ends_at = data.competition.event_ends_at
+            cost = 1 + len(data.files)
+            self._tokens -= cost
+            self._requests += cost
+            self._set_interval(entry, now, cost=cost)
+        if entry.competition_id in self._entries:
+            self._schedule(entry, entry.interval * self.stretch)
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import bisect
+import re
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from tmmoscow_api.types import CompetitionSummary
+
+_WORD_PATTERN = re.compile(r"\w+")
+# Share of query trigrams a competition must contain to match a misspelled query
+_MIN_TRIGRAM_SIMILARITY = 0.5
+
+
+def _tokenize(text: str | None) -> list[str]:
+    if not text:
+        return []
+    return _WORD_PATTERN.findall(text.lower().replace("ё", "е"))
+
+
+def _trigrams(term: str) -> set[str]:
+    padded = f"  {term} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+@dataclass(frozen=True, slots=True)
+class SearchIndexStats:
+    size: int
+    terms: int
+    queries: int
+    fuzzy_queries: int
+    search_avg_ms: float
+    search_max_ms: float
+
+
+class SearchIndex:
+    """
+    In-memory full text index over competition titles and locations.
+
+    Every query term must be a prefix of some indexed word, which is a binary search
+    over the sorted vocabulary. Queries with no such matches, usually misspelled ones,
+    fall back to trigram similarity. Results are ordered from the newest competition.
+    """
+
+    _competitions: dict[int, CompetitionSummary]
+    _terms: dict[int, set[str]]
+    _postings: dict[str, set[int]]
+    _vocabulary: list[str]
+    _trigram_postings: dict[str, set[int]]
+    _queries: int
+    _fuzzy_queries: int
+    _search_total: float
+    _search_max: float
+
+    def __init__(self) -> None:
+        self._competitions = {}
+        self._terms = {}
+        self._postings = {}
+        self._vocabulary = []
+        self._trigram_postings = {}
+        self._queries = self._fuzzy_queries = 0
+        self._search_total = self._search_max = 0.0
+
+    def __len__(self) -> int:
+        return len(self._competitions)
+
+    def add(self, competition: CompetitionSummary) -> None:
+        """Add competition or replace the previously indexed one with the same id"""
+        self.remove(competition.id)
+        terms = set(_tokenize(competition.title)) | set(_tokenize(competition.location))
+        self._competitions[competition.id] = competition
+        self._terms[competition.id] = terms
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = set()
+                bisect.insort(self._vocabulary, term)
+            postings.add(competition.id)
+            for trigram in _trigrams(term):
+                self._trigram_postings.setdefault(trigram, set()).add(competition.id)
+
+    def add_many(self, competitions: Iterable[CompetitionSummary]) -> None:
+        for competition in competitions:
+            self.add(competition)
+
+    def remove(self, competition_id: int) -> None:
+        self._competitions.pop(competition_id, None)
+        for term in self._terms.pop(competition_id, ()):
+            postings = self._postings[term]
+            postings.discard(competition_id)
+            if not postings:
+                del self._postings[term]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, term)]
+            for trigram in _trigrams(term):
+                trigram_postings = self._trigram_postings.get(trigram)
+                if trigram_postings is not None:
+                    trigram_postings.discard(competition_id)
+                    if not trigram_postings:
+                        del self._trigram_postings[trigram]
+
+    def search(self, query: str, offset: int = 0, limit: int = 20) -> list[CompetitionSummary]:
+        """Get up to `limit` competitions matching `query` starting from `offset`"""
+        started_at = time.perf_counter()
+        terms = _tokenize(query)
+        if not terms:
+            ids = sorted(self._competitions, reverse=True)
+        else:
+            ids = self._search_prefixes(terms)
+            if not ids:
+                self._fuzzy_queries += 1
+                ids = self._search_trigrams(terms)
+        result = [
+            self._competitions[competition_id] for competition_id in ids[offset : offset + limit]
+        ]
+        elapsed = time.perf_counter() - started_at
+        self._queries += 1
+        self._search_total += elapsed
+        self._search_max = max(self._search_max, elapsed)
+        return result
+
+    def stats(self) -> SearchIndexStats:
+        return SearchIndexStats(
+            size=len(self._competitions),
+            terms=len(self._vocabulary),
+            queries=self._queries,
+            fuzzy_queries=self._fuzzy_queries,
+            search_avg_ms=(
+                round(self._search_total / self._queries * 1000, 3) if self._queries else 0.0
+            ),
+            search_max_ms=round(self._search_max * 1000, 3),
+        )
+
+    def _match_prefix(self, prefix: str) -> set[int]:
+        ids: set[int] = set()
+        for i in range(bisect.bisect_left(self._vocabulary, prefix), len(self._vocabulary)):
+            term = self._vocabulary[i]
+            if not term.startswith(prefix):
+                break
+            ids |= self._postings[term]
+        return ids
+
+    def _search_prefixes(self, terms: list[str]) -> list[int]:
+        # The longest term is usually the most selective one
+        terms = sorted(set(terms), key=len, reverse=True)
+        ids = self._match_prefix(terms[0])
+        for term in terms[1:]:
+            if not ids:
+                break
+            ids &= self._match_prefix(term)
+        return sorted(ids, reverse=True)
+
+    def _search_trigrams(self, terms: list[str]) -> list[int]:
+        query_trigrams = set().union(*(_trigrams(term) for term in terms))
+        scores: dict[int, int] = {}
+        for trigram in query_trigrams:
+            for competition_id in self._trigram_postings.get(trigram, ()):
+                scores[competition_id] = scores.get(competition_id, 0) + 1
+        min_score = len(query_trigrams) * _MIN_TRIGRAM_SIMILARITY
+        matches = [(score, i) for i, score in scores.items() if score >= min_score]
+        matches.sort(reverse=True)
+        return [competition_id for _, competition_id in matches]
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from aiogram.exceptions import TelegramAPIError, TelegramBadRequest
+from aiogram.types import FSInputFile
+from loguru import logger
+
+from ..const import TIMEZONE
+from ..database import Repository
+from ..middlewares import SendLane, use_send_lane
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+    from aiogram.types import Message
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+    from ..database.models import Files
+    from .file_store import FileStore
+
+
+@dataclass(frozen=True, slots=True)
+class TelegramFilesStats:
+    cached_file_ids: int
+    uploads: int
+    sends_by_file_id: int
+    stale_file_ids: int
+
+
+class TelegramFileCache:
+    """
+    Sends stored files to Telegram, uploading each file only once.
+
+    The file id Telegram returns for the first upload is kept in memory and in
+    `files.telegram_file_id`, every later send references it. Concurrent sends of
+    a file which is still being uploaded wait for that upload instead of starting another.
+    """
+
+    _bot: Bot
+    _session_pool: async_sessionmaker[AsyncSession]
+    _file_store: FileStore
+    _warm_up_chat_id: int | None
+    _file_ids: dict[str, str]
+    _uploads: dict[str, asyncio.Future[str | None]]
+    _uploads_count: int
+    _sends_by_file_id: int
+    _stale_file_ids: int
+
+    def __init__(
+        self,
+        bot: Bot,
+        session_pool: async_sessionmaker[AsyncSession],
+        file_store: FileStore,
+        warm_up_chat_id: int | None,
+    ) -> None:
+        self._bot = bot
+        self._session_pool = session_pool
+        self._file_store = file_store
+        self._warm_up_chat_id = warm_up_chat_id
+        self._file_ids = {}
+        self._uploads = {}
+        self._uploads_count = self._sends_by_file_id = self._stale_file_ids = 0
+
+    async def send(self, chat_id: int, file: Files) -> Message:
+        file_id = self._file_ids.get(file.sha256_hash) or file.telegram_file_id
+        upload = self._uploads.get(file.sha256_hash)
+        if file_id is None and upload is not None:
+            file_id = await asyncio.shield(upload)
+        if file_id is not None:
+            try:
+                message = await self._bot.send_document(chat_id=chat_id, document=file_id)
+            except TelegramBadRequest as e:
+                logger.warning("Failed to send file {} by file id: {}", file.sha256_hash, e)
+                self._stale_file_ids += 1
+                self._file_ids.pop(file.sha256_hash, None)
+                await self._save_file_id(file.sha256_hash, None)
+            else:
+                self._sends_by_file_id += 1
+                return message
+        return await self._upload(chat_id, file)
+
+    async def warm_up(self, limit: int) -> int:
+        """Upload files of upcoming popular competitions, return number of uploaded files"""
+        if self._warm_up_chat_id is None:
+            return 0
+        async with self._session_pool() as session:
+            files = await Repository(session=session).files.get_popular_not_uploaded(
+                since=datetime.now(TIMEZONE), limit=limit
+            )
+        uploaded = 0
+        with use_send_lane(SendLane.BROADCAST):
+            for file in files:
+                if file.sha256_hash in self._file_ids:
+                    continue
+                try:
+                    message = await self._upload(self._warm_up_chat_id, file)
+                except (TelegramAPIError, OSError) as e:
+                    logger.warning("Failed to upload file {}: {}", file.sha256_hash, e)
+                    continue
+                uploaded += 1
+                with contextlib.suppress(TelegramAPIError):
+                    await message.delete()
+        if uploaded:
+            logger.info("Uploaded {} files of popular competitions", uploaded)
+        return uploaded
+
+    async def run_warm_up(self, interval: float, limit: int) -> None:
+        """Warm up on schedule, should be run as a background task"""
+        while True:
+            try:
+                await self.warm_up(limit=limit)
+            except Exception:
+                logger.exception("Failed to upload files of popular competitions")
+            await asyncio.sleep(interval)
+
+    def stats(self) -> TelegramFilesStats:
+        return TelegramFilesStats(
+            cached_file_ids=len(self._file_ids),
+            uploads=self._uploads_count,
+            sends_by_file_id=self._sends_by_file_id,
+            stale_file_ids=self._stale_file_ids,
+        )
+
+    async def _upload(self, chat_id: int, file: Files) -> Message:
+        upload: asyncio.Future[str | None] = asyncio.get_running_loop().create_future()
+        self._uploads[file.sha256_hash] = upload
+        file_id: str | None = None
+        try:
+            message = await self._bot.send_document(
+                chat_id=chat_id,
+                document=FSInputFile(self._file_store.get_path(file.sha256_hash), file.title),
+            )
+            if message.document is not None:
+                file_id = message.document.file_id
+        finally:
+            # Waiters upload the file themselves if this upload failed
+            upload.set_result(file_id)
+            self._uploads.pop(file.sha256_hash, None)
+        self._uploads_count += 1
+        if file_id is not None:
+            self._file_ids[file.sha256_hash] = file_id
+            await self._save_file_id(file.sha256_hash, file_id)
+        return message
+
+    async def _save_file_id(self, sha256_hash: str, file_id: str | None) -> None:
+        try:
+            async with self._session_pool() as session, session.begin():
+                await Repository(session=session).files.set_telegram_file_id(
+                    sha256_hash=sha256_hash, file_id=file_id
+                )
+        except Exception:
+            logger.exception("Failed to save Telegram file id of {}", sha256_hash)
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from loguru import logger
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+from ..database import DBUser, Repository
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+
+@dataclass(frozen=True, slots=True)
+class UserCacheStats:
+    size: int
+    hits: int
+    misses: int
+    pending_writes: int
+    flushed_writes: int
+
+
+@dataclass(frozen=True, slots=True)
+class _Snapshot:
+    name: str
+    locale: str
+    distance_type_id: int
+    cached_at: float
+
+
+class UserCache:
+    """
+    Bounded LRU cache of users with TTL.
+
+    Cached users are rebuilt as detached instances, so handlers can still change and commit
+    them with their own session. Name and locale changes are written only when they differ
+    and are coalesced into one background UPDATE per flush interval.
+    """
+
+    _session_pool: async_sessionmaker[AsyncSession]
+    _max_size: int
+    _ttl: float
+    _flush_interval: float
+    _snapshots: OrderedDict[int, _Snapshot]
+    _pending: dict[int, dict[str, Any]]
+    _hits: int
+    _misses: int
+    _flushed_writes: int
+
+    def __init__(
+        self,
+        session_pool: async_sessionmaker[AsyncSession],
+        max_size: int,
+        ttl: float,
+        flush_interval: float,
+    ) -> None:
+        self._session_pool = session_pool
+        self._max_size = max_size
+        self._ttl = ttl
+        self._flush_interval = flush_interval
+        self._snapshots = OrderedDict()
+        self._pending = {}
+        self._hits = self._misses = self._flushed_writes = 0
+
+    def get(self, user_id: int) -> DBUser | None:
+        snapshot = self._snapshots.get(user_id)
+        if snapshot is None or time.monotonic() - snapshot.cached_at > self._ttl:
+            self._misses += 1
+            return None
+        self._snapshots.move_to_end(user_id)
+        self._hits += 1
+        user = DBUser(
+            id=user_id,
+            name=snapshot.name,
+            locale=snapshot.locale,
+            distance_type_id=snapshot.distance_type_id,
+        )
+        make_transient_to_detached(user)
+        return user
+
+    def put(self, user: DBUser) -> None:
+        self._snapshots[user.id] = _Snapshot(
+            name=user.name,
+            locale=user.locale,
+            distance_type_id=user.distance_type_id,
+            cached_at=time.monotonic(),
+        )
+        self._snapshots.move_to_end(user.id)
+        while len(self._snapshots) > self._max_size:
+            self._snapshots.popitem(last=False)
+
+    def set_name(self, user: DBUser, name: str) -> None:
+        self._set(user, "name", name)
+
+    def set_locale(self, user: DBUser, locale: str) -> None:
+        self._set(user, "locale", locale)
+
+    async def flush(self) -> None:
+        """Write pending name and locale changes with a single statement"""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        try:
+            async with self._session_pool() as session, session.begin():
+                await Repository(session=session).users.update_many(
+                    [{"id": user_id, **changes} for user_id, changes in pending.items()]
+                )
+        except Exception:
+            # Keep changes for the next flush unless they were overwritten meanwhile
+            for user_id, changes in pending.items():
+                self._pending[user_id] = changes | self._pending.get(user_id, {})
+            raise
+        self._flushed_writes += len(pending)
+
+    async def run_flusher(self) -> None:
+        """Flush pending changes on schedule, should be run as a background task"""
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Failed to write cached user changes")
+
+    async def close(self) -> None:
+        await self.flush()
+
+    def stats(self) -> UserCacheStats:
+        return UserCacheStats(
+            size=len(self._snapshots),
+            hits=self._hits,
+            misses=self._misses,
+            pending_writes=len(self._pending),
+            flushed_writes=self._flushed_writes,
+        )
+
+    def _set(self, user: DBUser, key: str, value: str) -> None:
+        if getattr(user, key) == value:
+            return
+        # Mark value as already persisted, so committing the user doesn't write it again
+        set_committed_value(user, key, value)
+        self._pending.setdefault(user.id, {})[key] = value
+        self.put(user)
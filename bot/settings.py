@@ -1,7 +1,11 @@
-from pydantic import SecretStr
+from pathlib import Path
+from typing import Self
+
+from pydantic import PositiveInt, SecretStr, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from sqlalchemy import URL
 
+from bot.enums import RunMode
 from bot.utils import PathControl
 
 
@@ -10,15 +14,46 @@ class Settings(BaseSettings):
     drop_pending_updates: bool
     admin_chat_id: list[int]
 
+    run_mode: RunMode = RunMode.POLLING
+    workers: PositiveInt = 1
+    webhook_base_url: str | None = None
+    webhook_path: str = "/webhook"
+    webhook_secret: SecretStr | None = None
+    webhook_host: str = "0.0.0.0"  # noqa: S104
+    webhook_port: int = 8080
+    webhook_max_in_flight: int = 100
+
+    file_storage_dir: Path = PathControl.get("data/files")
+    files_chat_id: int | None = None
+
     postgres_host: str
     postgres_db: str
     postgres_password: SecretStr
     postgres_port: int
     postgres_user: str
     postgres_data: str
+    postgres_pool_size: int = 5
+    postgres_max_overflow: int = 10
+    postgres_pool_timeout: float = 30
+    postgres_pool_recycle: int = 30 * 60
+    postgres_pool_pre_ping: bool = True
+    postgres_prepared_statement_cache_size: int = 100
 
     model_config = SettingsConfigDict(env_file=PathControl.get(".env"), env_file_encoding="utf-8")
 
+    @model_validator(mode="after")
+    def check_webhook_settings(self) -> Self:
+        if self.run_mode != RunMode.WEBHOOK:
+            return self
+        if self.webhook_base_url is None:
+            msg = "WEBHOOK_BASE_URL is required in webhook mode"
+            raise ValueError(msg)
+        # Without the secret anyone could post fake updates to the webhook endpoint
+        if self.webhook_secret is None or not self.webhook_secret.get_secret_value():
+            msg = "WEBHOOK_SECRET is required in webhook mode"
+            raise ValueError(msg)
+        return self
+
     def build_dsn(self) -> URL:
         return URL.create(
             drivername="postgresql+asyncpg",
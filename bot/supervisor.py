@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import queue
+import secrets
+import signal
+from typing import TYPE_CHECKING, Any
+
+from aiogram import Dispatcher
+from aiogram.dispatcher.middlewares.user_context import UserContextMiddleware
+from aiogram.exceptions import TelegramNetworkError, TelegramServerError
+from aiogram.types import Update
+from aiohttp import web
+from loguru import logger
+
+from .app import create_bot, create_dispatcher
+from .enums import RunMode
+from .handlers import admin, inline, user
+from .settings import Settings
+from .utils.loggers import setup_logger
+from .webhook import set_webhook
+
+if TYPE_CHECKING:
+    from multiprocessing.context import SpawnProcess
+
+    from aiogram import Bot
+
+# (shard key, raw update) or None to stop the worker
+_QueueItem = tuple[int, dict[str, Any]] | None
+# Workers don't inherit the supervisor's event loop and connections
+_CONTEXT = multiprocessing.get_context("spawn")
+
+
+def get_shard_key(update: Update) -> int:
+    """Updates with the same key must be processed in order"""
+    context = UserContextMiddleware.resolve_event_context(update)
+    return context.chat_id or context.user_id or 0
+
+
+class Supervisor:
+    """
+    Receives updates and shards them by chat id across worker processes.
+
+    Each worker runs its own dispatcher with its own tmmoscow client and database pool.
+    Updates of a chat always go to the same worker, which processes them one by one,
+    while updates of different chats are processed concurrently.
+    """
+
+    _settings: Settings
+    _queue_size: int
+    _max_in_flight: int
+    _queues: list[multiprocessing.Queue[_QueueItem]]
+    _processes: list[SpawnProcess]
+
+    def __init__(self, settings: Settings, queue_size: int, max_in_flight: int) -> None:
+        self._settings = settings
+        self._queue_size = queue_size
+        self._max_in_flight = max_in_flight
+        self._queues = []
+        self._processes = []
+
+    async def run(self) -> None:
+        for index in range(self._settings.workers):
+            self._queues.append(_CONTEXT.Queue(self._queue_size))
+            self._processes.append(self._start_worker(index))
+        logger.info("Started {} workers", len(self._processes))
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signal_number in signal.SIGINT, signal.SIGTERM:
+            loop.add_signal_handler(signal_number, stop.set)
+
+        bot = create_bot(self._settings)
+        try:
+            if self._settings.run_mode == RunMode.WEBHOOK:
+                await self._serve_webhook(bot, stop)
+            else:
+                await self._poll(bot, stop)
+        finally:
+            await bot.session.close()
+            await self._stop_workers()
+
+    async def dispatch(self, update: Update) -> None:
+        """Send update to its worker, waits while the worker's queue is full"""
+        shard_key = get_shard_key(update)
+        index = shard_key % len(self._queues)
+        if not self._processes[index].is_alive():
+            logger.error("Worker {} exited with code {}", index, self._processes[index].exitcode)
+            self._processes[index] = self._start_worker(index)
+        await asyncio.to_thread(
+            self._queues[index].put,
+            (shard_key, update.model_dump(mode="json", exclude_unset=True)),
+        )
+
+    def _start_worker(self, index: int) -> SpawnProcess:
+        process = _CONTEXT.Process(
+            target=run_worker,
+            args=(index, self._queues[index], self._max_in_flight),
+            name=f"worker-{index}",
+        )
+        process.start()
+        return process
+
+    async def _poll(self, bot: Bot, stop: asyncio.Event) -> None:
+        await bot.delete_webhook(drop_pending_updates=self._settings.drop_pending_updates)
+        allowed_updates = _resolve_used_update_types()
+        offset: int | None = None
+        logger.info("Polling updates")
+        while not stop.is_set():
+            get_updates = asyncio.ensure_future(
+                bot.get_updates(offset=offset, timeout=30, allowed_updates=allowed_updates)
+            )
+            stopping = asyncio.ensure_future(stop.wait())
+            await asyncio.wait((get_updates, stopping), return_when=asyncio.FIRST_COMPLETED)
+            stopping.cancel()
+            if stop.is_set():
+                get_updates.cancel()
+                return
+            try:
+                updates = get_updates.result()
+            except (TelegramNetworkError, TelegramServerError) as e:
+                logger.warning("Failed to get updates: {}", e)
+                await asyncio.sleep(1)
+                continue
+            for update in updates:
+                await self.dispatch(update)
+                offset = update.update_id + 1
+
+    async def _serve_webhook(self, bot: Bot, stop: asyncio.Event) -> None:
+        secret_token = (
+            self._settings.webhook_secret.get_secret_value()
+            if self._settings.webhook_secret
+            else None
+        )
+
+        async def handle(request: web.Request) -> web.Response:
+            if secret_token is not None and not secrets.compare_digest(
+                request.headers.get("X-Telegram-Bot-Api-Secret-Token", ""), secret_token
+            ):
+                return web.Response(body="Unauthorized", status=401)
+            update = Update.model_validate(
+                await request.json(loads=bot.session.json_loads), context={"bot": bot}
+            )
+            await self.dispatch(update)
+            return web.json_response({}, dumps=bot.session.json_dumps)
+
+        app = web.Application()
+        app.router.add_post(self._settings.webhook_path, handle)
+        runner = web.AppRunner(app, handle_signals=False)
+        await runner.setup()
+        try:
+            await web.TCPSite(
+                runner, host=self._settings.webhook_host, port=self._settings.webhook_port
+            ).start()
+            await set_webhook(
+                bot,
+                settings=self._settings,
+                secret_token=secret_token,
+                allowed_updates=_resolve_used_update_types(),
+            )
+            await stop.wait()
+        finally:
+            await runner.cleanup()
+
+    async def _stop_workers(self) -> None:
+        logger.info("Stopping workers")
+        for worker_queue in self._queues:
+            await asyncio.to_thread(worker_queue.put, None)
+        for process in self._processes:
+            await asyncio.to_thread(process.join)
+
+
+def _resolve_used_update_types() -> list[str]:
+    dispatcher = Dispatcher()
+    dispatcher.include_routers(user.router, inline.router, admin.router)
+    return dispatcher.resolve_used_update_types()
+
+
+def run_worker(
+    index: int, worker_queue: multiprocessing.Queue[_QueueItem], max_in_flight: int
+) -> None:
+    # Ctrl+C is delivered to the whole process group, workers stop when the supervisor says so
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    asyncio.run(_run_worker(index, worker_queue, max_in_flight))
+
+
+async def _run_worker(
+    index: int, worker_queue: multiprocessing.Queue[_QueueItem], max_in_flight: int
+) -> None:
+    setup_logger(suffix=f"-worker-{index}")
+    settings = Settings()
+    bot = create_bot(settings)
+    dispatcher = create_dispatcher(settings, bot, run_refresher=index == 0)
+    workflow_data = {"dispatcher": dispatcher, **dispatcher.workflow_data}
+    await dispatcher.emit_startup(bot=bot, **workflow_data)
+    logger.info("Worker {} started", index)
+
+    slots = asyncio.Semaphore(max_in_flight)
+    last_tasks: dict[int, asyncio.Task[None]] = {}
+
+    async def process(
+        shard_key: int, update: dict[str, Any], previous: asyncio.Task[None] | None
+    ) -> None:
+        try:
+            if previous is not None:
+                await asyncio.wait((previous,))
+            await dispatcher.feed_raw_update(bot, update)
+        except Exception:
+            logger.exception("Failed to process update {}", update.get("update_id"))
+        finally:
+            slots.release()
+            if last_tasks.get(shard_key) is asyncio.current_task():
+                del last_tasks[shard_key]
+
+    try:
+        while True:
+            await slots.acquire()
+            try:
+                item = worker_queue.get_nowait()
+            except queue.Empty:
+                item = await asyncio.to_thread(worker_queue.get)
+            if item is None:
+                slots.release()
+                break
+            shard_key, update = item
+            last_tasks[shard_key] = asyncio.create_task(
+                process(shard_key, update, last_tasks.get(shard_key))
+            )
+        await asyncio.gather(*last_tasks.values())
+    finally:
+        await dispatcher.emit_shutdown(bot=bot, **workflow_data)
+        await bot.session.close()
+        logger.info("Worker {} stopped", index)
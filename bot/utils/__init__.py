@@ -1,4 +1,6 @@
 from .distance_type import get_distance_type
+from .fluent import CachedFluentRuntimeCore
 from .path_control import PathControl
+from .timezone import as_aware
 
-__all__ = ["PathControl", "get_distance_type"]
+__all__ = ["CachedFluentRuntimeCore", "PathControl", "as_aware", "get_distance_type"]
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
+
+from aiogram_i18n.cores import FluentRuntimeCore
+
+if TYPE_CHECKING:
+    from functools import _CacheInfo
+
+_Arguments = tuple[tuple[str, Any], ...]
+
+
+class CachedFluentRuntimeCore(FluentRuntimeCore):
+    """
+    Fluent core which memoizes rendered messages by (message id, locale, arguments).
+
+    Bundles are compiled once on startup, so repeated messages, e.g. menus and button
+    titles, skip formatting altogether. Messages with unhashable arguments aren't cached.
+    """
+
+    def __init__(self, *args: Any, cache_size: int, **kwargs: Any) -> None:
+        super().__init__(*args, pre_compile=True, **kwargs)
+        self._get_cached = lru_cache(maxsize=cache_size)(self._render)
+
+    def get(self, message_id: str, locale: str | None = None, /, **kwargs: Any) -> str:
+        locale = self.get_locale(locale=locale)
+        arguments = tuple(sorted(kwargs.items()))
+        try:
+            hash(arguments)
+        except TypeError:
+            pass
+        else:
+            return self._get_cached(message_id, locale, arguments)
+        return super().get(message_id, locale, **kwargs)
+
+    def cache_info(self) -> _CacheInfo:
+        return self._get_cached.cache_info()
+
+    def _render(self, message_id: str, locale: str, arguments: _Arguments) -> str:
+        return super().get(message_id, locale, **dict(arguments))
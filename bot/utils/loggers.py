@@ -3,12 +3,13 @@ from loguru import logger
 database = logger.bind(name="bot.database")
 
 
-def setup_logger(level: str = "INFO") -> None:
+def setup_logger(level: str = "INFO", suffix: str = "") -> None:
+    """`suffix` separates log files of processes running at the same time"""
     for name in ("aiogram.middlewares", "aiogram.event", "aiohttp.access"):
         logger.bind(name=name).level("WARNING")
 
     logger.add(
-        sink="logs/{time:%Y-%m-%d}.log",
+        sink=f"logs/{{time:%Y-%m-%d}}{suffix}.log",
         format="{time} {level} {message}",
         level=level,
         rotation="12:00",
@@ -0,0 +1,10 @@
+from datetime import datetime
+
+from bot.const import TIMEZONE
+
+
+def as_aware(value: datetime | None) -> datetime | None:
+    """Treat naive datetimes parsed from tmmoscow.ru as Moscow time"""
+    if value is None or value.tzinfo is not None:
+        return value
+    return value.replace(tzinfo=TIMEZONE)
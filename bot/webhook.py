@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import asyncio
+import signal
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+from loguru import logger
+
+if TYPE_CHECKING:
+    from aiogram import Bot, Dispatcher
+
+    from .settings import Settings
+
+
+@dataclass(frozen=True, slots=True)
+class WebhookStats:
+    in_flight: int
+    processed: int
+    rejected: int
+
+
+class BoundedRequestHandler(SimpleRequestHandler):
+    """
+    Webhook handler which processes at most `max_in_flight` updates at once.
+
+    Telegram is answered as soon as an update is accepted. When all slots are busy,
+    the response is delayed until one is free, so Telegram slows down delivery instead
+    of the bot piling up tasks. If no slot frees up in time, Telegram is told to retry later.
+    """
+
+    _slots: asyncio.Semaphore
+    _acquire_timeout: float
+    _shutdown_timeout: float
+    _closing: bool
+    _processed: int
+    _rejected: int
+
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        bot: Bot,
+        secret_token: str | None,
+        max_in_flight: int,
+        acquire_timeout: float,
+        shutdown_timeout: float,
+        **data: Any,
+    ) -> None:
+        super().__init__(
+            dispatcher=dispatcher,
+            bot=bot,
+            handle_in_background=True,
+            secret_token=secret_token,
+            **data,
+        )
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._acquire_timeout = acquire_timeout
+        self._shutdown_timeout = shutdown_timeout
+        self._closing = False
+        self._processed = self._rejected = 0
+
+    def stats(self) -> WebhookStats:
+        return WebhookStats(
+            in_flight=len(self._background_feed_update_tasks),
+            processed=self._processed,
+            rejected=self._rejected,
+        )
+
+    async def close(self) -> None:
+        """Stop accepting updates and wait for the accepted ones, bot session is left open"""
+        self._closing = True
+        tasks = self._background_feed_update_tasks
+        if not tasks:
+            return
+        logger.info("Waiting for {} updates to be processed", len(tasks))
+        _, pending = await asyncio.wait(tasks, timeout=self._shutdown_timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning("Cancelled {} updates on shutdown", len(pending))
+
+    async def _handle_request_background(self, bot: Bot, request: web.Request) -> web.Response:
+        if self._closing:
+            return web.Response(status=503)
+        update = await request.json(loads=bot.session.json_loads)
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self._acquire_timeout)
+        except TimeoutError:
+            self._rejected += 1
+            return web.Response(status=503)
+        task = asyncio.create_task(self._background_feed_update(bot=bot, update=update))
+        self._background_feed_update_tasks.add(task)
+        task.add_done_callback(self._on_update_done)
+        return web.json_response({}, dumps=bot.session.json_dumps)
+
+    def _on_update_done(self, task: asyncio.Task[Any]) -> None:
+        self._background_feed_update_tasks.discard(task)
+        self._slots.release()
+        self._processed += 1
+        if not task.cancelled() and task.exception() is not None:
+            logger.opt(exception=task.exception()).error("Failed to process update")
+
+
+async def set_webhook(
+    bot: Bot, settings: Settings, secret_token: str | None, allowed_updates: list[str]
+) -> None:
+    await bot.set_webhook(
+        url=f"{settings.webhook_base_url}{settings.webhook_path}",
+        secret_token=secret_token,
+        max_connections=min(settings.webhook_max_in_flight, 100),
+        allowed_updates=allowed_updates,
+        drop_pending_updates=settings.drop_pending_updates,
+    )
+    logger.info("Webhook is set to {}{}", settings.webhook_base_url, settings.webhook_path)
+
+
+async def run_webhook(
+    dispatcher: Dispatcher,
+    bot: Bot,
+    settings: Settings,
+    acquire_timeout: float,
+    shutdown_timeout: float,
+    **data: Any,
+) -> None:
+    """Serve updates over an aiohttp web app until SIGINT or SIGTERM is received"""
+    handler = dispatcher["webhook"] = BoundedRequestHandler(
+        dispatcher=dispatcher,
+        bot=bot,
+        secret_token=(
+            settings.webhook_secret.get_secret_value() if settings.webhook_secret else None
+        ),
+        max_in_flight=settings.webhook_max_in_flight,
+        acquire_timeout=acquire_timeout,
+        shutdown_timeout=shutdown_timeout,
+        **data,
+    )
+    app = web.Application()
+
+    async def on_startup(_: web.Application) -> None:
+        await set_webhook(
+            bot,
+            settings=settings,
+            secret_token=handler.secret_token,
+            allowed_updates=dispatcher.resolve_used_update_types(),
+        )
+
+    async def on_cleanup(_: web.Application) -> None:
+        await bot.session.close()
+
+    app.on_startup.append(on_startup)
+    # Accepted updates are drained before the dispatcher shuts down, the session is closed last
+    handler.register(app, path=settings.webhook_path)
+    setup_application(app, dispatcher, bot=bot, **data)
+    app.on_cleanup.append(on_cleanup)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signal_number in signal.SIGINT, signal.SIGTERM:
+        loop.add_signal_handler(signal_number, stop.set)
+
+    runner = web.AppRunner(app, handle_signals=False)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host=settings.webhook_host, port=settings.webhook_port).start()
+        logger.info("Listening on {}:{}", settings.webhook_host, settings.webhook_port)
+        await stop.wait()
+    finally:
+        await runner.cleanup()
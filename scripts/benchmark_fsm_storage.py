@@ -0,0 +1,92 @@
+"""
+Benchmark FSM storage get/set throughput.
+
+Usage: python scripts/benchmark_fsm_storage.py [operations] [concurrency]
+
+Rows are written under bot id 0 and removed afterwards.
+"""
+
+import asyncio
+import sys
+import time
+from collections.abc import Awaitable, Callable
+
+from aiogram.fsm.storage.base import BaseStorage, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from sqlalchemy import delete
+
+from bot.const import FSM_CACHE_MAX_SIZE, FSM_CACHE_TTL
+from bot.database import PostgresStorage, create_pool
+from bot.database.models import FSMStates
+from bot.settings import Settings
+
+BENCHMARK_BOT_ID = 0
+
+
+async def measure(
+    name: str, operation: Callable[[int], Awaitable[object]], operations: int, concurrency: int
+) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(i: int) -> None:
+        async with semaphore:
+            await operation(i)
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(run(i) for i in range(operations)))
+    elapsed = time.perf_counter() - started_at
+    print(
+        f"{name:<32} {operations / elapsed:>10.0f} ops/s {elapsed / operations * 1e6:>8.0f} us/op"
+    )
+
+
+async def benchmark(storage: BaseStorage, name: str, operations: int, concurrency: int) -> None:
+    users = max(operations // 10, 1)
+
+    def key(i: int) -> StorageKey:
+        return StorageKey(bot_id=BENCHMARK_BOT_ID, chat_id=i % users, user_id=i % users)
+
+    await measure(
+        f"{name} set_state",
+        lambda i: storage.set_state(key(i), f"state:{i}"),
+        operations,
+        concurrency,
+    )
+    await measure(
+        f"{name} set_data",
+        lambda i: storage.set_data(key(i), {"page": i, "query": "marathon"}),
+        operations,
+        concurrency,
+    )
+    await measure(
+        f"{name} get_state", lambda i: storage.get_state(key(i)), operations, concurrency
+    )
+    await measure(f"{name} get_data", lambda i: storage.get_data(key(i)), operations, concurrency)
+
+
+async def main() -> None:
+    operations = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    session_pool = create_pool(dsn=Settings().build_dsn())
+
+    await benchmark(MemoryStorage(), "memory", operations, concurrency)
+    await benchmark(
+        PostgresStorage(session_pool=session_pool, max_size=FSM_CACHE_MAX_SIZE, ttl=FSM_CACHE_TTL),
+        "postgres (cached)",
+        operations,
+        concurrency,
+    )
+    # Zero TTL makes every read go to the database
+    await benchmark(
+        PostgresStorage(session_pool=session_pool, max_size=FSM_CACHE_MAX_SIZE, ttl=0),
+        "postgres (uncached)",
+        operations,
+        concurrency,
+    )
+
+    async with session_pool() as session, session.begin():
+        await session.execute(delete(FSMStates).where(FSMStates.bot_id == BENCHMARK_BOT_ID))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
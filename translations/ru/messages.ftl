@@ -12,14 +12,47 @@ messages-commands_set =
         *[other] { $count } локалей
     }:</b> { $locales }
 
+messages-stats =
+    📊 <b>Статистика</b>
+    { $stats }
+
 messages-choose_competition = 🏆 Выберите соревнование (дистанции { $distance_type_title }):
 
+messages-upcoming_competitions =
+    📅 Соревнования в ближайшие { $days } дн. (дистанции { $distance_type_title }):
+    { $hidden ->
+        [0] {""}
+       *[other] <i>Показаны первые { $shown }, ещё { $hidden } не поместились</i>
+    }
+
+messages-no_upcoming_competitions =
+    В ближайшие { $days } дн. соревнований (дистанции { $distance_type_title }) не найдено
+
 messages-competition_info =
     <a href="{ $url }">{ $title }</a>:
     <b>Дата:</b> { $date }
     <b>Место:</b> { $location }
     <b>Просмотры:</b> { $views }
 
+messages-inline_competition =
+    <a href="{ $url }">{ $title }</a>
+    <b>Дата:</b> { $date }
+    <b>Место:</b> { $location }
+
+messages-no_competition_files = Файлы этого соревнования ещё не загружены
+
+messages-competition_updated =
+    🔔 <a href="{ $url }">{ $title }</a> обновлено:
+    { $changes }
+
+messages-competition_changed_dates = <b>Дата:</b> { $old } → { $new }
+
+messages-competition_changed_location = <b>Место:</b> { $old } → { $new }
+
+messages-competition_new_file = 📄 <a href="{ $url }">{ $filename }</a>
+
+messages-competition_changed_content = 📝 Изменилось описание соревнования
+
 messages-choose_distance_type = Выберите тип дистанции для поиска недавних соревнований:
 
 messages-choosed_distance_type = Выбран новый тип дистанции: <b> { $new_distance_type_title } </b>
@@ -28,8 +61,16 @@ messages-choosed_distance_type = Выбран новый тип дистанци
 
 commands-start = Запустить бота
 
+commands-upcoming = Ближайшие соревнования
+
 # Buttons
 
+buttons-competition_files = 📄 Файлы
+
 buttons-go_back = ⬅ Вернуться назад
 
+buttons-previous_page = ◀ Назад
+
+buttons-next_page = Дальше ▶
+
 buttons-close_menu = 🗑 Закрыть